@@ -5,14 +5,37 @@ Last updated on April 25 2022
 @author: Colin Sasthav
 """
 #%%## IMPORT PACKAGES
-import module_classes as mc
 import pandas as pd
-import requests
 import io
 import math
 import numpy as np
-from scipy import stats
-from scipy.optimize import curve_fit
+import importlib
+import os
+import json
+import time
+
+#%%## Lazy imports
+#Imports a module the first time one of its attributes is used, so slow packages are only imported when they are needed instead of at startup
+class LazyModule:
+    def __init__(self, module_name, setup_fxn=None):
+        self.module_name = module_name
+        self.setup_fxn = setup_fxn #Optional function that is called with the module once it is imported
+        self.module = None
+    def __getattr__(self, att):
+        if 'module_name' not in self.__dict__: #Not initialized yet, such as when copied
+            raise AttributeError(att)
+        if self.module is None:
+            module = importlib.import_module(self.module_name)
+            if self.setup_fxn is not None:
+                self.setup_fxn(module)
+            self.module = module
+        return getattr(self.module, att)
+
+requests = LazyModule('requests')
+stats = LazyModule('scipy.stats')
+optimize = LazyModule('scipy.optimize')
+
+import module_classes as mc #Imported after LazyModule since module_classes uses it when it is imported
 
 #%%## Helpful functions
 #Finds a value of y for a given x using a linear interpolation of the sets x_s and y_s
@@ -66,7 +89,7 @@ def auto_regression(eq_name, in_data, x_metric, y_metric, r2_threshold=0.97, rem
     else:
         for i in range(0, len(model_types)):
             try:
-                popt, pcov = curve_fit(model_fns[i], x, y)
+                popt, pcov = optimize.curve_fit(model_fns[i], x, y)
                 y_pred = model_fns[i](x, *popt)
                 res = y - y_pred
                 ss_res = np.sum(res**2)
@@ -108,26 +131,173 @@ def remove_outliers(df, metrics, threshold, remove_negative=False):
     return result, outliers 
 
 
+#%%## USGS Response Cache
+#Saves the USGS API responses on disk so that a station is only downloaded once, entries are keyed on the service, station, parameter codes, and date range
+#A request for a date range inside a cached range uses the cached response sliced to the requested dates
+#Entries older than ttl_days are downloaded again, but are still used if the API can not be reached. The oldest entries are removed when the cache is larger than max_size_mb
+#In offline mode the API is never called and only cached responses are used
+class USGSCache:
+    def __init__(self, cache_dir=None, ttl_days=30, max_size_mb=200, offline=False, enabled=True, timeout=60, \
+                 service_url='https://waterservices.usgs.gov/nwis', peak_url='https://nwis.waterdata.usgs.gov/nwis/peak'):
+        if cache_dir is None:
+            cache_dir = os.path.join(os.path.expanduser('~'), '.waterSHED', 'usgs_cache')
+        self.cache_dir = cache_dir
+        self.ttl_days = ttl_days #None to never expire
+        self.max_size_mb = max_size_mb
+        self.offline = offline
+        self.enabled = enabled #If False, the API is called every time and nothing is saved
+        self.timeout = timeout #Request timeout in seconds
+        self.service_url = service_url #Base url of the daily (dv) and instantaneous (iv) services
+        self.peak_url = peak_url
+    
+    #Returns the JSON response of the daily ('dv') or instantaneous ('iv') service for the station and the dates (YYYY-MM-DD) from start_date to end_date
+    def get_series_json(self, service, station_id, start_date, end_date, param_codes='00060,00065'):
+        start_date = pd.Timestamp(start_date).strftime('%Y-%m-%d')
+        end_date = pd.Timestamp(end_date).strftime('%Y-%m-%d')
+        prefix = '{}_{}_{}_'.format(service, station_id, param_codes.replace(',', '-'))
+        entry = self.find_series_entry(prefix, start_date, end_date) if self.is_cacheable(station_id) else None
+        if (entry is None) or self.is_expired(entry):
+            url = '{}/{}/?format=json&sites={}&startDT={}&endDT={}&parameterCd={}&siteStatus=all'.format(self.service_url, service, station_id, start_date, end_date, param_codes)
+            content = self.download(url, entry, lambda content: 'value' in json.loads(content))
+            if content is not None:
+                if self.is_cacheable(station_id):
+                    self.save_entry(prefix + '{}_{}.json'.format(start_date, end_date), content)
+                return json.loads(content)
+        return slice_series_json(json.loads(self.read_entry(entry)), start_date, end_date)
+    
+    #Returns the text response of the peak flow service for the station
+    def get_peak_text(self, station_id):
+        name = 'peak_{}.rdb'.format(station_id)
+        entry = name if self.is_cacheable(station_id) and os.path.isfile(os.path.join(self.cache_dir, name)) else None
+        if (entry is None) or self.is_expired(entry):
+            url = '{}?site_no={}&agency_cd=USGS&format=rdb'.format(self.peak_url, station_id)
+            content = self.download(url, entry, lambda content: content.startswith(b'#'))
+            if content is not None:
+                if self.is_cacheable(station_id):
+                    self.save_entry(name, content)
+                return content.decode('utf-8')
+        return self.read_entry(entry).decode('utf-8')
+    
+    #Only station IDs made of letters and numbers are saved since the ID is part of the file name
+    def is_cacheable(self, station_id):
+        return self.enabled and str(station_id).isalnum()
+    
+    #Downloads the url and returns the response content if it is valid, returns None if the expired entry is used because the API could not be reached
+    def download(self, url, expired_entry, is_valid):
+        if self.offline:
+            if expired_entry is not None:
+                return None
+            raise ConnectionError('The USGS data is not cached and the cache is in offline mode.')
+        try:
+            r = requests.get(url, timeout=self.timeout)
+            r.raise_for_status()
+        except Exception:
+            if expired_entry is not None:
+                return None
+            raise
+        if not is_valid(r.content):
+            raise ValueError('Unexpected USGS response.')
+        return r.content
+    
+    #Returns the name of an entry that covers the date range, the entry with the narrowest range is used
+    def find_series_entry(self, prefix, start_date, end_date):
+        if not os.path.isdir(self.cache_dir):
+            return None
+        best_entry = None
+        best_span = None
+        for name in os.listdir(self.cache_dir):
+            if name.startswith(prefix) and name.endswith('.json'):
+                dates = name[len(prefix):-5].split('_')
+                if (len(dates) == 2) and (dates[0] <= start_date) and (dates[1] >= end_date): #YYYY-MM-DD strings sort by date
+                    span = (pd.Timestamp(dates[1]) - pd.Timestamp(dates[0])).days
+                    if (best_span is None) or (span < best_span) or ((span == best_span) and (not self.is_expired(name))):
+                        best_entry = name
+                        best_span = span
+        return best_entry
+    
+    #Returns True if the entry is older than the time to live
+    def is_expired(self, name):
+        if self.ttl_days is None:
+            return False
+        return time.time() - os.path.getmtime(os.path.join(self.cache_dir, name)) > self.ttl_days * 86400
+    
+    def read_entry(self, name):
+        with open(os.path.join(self.cache_dir, name), 'rb') as f:
+            return f.read()
+    
+    #Saves the response and removes the oldest entries if the cache is too large, the response is still used if it can not be saved
+    def save_entry(self, name, content):
+        if not self.enabled:
+            return
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(os.path.join(self.cache_dir, name), 'wb') as f:
+                f.write(content)
+            self.evict(keep=name)
+        except OSError:
+            print('Unable to save the USGS response to the cache: {}'.format(self.cache_dir))
+    
+    #Removes the oldest entries until the cache is smaller than max_size_mb
+    def evict(self, keep=None):
+        if self.max_size_mb is None:
+            return
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            if os.path.isfile(path):
+                entries.append([os.path.getmtime(path), os.path.getsize(path), name])
+        total_size = sum([e[1] for e in entries])
+        for mtime, size, name in sorted(entries):
+            if total_size <= self.max_size_mb * 1e6:
+                break
+            if name != keep:
+                os.remove(os.path.join(self.cache_dir, name))
+                total_size -= size
+    
+    #Removes all of the entries
+    def clear(self):
+        if os.path.isdir(self.cache_dir):
+            for name in os.listdir(self.cache_dir):
+                if name.endswith('.json') or name.endswith('.rdb'):
+                    os.remove(os.path.join(self.cache_dir, name))
+
+#Removes the values outside of the dates (YYYY-MM-DD) from a daily or instantaneous JSON response
+def slice_series_json(data, start_date, end_date):
+    for series in data['value']['timeSeries']:
+        for values in series['values']:
+            values['value'] = [v for v in values['value'] if start_date <= v['dateTime'][0:10] <= end_date]
+    return data
+
+#The cache used by the USGS functions, e.g. set usgs_cache.offline = True to only use saved data
+usgs_cache = USGSCache()
+
 #%%## USGS Flow API Retrieval Functions
 
+#Returns the error message when the USGS data could not be retrieved
+def get_USGS_access_error(cache):
+    if cache.offline:
+        return 'The USGS data for this request has not been saved and offline mode is on.'
+    return 'Unable to access USGS API. Please check internet connection.'
+
 #When provided a USGS station ID, typically a string of 8 numbers, will scrub the USGS peak flow data API for flood flows if available
 #Station_id = String, show_dialogue = True or False
 #If successful, returns a dataframe with ['dateTime', 'Discharge', 'Stage'] and a diagnostic dict
 #If unsuccessful, returns an empty list and a diagnostic dict with the error message
-def get_peak_USGS_data(station_id, show_dialogue=False):
+def get_peak_USGS_data(station_id, show_dialogue=False, cache=None):
+    if cache is None:
+        cache = usgs_cache
     diag_dict = {}
     try:
-        peak_url = 'https://nwis.waterdata.usgs.gov/nwis/peak?site_no={}&agency_cd=USGS&format=rdb'.format(station_id)
         try:
-            r = requests.get(peak_url)
+            text = cache.get_peak_text(station_id)
         except:
             peak_data = [] 
-            diag_dict['Error'] ='Unable to access USGS API. Please check internet connection.'
+            diag_dict['Error'] = get_USGS_access_error(cache)
             if show_dialogue:
                 print('Peak flow data retrieval: UNSUCCESSFUL')
             return peak_data, diag_dict
             
-        peakData = pd.read_table(io.StringIO(r.text),skiprows=r.text.count('\r\n#') + 1)
+        peakData = pd.read_table(io.StringIO(text),skiprows=text.count('\r\n#') + 1)
         peakData = peakData[['peak_dt', 'peak_va', 'gage_ht']]
         peakData.columns = ['dateTime','Discharge (cfs)', 'Stage (ft)']
         peakData = peakData[1:]
@@ -160,15 +330,15 @@ def get_peak_USGS_data(station_id, show_dialogue=False):
 #Station_id = String, start_date and end_dates = string in 'YYYY-MM-DD' format, show_dialogue = True or False
 #If successful, returns a dataframe with ['dateTime', 'Discharge', 'Stage'] and a diagnostic dict
 #If unsuccessful, returns an empty list and a diagnostic dict with the error message
-def get_stage_USGS_data(station_id, start_date, end_date, show_dialogue=False):
-    daily_data, daily_diag_dict = get_daily_USGS_data(station_id, start_date, end_date, show_dialogue=show_dialogue)
+def get_stage_USGS_data(station_id, start_date, end_date, show_dialogue=False, cache=None):
+    daily_data, daily_diag_dict = get_daily_USGS_data(station_id, start_date, end_date, show_dialogue=show_dialogue, cache=cache)
     if len(daily_data) > 0:
         if len(daily_data.columns) > 2: #Has stage data
             daily_diag_dict['Source'] = 'Daily'
             return daily_data, daily_diag_dict
     
     #If daily didn't return stage data
-    inst_data, inst_diag_dict = get_inst_USGS_data(station_id,start_date, end_date, show_dialogue=show_dialogue)
+    inst_data, inst_diag_dict = get_inst_USGS_data(station_id,start_date, end_date, show_dialogue=show_dialogue, cache=cache)
     if len(inst_data) > 0:
         if len(inst_data.columns) > 2: #Has stage data
             inst_diag_dict['Source'] = 'Instantaneous'
@@ -183,16 +353,16 @@ def get_stage_USGS_data(station_id, start_date, end_date, show_dialogue=False):
 #Station_id = String, start_date and end_dates = string in 'YYYY-MM-DD' format, show_dialogue = True or False
 #If successful, returns a dataframe with ['dateTime', 'Discharge', 'Stage'] and a diagnostic dict
 #If unsuccessful, returns an empty list and a diagnostic dict with the error message
-def get_inst_USGS_data(station_id, start_date, end_date, show_dialogue=False):
+def get_inst_USGS_data(station_id, start_date, end_date, show_dialogue=False, cache=None):
+    if cache is None:
+        cache = usgs_cache
     diag_dict = {}
     try:
         try:
-            inst_url = 'https://waterservices.usgs.gov/nwis/iv/?format=json&sites={}&startDT={}&endDT={}&parameterCd=00060,00065&siteStatus=all'.format(station_id, start_date, end_date)
-            r = requests.get(inst_url)
-            j = r.json()
+            j = cache.get_series_json('iv', station_id, start_date, end_date)
         except:
             inst_data = [] 
-            diag_dict['Error'] ='Unable to access USGS API. Please check internet connection.'
+            diag_dict['Error'] = get_USGS_access_error(cache)
             if show_dialogue:
                 print('Instantaneous flow data retrieval: UNSUCCESSFUL')
             return inst_data, diag_dict
@@ -259,16 +429,16 @@ def get_inst_USGS_data(station_id, start_date, end_date, show_dialogue=False):
 #Station_id = String, start_date and end_dates = string in 'YYYY-MM-DD' format, show_dialogue = True or False
 #If successful, returns a dataframe with ['dateTime', 'Discharge', 'Stage'], although 'Stage' will only be present if availble, and a diagnostic dict
 #If unsuccessful, returns an empty list and a diagnostic dict with the error message
-def get_daily_USGS_data(station_id, start_date, end_date, show_dialogue=False):
+def get_daily_USGS_data(station_id, start_date, end_date, show_dialogue=False, cache=None):
+    if cache is None:
+        cache = usgs_cache
     diag_dict = {}
     try:
         try:
-            daily_url = 'https://waterservices.usgs.gov/nwis/dv/?format=json&sites={}&startDT={}&endDT={}&parameterCd=00060,00065&siteStatus=all'.format(station_id, start_date, end_date)
-            r = requests.get(daily_url)
-            d = r.json()
+            d = cache.get_series_json('dv', station_id, start_date, end_date)
         except:
             daily_data = [] 
-            diag_dict['Error'] ='Unable to access USGS API. Please check internet connection.'
+            diag_dict['Error'] = get_USGS_access_error(cache)
             if show_dialogue:
                 print('Daily flow data retrieval: UNSUCCESSFUL')
             return daily_data, diag_dict
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""
+Micro-benchmarks for the computationally intensive parts of the model. Run this file directly to print the timing tables.
+"""
+#%%## IMPORT PACKAGES
+import module_classes as mc
+import case_study_functions as csf
+import pandas as pd
+import datetime
+import time
+import subprocess
+import sys
+import os
+
+#%%## Benchmark objects
+#Returns a facility made from the case study modules with a given number of generation modules at a given design flow
+#The facility is only used for the design functions, so the site does not have any flow data
+def get_benchmark_facility(gen_dispatch_mode, gen_count=3, design_flow=338, allow_overrun=False, case_name='Deerfield'):
+    site = mc.Site('Benchmark Site', 500, None, mc.Equation('Stage', 'Linear', [0.001, 1], 'Flow (cfs)', 'Stage (ft)'))
+    prefs = mc.Facility_preferences(['Gen', 'Sed', 'Fish', 'Rec', 'Wat'], 10, \
+                                    datetime.datetime(2000, 1, 1), datetime.datetime(2000, 12, 31), allow_overrun, gen_dispatch_mode=gen_dispatch_mode)
+    mod_lib = mc.Module_library()
+    for mod in csf.get_default_modules(case_name):
+        mod_lib.add_dynamic(mod)
+    proj = mc.SMH_project(site, None, prefs, mod_lib)
+    gen_mod = mod_lib.all_mods_dict['Gen'][0]
+    gen_mod.redesign_by_name('Design Flow', design_flow)
+    return mc.Facility('Benchmark', proj, [gen_mod], [gen_count], mod_lib.all_mods_dict['Spill'][0], 1, \
+                       mod_lib.all_mods_dict['Non'][0], mod_lib.all_mods_dict['Fou'][0])
+
+#%%## Benchmark functions
+#Returns the fastest time in seconds out of the repeated function calls
+def time_function(func, repeats=3):
+    times = []
+    for i in range(0, repeats):
+        start_time = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start_time)
+    return min(times)
+
+#Times the construction of the generation dispatch tables for facilities with different numbers of generation modules
+def benchmark_gen_dispatch_tables(gen_counts=[2, 4, 8], design_flow=338, repeats=3):
+    results = []
+    for gen_count in gen_counts:
+        fac = get_benchmark_facility('Simple Greedy', gen_count=gen_count, design_flow=design_flow)
+        simple_time = time_function(fac.get_simple_greedy_gen_dispatch, repeats)
+        adv_time = time_function(fac.get_adv_greedy_gen_dispatch, repeats)
+        dp_time = time_function(lambda: fac.get_dp_gen_dispatch([True for i in range(0, fac.num_gen)]), repeats)
+        results.append([gen_count, fac.max_gen_flow, simple_time, adv_time, dp_time])
+    return pd.DataFrame(results, columns=['Generation Modules', 'Max Generation Flow (cfs)', 'Simple Greedy (s)', 'Advanced Greedy (s)', 'Dynamic Programming (s)'])
+
+#Code run in a new interpreter to time the start up of the application, the application window is only created if there is a display
+STARTUP_CODE = '''
+import time
+start_time = time.perf_counter()
+import waterSHED_main
+import_time = time.perf_counter() - start_time
+try:
+    root = waterSHED_main.tk.Tk()
+    start_time = time.perf_counter()
+    app = waterSHED_main.tkinterApp(root)
+    root.update()
+    app_time = time.perf_counter() - start_time
+    root.destroy()
+except waterSHED_main.tk.TclError: #No display
+    app_time = float('nan')
+import sys
+loaded = [name for name in ['matplotlib', 'scipy', 'tksheet', 'PIL', 'openpyxl', 'requests'] if name in sys.modules]
+print(import_time, app_time, ','.join(loaded))
+'''
+
+#Times the start up of the application in new interpreters so that the imports are not already cached
+def benchmark_startup(repeats=3):
+    results = []
+    for i in range(0, repeats):
+        output = subprocess.run([sys.executable, '-c', STARTUP_CODE], cwd=os.path.dirname(os.path.abspath(__file__)), \
+                                capture_output=True, text=True, check=True).stdout.split()
+        results.append([i+1, float(output[0]), float(output[1]), output[2] if len(output) > 2 else 'None'])
+    return pd.DataFrame(results, columns=['Run', 'Import (s)', 'Application Window (s)', 'Packages Loaded'])
+
+#%%## Run benchmarks
+if __name__ == '__main__':
+    print('Generation dispatch table construction')
+    print(benchmark_gen_dispatch_tables().to_string(index=False))
+    print('\nApplication start up')
+    print(benchmark_startup().to_string(index=False))
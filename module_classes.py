@@ -5,22 +5,36 @@ Last updated on April 25 2022
 @author: Colin Sasthav
 """
 #%%## IMPORT PACKAGES
-from copy import deepcopy
-from matplotlib.patches import Rectangle
+from copy import copy, deepcopy
+from collections import OrderedDict
+from functools import cached_property
 import pandas as pd
 import math
-import matplotlib.pyplot as plt
-import matplotlib.ticker as plticker
 import numpy as np
 import random
 import statistics as stats
 import waterSHED_styles as sty
 import aux_functions as af
+plt = af.LazyModule('matplotlib.pyplot') #Matplotlib is only imported when a figure is made
+plticker = af.LazyModule('matplotlib.ticker')
+patches = af.LazyModule('matplotlib.patches')
 import time
 import itertools
+import os
+import threading
+import concurrent.futures
 #%%## Plot Styles
 MODULE_COLORS = sty.MODULE_COLORS
 
+#%%## Objectives
+MINIMIZED_OBJECTIVES = ['LCOE ($/MWh)', 'ICC ($)', 'Unit cost ($/kW)'] #Objective metrics (SimResults.obj_metrics keys) that are minimized, the other objectives are maximized
+#Returns True if the objective is maximized
+def is_maximized_objective(objective):
+    return objective not in MINIMIZED_OBJECTIVES
+#Returns True if the objective value can be compared, e.g. the unit cost is 'N/A' for facilities without nameplate capacity
+def is_numeric_objective(obj):
+    return isinstance(obj, (int, float, np.number)) and not isinstance(obj, bool)
+
 #%%## SMH PROJECT CLASS - compiles all the objects need to create and simulate a facility
 class SMH_project:
     def __init__(self, site, costs, facility_prefs, mod_lib, species_list=None):
@@ -30,6 +44,8 @@ class SMH_project:
         self.mod_lib = mod_lib
         self.species_list = species_list
         self.cl = ['Gen', 'Wat', 'Sed', 'Fish', 'Fou', 'Rec', 'Non', 'Spill']
+        self.fitness_cache = FitnessCache() #Simulation results of the facility designs that have been evaluated with the current inputs, cleared at the start of each optimization
+        self.result_dtype = np.float64 #Data type of the daily time series stored in the simulation results (e.g. np.float32 to halve their memory), the metrics are always calculated with np.float64
         
     #Changes a given attribute so that a new facility can be created
     def set_enum_params(self, req_mods_dict, pass_mods_list, pass_mods_counts, spill_mod_count, mod_name, att_name, att_val):
@@ -91,11 +107,16 @@ class SMH_project:
         return req_mods_dict, pass_mods_list
     
     #Run the enumeration by trying all attribute combinations, creating facilities, simulating them, and keeping the highest objective
-    def enumeration_optimization(self, objective, enum_lists,save_bools, show_anim=False):
+    #The attribute combinations can be split into chunks that are simulated in parallel using the executors from get_evaluation_pool
+    #If keep_results is True, a list of the simulation results of every design is also returned, each linked to a copy of its facility
+    #The kept results other than the best are compacted, so they only have the metrics and economic inputs and the memory does not grow with the number of designs
+    #The progress is sent to progress_callback after each evaluation (after each chunk for a process pool), and setting cancel_event stops the
+    #enumeration between evaluations and returns the results of the designs that were evaluated
+    def enumeration_optimization(self, objective, enum_lists,save_bools, show_anim=False, executor='Serial', max_workers=None, chunk_size=None, keep_results=False, \
+                                 progress_callback=None, cancel_event=None):
         if show_anim == True:
-            fig = None
-            ax = None
             plt.close('all')
+        self.fitness_cache.clear()
         
         #enum_dicts = [req_mods_dict,pass_mods_list,const_dict, enum_dict]
         req_mods_dict = enum_lists[0] #{'Foundation':mod, 'Non-overflow':mod, 'Spill': mod, 'Flushing': mod or None}
@@ -126,21 +147,138 @@ class SMH_project:
                 if screen_bool_dict[self.mod_lib.screens_list[i].name] == True:                
                     screens_list.append(self.mod_lib.screens_list[i])
         
-        #Set the objective
-        if objective in ['LCOE ($/MWh)', 'ICC ($)','Unit Cost ($/kW)']:
-            maximize = False
-            best_obj = 1000000000000
+        #Simulate the attribute combinations, either in one serial chunk or in parallel chunks
+        enum_state = [req_mods_dict, pass_mods_list, pass_mods_counts, spill_mod_count, enum_list, screens_list]
+        combo_count = math.prod([len(i[2]) for i in enum_list])
+        progress = RunProgress('Enumeration', combo_count, objective, progress_callback, cancel_event)
+        pool = self.get_evaluation_pool(executor, max_workers)
+        if pool is None:
+            chunk_outs = [self.enumerate_chunk(objective, enum_state, save_bools, 0, combo_count, show_anim=show_anim, keep_results=keep_results, progress=progress)]
+        else: #The animation is only shown for serial enumeration
+            if chunk_size is None: #Use several chunks per worker so that the workers stay busy when the chunks take different times
+                worker_count = max_workers if max_workers is not None else os.cpu_count()
+                chunk_size = max(1, math.ceil(combo_count / (4 * worker_count)))
+            try:
+                futures = []
+                chunk_counts = {}
+                for start in range(0, combo_count, chunk_size):
+                    stop = min(start + chunk_size, combo_count)
+                    if isinstance(pool, concurrent.futures.ProcessPoolExecutor): #The modules are copied when sent to the worker process
+                        futures.append(pool.submit(enumerate_worker_chunk, objective, enum_state, save_bools, start, stop, keep_results))
+                    else: #Each thread changes its own copy of the modules and updates the progress after each evaluation
+                        futures.append(pool.submit(self.enumerate_chunk, objective, deepcopy(enum_state), save_bools, start, stop, False, keep_results, progress))
+                    chunk_counts[futures[-1]] = stop - start
+                for future in concurrent.futures.as_completed(futures):
+                    if progress.is_cancelled(): #Chunks that have not started are cancelled, running chunks stop after their current evaluation
+                        for f in futures:
+                            f.cancel()
+                    if (not future.cancelled()) and isinstance(pool, concurrent.futures.ProcessPoolExecutor):
+                        chunk_out = future.result()
+                        if chunk_out is not False:
+                            progress.update(chunk_counts[future], *self.get_chunk_best(objective, chunk_out))
+                chunk_outs = [future.result() for future in futures if not future.cancelled()]
+            finally:
+                pool.shutdown()
+        
+        #Merge the chunk results in enumeration order
+        maximize, best_obj = self.get_initial_objective(objective)
+        results = ResultsAccumulator()
+        best_fac = None
+        best_sim_res = None
+        kept_results = []
+        for chunk_out in chunk_outs:
+            if chunk_out is False:
+                return False
+            chunk_results, chunk_best_fac, chunk_best_res, chunk_kept = chunk_out
+            for run_name, results_dict in chunk_results:
+                results.add_run(run_name, results_dict)
+            for kept_res in chunk_kept:
+                if kept_res.proj is None: #Results from a worker process
+                    self.attach_worker_results(kept_res.fac, kept_res)
+                kept_results.append(kept_res)
+            if chunk_best_res is not None:
+                if chunk_best_res.proj is None:
+                    self.attach_worker_results(chunk_best_fac, chunk_best_res)
+                chunk_obj = chunk_best_res.obj_dict[objective]
+                if (maximize and (chunk_obj > best_obj)) or ((not maximize) and (chunk_obj < best_obj)):
+                    if keep_results and (best_sim_res is not None):
+                        best_sim_res.compact()
+                    best_obj = chunk_obj
+                    best_fac = chunk_best_fac
+                    best_sim_res = chunk_best_res
+                elif keep_results:
+                    chunk_best_res.compact()
+        if keep_results:
+            return [best_fac, best_sim_res, results.get_df(), kept_results]
+        return [best_fac, best_sim_res, results.get_df()]
+    
+    #Attaches the project to a facility and simulation results returned from a worker process
+    def attach_worker_results(self, fac, sim_res):
+        fac.attach_project(self)
+        sim_res.attach(self, fac)
+        fac.add_simulation_results(sim_res)
+    
+    #Returns True if changing the parameter only changes the economic results, so the facility operation does not need to be simulated again
+    #The cost table attributes (energy price, discount rate, project life, O&M, etc.) are economic, all other parameters are operational
+    def is_economic_parameter(self, obj, variable_name=None):
+        return (obj is self.costs) and (variable_name is None or hasattr(self.costs, variable_name))
+    
+    #Recalculates the economics of the results kept by enumeration_optimization and returns [best_fac, best_sim_res] for the objective
+    def update_economic_results(self, objective, kept_results):
+        maximize, best_obj = self.get_initial_objective(objective)
+        best_sim_res = None
+        for sim_res in kept_results:
+            sim_res.update_economics()
+            if not is_numeric_objective(sim_res.obj_dict[objective]):
+                continue
+            if (maximize and (sim_res.obj_dict[objective] > best_obj)) or ((not maximize) and (sim_res.obj_dict[objective] < best_obj)):
+                best_obj = sim_res.obj_dict[objective]
+                best_sim_res = sim_res
+        if best_sim_res is None:
+            return [None, None]
+        return [best_sim_res.fac, best_sim_res]
+    
+    #Returns the best objective and facility of an enumeration chunk, or None if no design in the chunk was simulated
+    def get_chunk_best(self, objective, chunk_out):
+        if chunk_out[2] is None:
+            return None, None
+        return chunk_out[2].obj_dict[objective], chunk_out[1]
+    
+    #Returns whether the objective is maximized and the starting best objective value
+    def get_initial_objective(self, objective):
+        if is_maximized_objective(objective):
+            return True, -1000000000000
         else:
-            maximize = True
-            best_obj = -1000000000000
-            
-            
-        results_df = pd.DataFrame()
+            return False, 1000000000000
+    
+    #Simulates the attribute combinations from start to stop (in itertools.product order) and returns the results of each run and the best facility of the chunk
+    #enum_state = [req_mods_dict, pass_mods_list, pass_mods_counts, spill_mod_count, enum_list, screens_list], the modules are redesigned in place
+    #progress is an optional RunProgress that is updated after each evaluation and stops the chunk if the run is cancelled
+    def enumerate_chunk(self, objective, enum_state, save_bools, start, stop, show_anim=False, keep_results=False, progress=None):
+        req_mods_dict, pass_mods_list, pass_mods_counts, spill_mod_count, enum_list, screens_list = enum_state
+        if show_anim == True:
+            fig = None
+            ax = None
+        maximize, best_obj = self.get_initial_objective(objective)
+        chunk_results = []
+        kept_results = []
         best_fac = None
         best_sim_res = None
-        counter = 1
         iter_lists = [i[2] for i in enum_list]
-        for att_vals in itertools.product(*iter_lists): #Loop through all attribute iteration combinations
+        metrics = None if save_bools[0] else [objective] #Only the objective is calculated for each design if the objective metrics are not saved
+        
+        #Set the attributes of the previous combination so that the chunk starts from the same module state as a serial enumeration
+        if start > 0:
+            prev_vals = next(itertools.islice(itertools.product(*iter_lists), start-1, None))
+            for i in range(0, len(enum_list)):
+                req_mods_dict, pass_mods_list, pass_mods_counts, spill_mod_count = self.set_enum_params(req_mods_dict, pass_mods_list, pass_mods_counts, spill_mod_count,enum_list[i][0], enum_list[i][1], prev_vals[i])
+                if req_mods_dict is False:
+                    return False
+        
+        counter = start + 1
+        for att_vals in itertools.islice(itertools.product(*iter_lists), start, stop): #Loop through the attribute iteration combinations in the chunk
+            if (progress is not None) and progress.is_cancelled():
+                break
             time_start = time.perf_counter()
             for i in range(0, len(enum_list)):
                 req_mods_dict, pass_mods_list, pass_mods_counts, spill_mod_count = self.set_enum_params(req_mods_dict, pass_mods_list, pass_mods_counts, spill_mod_count,enum_list[i][0], enum_list[i][1], att_vals[i])
@@ -150,46 +288,55 @@ class SMH_project:
             #Create a facility with enumerated attributes
             fac = Facility(run_name, self, pass_mods_list, pass_mods_counts, req_mods_dict['Spill'], spill_mod_count, req_mods_dict['Non-overflow'], req_mods_dict['Foundation'], req_mods_dict['Flushing'], screens=screens_list)
             #Evaluate the facility
-            sim_res = self.evaluate(fac)
+            sim_res = self.evaluate(fac, metrics)
             time_end = time.perf_counter()
-            sim_res.add_time(round(time_end - time_start, 2))
             if sim_res is False:
                 print('Unable to simulate iteration: {}'.format(run_name))
             else:
+                sim_res.add_time(round(time_end - time_start, 2))
                 #Save the objectives and input values
                 results_dict = sim_res.get_run_dict(*save_bools) 
                 results_dict['Enumeration Objective'] = sim_res.obj_dict[objective]
                 results_dict['Input Values'] = att_vals
-                temp_df = pd.DataFrame.from_dict(results_dict, orient='index', columns=[run_name]).reset_index()
-                temp_df.rename(columns={'index':'Metric'},inplace=True)
-                if len(results_df) <= 0:
-                    results_df = temp_df
-                else:
-                    results_df = pd.merge(results_df, temp_df, on='Metric', sort=False, how='outer')
+                chunk_results.append([run_name, results_dict])
                         
-                #Find and save if the new results is better the previous best
-                if maximize == True:
-                    if sim_res.obj_dict[objective] > best_obj:
-                        best_obj = sim_res.obj_dict[objective]
-                        best_fac = deepcopy(fac)
-                        best_sim_res = sim_res
-                else:
-                    if sim_res.obj_dict[objective] < best_obj:
+                #Find and save if the new results is better the previous best, the saved facilities keep their own modules since the enumeration modules are redesigned
+                is_best = is_numeric_objective(sim_res.obj_dict[objective]) and ((maximize and (sim_res.obj_dict[objective] > best_obj)) or ((not maximize) and (sim_res.obj_dict[objective] < best_obj)))
+                if is_best or keep_results:
+                    saved_fac = fac.get_design_copy(copy_mod_names=True)
+                    saved_res = sim_res.get_copy(self, saved_fac)
+                    saved_fac.add_simulation_results(saved_res)
+                    if keep_results: #Only the best result of the chunk keeps its time series, the metrics are calculated before the results are compacted
+                        kept_results.append(saved_res)
+                        if not is_best:
+                            saved_res.compact()
+                        elif best_sim_res is not None:
+                            best_sim_res.compact()
+                    if is_best:
                         best_obj = sim_res.obj_dict[objective]
-                        best_fac = deepcopy(fac) 
-                        best_sim_res = sim_res
+                        best_fac = saved_fac
+                        best_sim_res = saved_res
                         
                 if show_anim ==True:
                     fig, ax = fac.plot_facility(fig=fig, ax=ax, it=counter, obj=fac.get_latest_objective(objective, formatted=True))
+            if progress is not None: #The progress keeps the best of the chunk bests
+                if best_sim_res is None:
+                    progress.update()
+                else:
+                    progress.update(1, best_sim_res.obj_dict[objective], best_fac)
             counter +=1
-        return [best_fac, best_sim_res, results_df]
+        return chunk_results, best_fac, best_sim_res, kept_results
     
     #Use the custom genetic algorithm to optimize the module combinations and attributes
-    def optimize(self, objective, constraints, enum_lists, iterations=5, population_size=9, best_count=3, mutate_count=3, random_count=3, cross_num=3, show_anim = False, print_results=True):
+    #The progress is sent to progress_callback after each evaluation, and setting cancel_event stops the optimization between evaluations
+    #and returns the best facility of the last complete iteration (an empty list if the first iteration was not completed)
+    def optimize(self, objective, constraints, enum_lists, iterations=5, population_size=9, best_count=3, mutate_count=3, random_count=3, cross_num=3, show_anim = False, print_results=True, executor='Serial', max_workers=None, \
+                 progress_callback=None, cancel_event=None):
         if show_anim == True:
             fig = None
             ax = None
             plt.close('all')
+        self.fitness_cache.clear()
         
         #enum_lists[0] = req_mods_dict, enum_lists[1] = pass_mods_list
         enum_lists[0], enum_lists[1] = self.set_noniterable_parameters(enum_lists[0], enum_lists[1])
@@ -209,41 +356,150 @@ class SMH_project:
         if popu.valid == False:
             return 'Error when designing modules. The dynamic modules can become invalid with the iteration paramaters.'
         
+        #Only the objective and the performance constraint metrics are calculated for each design, the other metrics are calculated when they are used
+        metrics = [objective] + [con[1] for con in constraints if con[0] == 'Performance Requirements']
+        
         #### GA Loop
-        for i in range(0, iterations):#Run for a specified number of iterations
-            for j in range(0, len(popu.fac_list)):
+        progress = RunProgress('Optimization', iterations * population_size, objective, progress_callback, cancel_event)
+        opt_facs = []
+        pool = self.get_evaluation_pool(executor, max_workers) #The workers are started once and used for every iteration
+        try:
+            for i in range(0, iterations):#Run for a specified number of iterations
                 #Evaluate each facility in the population
-                self.evaluate(popu.fac_list[j])
-            popu.get_obj_ranks()
-            #Display results
-            if print_results == True:
-                print('\nIteration {}'.format(i))
-                popu.print_results()
-            if show_anim ==True:
-                best_fac = popu.get_optimal_facs(count=1)[0]
-                fig, ax = best_fac.plot_facility(fig=fig, ax=ax, it=i, obj=best_fac.get_latest_objective(objective, formatted=True))
-            
-            #Evolve population
-            if i != iterations - 1:
-                popu.evolve(i, best=best_count, mutate=mutate_count, random_num=random_count, cross_num=cross_num)
-        return popu.get_optimal_facs(count=1)
+                self.evaluate_facilities(popu.fac_list, pool, progress, metrics)
+                if progress.is_cancelled():
+                    break
+                popu.get_obj_ranks()
+                opt_facs = popu.get_optimal_facs(count=1)
+                progress.update(0, opt_facs[0].get_latest_objective(objective), opt_facs[0])
+                #Display results
+                if print_results == True:
+                    print('\nIteration {}'.format(i))
+                    popu.print_results()
+                    print('Fitness cache: {} hits, {} misses ({}% hit rate)'.format(self.fitness_cache.hits, self.fitness_cache.misses, round(self.fitness_cache.get_hit_rate(), 1)))
+                if show_anim ==True:
+                    best_fac = popu.get_optimal_facs(count=1)[0]
+                    fig, ax = best_fac.plot_facility(fig=fig, ax=ax, it=i, obj=best_fac.get_latest_objective(objective, formatted=True))
+                
+                #Evolve population
+                if i != iterations - 1:
+                    popu.evolve(i, best=best_count, mutate=mutate_count, random_num=random_count, cross_num=cross_num)
+        finally:
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
+        return opt_facs
+
+    #Returns an executor used to evaluate facilities in parallel, returns None for serial evaluation
+    #Executor options = Serial, Thread Pool, and Process Pool
+    def get_evaluation_pool(self, executor='Serial', max_workers=None):
+        if executor == 'Thread Pool':
+            return concurrent.futures.ThreadPoolExecutor(max_workers=max_workers)
+        elif executor == 'Process Pool': #The project is sent to each worker process once when the worker starts
+            return concurrent.futures.ProcessPoolExecutor(max_workers=max_workers, initializer=init_evaluation_worker, initargs=(self,))
+        elif executor != 'Serial':
+            print('Unknown executor: {}, evaluating facilities serially'.format(executor))
+        return None
+    
+    #Evaluates a list of facilities using the executor from get_evaluation_pool, returns the simulation results in the same order as the facilities
+    #progress is an optional RunProgress that is updated after each evaluation, if the run is cancelled only the results completed so far are returned
+    #metrics is the list of objective metrics calculated during the evaluation (see evaluate)
+    def evaluate_facilities(self, fac_list, pool=None, progress=None, metrics=None):
+        if progress is None:
+            progress = RunProgress('Evaluation', len(fac_list))
+        if pool is None:
+            sim_res_list = []
+            for fac in fac_list:
+                if progress.is_cancelled():
+                    break
+                sim_res_list.append(self.evaluate(fac, metrics))
+                progress.update()
+            return sim_res_list
+        elif isinstance(pool, concurrent.futures.ProcessPoolExecutor):
+            #Only the designs that are not in the fitness cache are sent to the workers
+            tasks = []
+            for fac in fac_list:
+                key, sim_res = self.check_fitness_cache(fac)
+                if sim_res is None:
+                    tasks.append([fac, key, pool.submit(evaluate_worker_facility, fac.get_transfer_copy(), metrics)])
+                else:
+                    tasks.append([fac, key, sim_res])
+            #The results are returned without the project and attached to the original facility
+            sim_res_list = []
+            for fac, key, task in tasks:
+                if progress.is_cancelled():
+                    for f in tasks:
+                        if isinstance(f[2], concurrent.futures.Future):
+                            f[2].cancel()
+                    break
+                if isinstance(task, concurrent.futures.Future):
+                    sim_res = task.result()
+                    if sim_res is not False:
+                        sim_res.attach(self, fac)
+                    fac.add_simulation_results(sim_res)
+                    if key is not None:
+                        self.fitness_cache.put(key, sim_res)
+                else:
+                    sim_res = task
+                sim_res_list.append(sim_res)
+                progress.update()
+            return sim_res_list
+        else:
+            futures = [pool.submit(self.evaluate, fac, metrics) for fac in fac_list]
+            sim_res_list = []
+            for future in futures:
+                if progress.is_cancelled():
+                    for f in futures:
+                        f.cancel()
+                    break
+                sim_res_list.append(future.result())
+                progress.update()
+            return sim_res_list
 
     #Evaluate the facility by setting up a simulation and gathering the simulation results
-    def evaluate(self, fac):
+    #Facilities with a design that was already evaluated use the results from the fitness cache
+    #All of the objective metrics are calculated if metrics is None, otherwise only the listed metrics are calculated and the rest are calculated when they are first used
+    def evaluate(self, fac, metrics=None):
+        key, sim_res = self.check_fitness_cache(fac)
+        if sim_res is not None:
+            return sim_res
         start_date = self.fac_prefs.test_start
         end_date = self.fac_prefs.test_end
         inflows = self.site.daily_inflow.get_flow_subset(start_date, end_date)
         op_outs = self.simulate_operation(fac, inflows['Discharge (cfs)'])
         if op_outs is not False:
-            sim_res = SimResults(self, fac, inflows, *op_outs)
-            fac.add_simulation_results(sim_res)
-            return sim_res
+            sim_res = SimResults(self, fac, inflows, *op_outs, metrics=metrics)
         else:
-            fac.add_simulation_results(False)
-            return False
+            sim_res = False
+        fac.add_simulation_results(sim_res)
+        if key is not None:
+            self.fitness_cache.put(key, sim_res)
+        return sim_res
+    
+    #Returns the facility design key and the cached simulation results, or None if the design is not in the fitness cache
+    #The key includes the project inputs, so results are not reused after the site, costs, preferences, or species change
+    #Cached results are copied for the facility and added to its results list
+    def check_fitness_cache(self, fac):
+        if self.fitness_cache.size <= 0:
+            return None, None
+        key = (fac.get_object_signature([self.site, self.costs, self.fac_prefs, self.species_list]), fac.get_design_key())
+        cached = self.fitness_cache.get(key)
+        if cached is None:
+            return key, None
+        elif cached is False: #The design could not be simulated
+            sim_res = False
+        else:
+            sim_res = cached.get_copy(self, fac)
+        fac.add_simulation_results(sim_res)
+        return key, sim_res
         
     #Simulates daily facility operation using a time series of inflows
     def simulate_operation(self, fac, flows):
+        fac.reset_allocation_cache(clear=False) #The cache hits and misses are counted for each simulation
+        if fac.constant_head: #Controlled spillway without screens, so the headwater does not depend on operation
+            return self.simulate_operation_constant_head(fac, flows)
+        elif self.fac_prefs.sim_engine == 'Vectorized':
+            return self.simulate_operation_vectorized(fac, flows)
+        
         pass_allos = np.zeros((len(fac.rule_curve),len(flows)))
         spill_allos = np.zeros(len(flows))
         flush_allos = np.zeros(len(flows))
@@ -281,43 +537,138 @@ class SMH_project:
             else: #If not flushing day
                 if (fac.spill_mod.op_mode == 'Controlled Spillway') and (fac.has_screens==False): #Controlled = constant head
                     # hwater_eles.append(self.fac_prefs.nol)
-                    allos, spill, over, head_constrained_idx = self.allocate_pass_day(flows[i], flows.index[i], fac, tail_eles[i],spill_min_flows[i], notch_flows[i], hwater_eles[i])
+                    allos, spill, over, head_constrained_idx = self.get_pass_day_allocation(flows[i], flows.index[i], fac, tail_eles[i],spill_min_flows[i], notch_flows[i], hwater_eles[i])
                     pass_allos[:,i] = allos
                     spill_allos[i] = spill
                     over_allos[i] = over
                 else: #Uncontrolled spillway or has screens, meaning the head is going to change based on operation
-                    #Allocate flows ignoring head constraints to calculate expected spillflow
-                    allos, spill, over, head_constrained_idx = self.allocate_pass_day(flows[i],flows.index[i], fac, tail_eles[i], spill_min_flows[i], notch_flows[i]) 
-                    temp_hwaters, temp_spillh = self.get_headwaters(fac, allos, spill, notch_flows[i])                    
-                    allos, spill, over, head_constrained_idx = self.allocate_pass_day(flows[i],flows.index[i], fac, tail_eles[i], spill_min_flows[i],notch_flows[i], temp_hwaters)                    
-                    check_hwaters, temp_spillh2 = self.get_headwaters(fac, allos, spill, notch_flows[i])
-                    
-                    if (len(head_constrained_idx) == 0) and (temp_hwaters == check_hwaters): #If the allocation works the first time without head constraint issues and consistent headwaters
-                        pass_allos[:,i] = allos
-                        spill_allos[i] = spill
-                        over_allos[i] = over
-                        hwater_eles[i] = check_hwaters
-                        spill_hwaters[i] = temp_spillh
-                    else: #If a module is turned off due to head fluctuations
-                        for j in range(0, len(fac.rule_curve)): #Try to resolve head constraints up to a limit of all modules
-                            temp_hwaters = check_hwaters.copy()
-                            #turns off modules until the head constraints is resolved
-                            allos, spill, over, head_constrained_idx = self.allocate_pass_day(flows[i],flows.index[i], fac, tail_eles[i], spill_min_flows[i],notch_flows[i], temp_hwaters, head_constrained_idx)
-                            check_hwaters, temp_spillh = self.get_headwaters(fac, allos, spill, notch_flows[i])
-                            
-                            if (len(head_constrained_idx) == 0) and (temp_hwaters == check_hwaters):
-                                pass_allos[:,i] = allos
-                                spill_allos[i] = spill
-                                over_allos[i] = over
-                                hwater_eles[i] = check_hwaters
-                                spill_hwaters[i] = temp_spillh
-                                break
-                            
-                        if len(head_constrained_idx) > 0:
-                            print('Error unable to resolve head constraints')
-                            return False
+                    day_outs = self.simulate_variable_head_day(fac, flows[i], flows.index[i], tail_eles[i], spill_min_flows[i], notch_flows[i])
+                    if day_outs is False:
+                        return False
+                    pass_allos[:,i], spill_allos[i], over_allos[i], hwater_eles[i], spill_hwaters[i] = day_outs
 
         return pass_allos, spill_allos, over_allos, flush_allos, hwater_eles, spill_hwaters, tail_eles
+    
+    #Allocates flow for one day when the headwater changes with operation, iterating until the head constraints and headwaters are consistent
+    def simulate_variable_head_day(self, fac, flow, date, tail, spill_min_flow, notch_flow):
+        #Allocate flows ignoring head constraints to calculate expected spillflow
+        allos, spill, over, head_constrained_idx = self.get_pass_day_allocation(flow, date, fac, tail, spill_min_flow, notch_flow) 
+        temp_hwaters, temp_spillh = self.get_headwaters(fac, allos, spill, notch_flow)                    
+        allos, spill, over, head_constrained_idx = self.get_pass_day_allocation(flow, date, fac, tail, spill_min_flow, notch_flow, temp_hwaters)                    
+        check_hwaters, temp_spillh2 = self.get_headwaters(fac, allos, spill, notch_flow)
+        
+        if (len(head_constrained_idx) == 0) and (temp_hwaters == check_hwaters): #If the allocation works the first time without head constraint issues and consistent headwaters
+            return allos, spill, over, check_hwaters, temp_spillh
+        else: #If a module is turned off due to head fluctuations
+            for j in range(0, len(fac.rule_curve)): #Try to resolve head constraints up to a limit of all modules
+                temp_hwaters = check_hwaters.copy()
+                #turns off modules until the head constraints is resolved
+                allos, spill, over, head_constrained_idx = self.get_pass_day_allocation(flow, date, fac, tail, spill_min_flow, notch_flow, temp_hwaters, head_constrained_idx)
+                check_hwaters, temp_spillh = self.get_headwaters(fac, allos, spill, notch_flow)
+                
+                if (len(head_constrained_idx) == 0) and (temp_hwaters == check_hwaters):
+                    return allos, spill, over, check_hwaters, temp_spillh
+                
+            if len(head_constrained_idx) > 0:
+                print('Error unable to resolve head constraints')
+                return False
+            else: #If the headwaters do not converge, no flow is allocated for the day
+                return np.zeros(len(fac.rule_curve)), 0, 0, [self.fac_prefs.nol for i in range(0, len(fac.rule_curve))], self.fac_prefs.nol
+            
+    #Calculates the daily inputs used by the array-based simulations
+    #Returns the inflows, months, mask of operating (non-flushing) days, flushing allocations, tailwaters, notch flows, and spillway minimum flows as arrays
+    def get_operation_arrays(self, fac, flows):
+        num_days = len(flows)
+        flow_arr = flows.to_numpy(dtype=float)
+        months = flows.index.month.to_numpy()
+        
+        #Flushing days do not go through the rule-based allocation
+        op_days = np.ones(num_days, dtype=bool)
+        flush_allos = np.zeros(num_days)
+        if fac.flush_mod is not None:
+            flush_idx = [i for i in fac.flush_mod.get_flushing_indices(flows) if i < num_days]
+            op_days[flush_idx] = False
+            flush_allos[~op_days] = flow_arr[~op_days]
+        
+        tail_eles = [self.site.get_tailwater_depth(i) for i in flows]
+        
+        #Calculate the notch flows
+        if self.fac_prefs.notch_flow == 0.0:
+            notch_flows = np.zeros(num_days)
+        else:
+            notch_flows = np.minimum(self.fac_prefs.notch_flow, flow_arr)
+        
+        #Calculate the minimum flows for each day ahead of time
+        if self.fac_prefs.spill_min_flow == 0.0:
+            spill_min_flows = np.zeros(num_days)
+        elif self.fac_prefs.min_flow_type == '% (Percent of inflow)':
+            spill_min_flows = np.maximum((self.fac_prefs.spill_min_flow/100)*flow_arr - notch_flows, 0)
+        else:
+            spill_min_flows = np.minimum(np.maximum(self.fac_prefs.spill_min_flow - notch_flows, 0), flow_arr - notch_flows)
+        return flow_arr, months, op_days, flush_allos, tail_eles, notch_flows, spill_min_flows
+    
+    #Simulation for facilities with a constant headwater (controlled spillway without screens), where no head iteration is needed
+    #The gross heads are calculated once for all days and every day is allocated in one batched call
+    def simulate_operation_constant_head(self, fac, flows):
+        num_days = len(flows)
+        nol = self.fac_prefs.nol
+        pass_allos = np.zeros((len(fac.rule_curve), num_days))
+        spill_allos = np.zeros(num_days)
+        over_allos = np.zeros(num_days)
+        flow_arr, months, op_days, flush_allos, tail_eles, notch_flows, spill_min_flows = self.get_operation_arrays(fac, flows)
+        
+        #The headwater is the normal operating level for every module and day
+        hwater_eles = np.full((num_days, len(fac.rule_curve)), float(nol))
+        spill_hwaters = np.full(num_days, float(nol))
+        
+        days = np.flatnonzero(op_days)
+        allos, spill, over, head_constrained, irregular = self.allocate_pass_days(flow_arr[days], months[days], fac, np.array(tail_eles, dtype=float)[days], \
+                                                                                   spill_min_flows[days], notch_flows[days], nol)
+        done = ~irregular
+        pass_allos[:,days[done]] = allos[:,done]
+        spill_allos[days[done]] = spill[done]
+        over_allos[days[done]] = over[done]
+        
+        for i in days[irregular]: #Days where the generation modules cannot be allocated together use the daily allocation
+            pass_allos[:,i], spill_allos[i], over_allos[i], head_constrained_idx = self.get_pass_day_allocation(flows.iloc[i], flows.index[i], fac, tail_eles[i], spill_min_flows[i], notch_flows[i], [nol for j in fac.rule_curve])
+        
+        return pass_allos, spill_allos, over_allos, flush_allos, hwater_eles, spill_hwaters, tail_eles
+    
+    #Vectorized simulation engine that precomputes the daily inputs as arrays and allocates flow for all days at once
+    #Returns the same outputs as simulate_operation, days that cannot be resolved with the array passes use the daily functions
+    def simulate_operation_vectorized(self, fac, flows):
+        num_days = len(flows)
+        pass_allos = np.zeros((len(fac.rule_curve), num_days))
+        spill_allos = np.zeros(num_days)
+        over_allos = np.zeros(num_days)
+        flow_arr, months, op_days, flush_allos, tail_eles, notch_flows, spill_min_flows = self.get_operation_arrays(fac, flows)
+        hwater_eles = [[self.fac_prefs.nol for i in range(0, len(fac.rule_curve))]for j in range(0, num_days)]
+        spill_hwaters = [self.fac_prefs.nol for i in range(0, num_days)]
+        
+        #The headwater changes based on operation, so allocate flows ignoring head constraints to calculate expected spillflow, then check the allocation using those headwaters
+        days = np.flatnonzero(op_days)
+        day_args = (flow_arr[days], months[days], fac, np.array(tail_eles, dtype=float)[days], spill_min_flows[days], notch_flows[days])
+        allos, spill, over, head_constrained, irregular = self.allocate_pass_days(*day_args)
+        temp_hwaters, temp_spillh = self.get_headwaters_array(fac, allos, spill, notch_flows[days])
+        allos, spill, over, head_constrained, irregular2 = self.allocate_pass_days(*day_args, temp_hwaters)
+        check_hwaters, temp_spillh2 = self.get_headwaters_array(fac, allos, spill, notch_flows[days])
+        #Days with head constraint issues or inconsistent headwaters are resolved one at a time
+        done = ~(irregular | irregular2 | head_constrained.any(axis=0) | (temp_hwaters != check_hwaters).any(axis=0))
+        for k in np.flatnonzero(done):
+            hwater_eles[days[k]] = check_hwaters[:,k].tolist()
+            spill_hwaters[days[k]] = temp_spillh[k]
+        
+        pass_allos[:,days[done]] = allos[:,done]
+        spill_allos[days[done]] = spill[done]
+        over_allos[days[done]] = over[done]
+        
+        for i in days[~done]:
+            day_outs = self.simulate_variable_head_day(fac, flows.iloc[i], flows.index[i], tail_eles[i], spill_min_flows[i], notch_flows[i])
+            if day_outs is False:
+                return False
+            pass_allos[:,i], spill_allos[i], over_allos[i], hwater_eles[i], spill_hwaters[i] = day_outs
+        
+        return pass_allos, spill_allos, over_allos, flush_allos, hwater_eles, spill_hwaters, tail_eles
                 
     #Calculates the headwater elevation based on the type of spillway and spillway flow
     def get_headwaters(self, fac, allos, spill, notch_flow):
@@ -339,6 +690,28 @@ class SMH_project:
                         pass_hwaters[i] = fac.screens[j].calculate_head_after_loss(screen_flow, pass_hwaters[i])
         return pass_hwaters, spill_head
         
+    #Returns the daily allocation from the facility allocation cache, the allocation is calculated and added to the cache if the inputs have not been seen
+    #The allocation only depends on the inflow, month, tailwater, minimum and notch flows, and the headwater state for a given facility
+    def get_pass_day_allocation(self, flow, date, fac, tail, spill_min_flow, notch_flow, hwaters=None, off_rule_idx=[]):
+        if fac.allo_cache_size <= 0: #Cache turned off
+            return self.allocate_pass_day(flow, date, fac, tail, spill_min_flow, notch_flow, hwaters, off_rule_idx)
+        if hwaters is None:
+            key = (flow, date.month, tail, spill_min_flow, notch_flow, None, tuple(off_rule_idx))
+        else:
+            key = (flow, date.month, tail, spill_min_flow, notch_flow, tuple(hwaters), tuple(off_rule_idx))
+        
+        if key in fac.allo_cache:
+            fac.allo_cache.move_to_end(key) #Most recently used
+            fac.allo_cache_hits += 1
+            allos, spill, over, head_constrained_idx = fac.allo_cache[key]
+        else:
+            fac.allo_cache_misses += 1
+            allos, spill, over, head_constrained_idx = self.allocate_pass_day(flow, date, fac, tail, spill_min_flow, notch_flow, hwaters, off_rule_idx)
+            fac.allo_cache[key] = (allos, spill, over, head_constrained_idx)
+            if len(fac.allo_cache) > fac.allo_cache_size: #Remove the least recently used allocation
+                fac.allo_cache.popitem(last=False)
+        return allos.copy(), spill, over, head_constrained_idx.copy()
+    
     #Uses rule-based allocation to allocate flow across the passage modules
     def allocate_pass_day(self, flow, date, fac, tail, spill_min_flow, notch_flow, hwaters=None, off_rule_idx=[]): #If head equals None, then ignore head constraints
         rule_curve = fac.rule_curve    
@@ -419,6 +792,137 @@ class SMH_project:
         
         return allos, spill_flow, over_flow, head_constrained_idx
     
+    #Calculates the headwater elevations for many days at once, returns arrays of the module headwaters (rule curve x days) and spillway headwaters
+    #Days where the headwater cannot be calculated are set to nan so that they are resolved with get_headwaters
+    def get_headwaters_array(self, fac, allos, spill_flows, notch_flows):
+        if fac.spill_mod.op_mode == 'Controlled Spillway': #Controlled spillways assume constant headwater levels
+            spill_heads = np.full(len(spill_flows), float(self.fac_prefs.nol))
+        else: #Uncontrolled spillway uses the weir equation
+            weir_flows = spill_flows - notch_flows
+            spill_heads = np.full(len(spill_flows), np.nan)
+            spill_heads[weir_flows == 0] = self.fac_prefs.nol
+            pos = weir_flows > 0
+            #Evaluated per day with get_headwater_elevation so the result matches the daily loop exactly
+            spill_heads[pos] = [fac.get_headwater_elevation(q) for q in weir_flows[pos].tolist()]
+        
+        pass_hwaters = np.tile(spill_heads, (len(fac.rule_curve), 1))
+        if fac.has_screens: #Screen head losses depend on the screen flow, so they use the same calculation as get_headwaters
+            for j in range(0, len(fac.screens)):
+                covered = [fac.screens[j].check_covered(m[0].name) for m in fac.rule_curve]
+                screen_flows = np.zeros(len(spill_flows))
+                for i in range(0, len(fac.rule_curve)):
+                    if covered[i]:
+                        screen_flows = screen_flows + allos[i]
+                for i in range(0, len(fac.rule_curve)):
+                    if covered[i]:
+                        pass_hwaters[i] = np.array([fac.screens[j].calculate_head_after_loss(screen_flows[t], pass_hwaters[i,t]) for t in range(0, len(spill_flows))], dtype=float)
+        return pass_hwaters, spill_heads
+    
+    #Array version of allocate_pass_day that applies the rule-based allocation to many days at once, one module at a time
+    #Returns the allocations (rule curve x days), spill flows, over flows, head constrained mask, and a mask of days that must be allocated with allocate_pass_day
+    def allocate_pass_days(self, flows, months, fac, tails, spill_min_flows, notch_flows, hwaters=None): #If head equals None, then ignore head constraints, a single value is used as a constant headwater
+        rule_curve = fac.rule_curve
+        num_days = len(flows)
+        allos = np.zeros((len(rule_curve), num_days))
+        allo_sums = np.zeros(num_days) #Sum of allocations, added in rule curve order
+        spill_flows = spill_min_flows + notch_flows
+        head_constrained = np.zeros((len(rule_curve), num_days), dtype=bool)
+        irregular = np.zeros(num_days, dtype=bool)
+        if np.ndim(hwaters) == 0 and hwaters is not None: #Constant headwater, so the gross heads are only calculated once
+            hwater_diffs = np.broadcast_to(self.fac_prefs.nol - hwaters, (len(rule_curve), num_days))
+            gross_heads = np.broadcast_to(hwaters - tails, (len(rule_curve), num_days))
+        elif hwaters is not None:
+            hwater_diffs = self.fac_prefs.nol - hwaters
+            gross_heads = hwaters - tails
+        
+        i = 0
+        while i < len(rule_curve): #Loops through all modules, although generation modules are all allocated at once
+            mod = rule_curve[i][0]
+            spent_flows = allo_sums + spill_flows
+            left_flows = flows - spent_flows
+            open_days = (spent_flows < flows) & mod.on_month_array(months) #Days with flow left where the module is on
+            next_i = i + 1
+            if mod.module_class == 'Sed':
+                if mod.op_mode == 'Sluicing':
+                    on_days = open_days & (flows >= mod.op_flow) & (left_flows >= mod.design_flow)
+                elif mod.op_mode == 'Continuous':
+                    on_days = open_days & (left_flows >= mod.design_flow)
+                else:
+                    on_days = np.zeros(num_days, dtype=bool)
+                    if open_days.any():
+                        print('Incorrect sediment module operating mode')
+                allos[i, on_days] = mod.design_flow
+            elif mod.module_class == 'Gen':
+                gen_month_on = np.array([m.on_month_array(months) for m in fac.gen_mods]).T
+                #If the first generation module is off but others are on, the daily allocation is used
+                if fac.num_gen > 1:
+                    irregular |= (spent_flows < flows) & ~gen_month_on[:,0] & gen_month_on[:,1:].any(axis=1)
+                gen_mods_on = gen_month_on.copy()
+                if hwaters is not None:
+                    for m in range(0, fac.num_gen):
+                        gen_mods_on[:,m] &= fac.gen_mods[m].check_head_array(gross_heads[i])
+                gen_allos = fac.get_gen_allocations(np.floor(left_flows[open_days]), gen_mods_on[open_days], self.fac_prefs.allow_overrun)
+                allos[i:i+fac.num_gen, open_days] = gen_allos
+                next_i = i + fac.num_gen #skips the rest of the generation modules
+            elif mod.module_class == 'Wat': #This is for continuous water passage modules, not spillways
+                allos[i, open_days] = np.where(left_flows >= mod.design_flow, mod.design_flow, left_flows)[open_days]
+            elif (mod.module_class == 'Fish') or (mod.module_class == 'Rec'):
+                on_days = open_days & mod.check_tailwater_elevation_array(tails) & (left_flows >= mod.design_flow)
+                if hwaters is not None: #If head constraints
+                    head_ok = mod.check_head_array(hwater_diffs[i])
+                    head_constrained[i] = open_days & ~head_ok
+                    on_days &= head_ok
+                allos[i, on_days] = mod.design_flow
+            elif open_days.any():
+                print('Unknown module type')
+            for j in range(i, next_i):
+                allo_sums = allo_sums + allos[j]
+            i = next_i
+        
+        spent_flows = allo_sums + spill_flows
+        over_flows = np.zeros(num_days)
+        spill_days = spent_flows < flows
+        over_days = spill_days & (flows - spent_flows > fac.total_spill_cap - spill_flows) #If too much flow for spillway
+        over_flows[over_days] = (flows - allo_sums - fac.total_spill_cap)[over_days]
+        spill_flows = np.where(over_days, fac.total_spill_cap, np.where(spill_days, spill_flows + (flows - spent_flows), spill_flows))
+        for t in np.flatnonzero(spent_flows > flows):
+            print('Error - flow allocated improperly - Inflow: {}, Spent Flow {}'.format(flows[t], spent_flows[t]))
+        
+        return allos, spill_flows, over_flows, head_constrained, irregular
+
+#%%## PARALLEL EVALUATION - functions that run in the worker processes when facilities are evaluated with a process pool
+worker_proj = None #The project used by every task in a worker process
+
+#Saves the project in the worker process, called once when the worker starts
+def init_evaluation_worker(proj):
+    global worker_proj
+    worker_proj = proj
+
+#Evaluates a facility design in a worker process and returns the simulation results without the project
+def evaluate_worker_facility(fac, metrics=None):
+    fac.attach_project(worker_proj)
+    sim_res = worker_proj.evaluate(fac, metrics)
+    if sim_res is not False:
+        sim_res.detach()
+    return sim_res
+
+#Simulates a chunk of the enumeration in a worker process and returns the best facility and results without the project
+def enumerate_worker_chunk(objective, enum_state, save_bools, start, stop, keep_results=False):
+    chunk_out = worker_proj.enumerate_chunk(objective, enum_state, save_bools, start, stop, keep_results=keep_results)
+    if chunk_out is False:
+        return False
+    chunk_results, best_fac, best_sim_res, kept_results = chunk_out
+    for sim_res in kept_results: #The transfer copy of the facility is kept on the detached results until they are attached in the main process
+        if sim_res is not best_sim_res:
+            fac = sim_res.fac.get_transfer_copy()
+            sim_res.detach()
+            sim_res.fac = fac
+    if best_sim_res is not None:
+        best_fac = best_fac.get_transfer_copy()
+        best_sim_res.detach()
+        best_sim_res.fac = best_fac
+    return chunk_results, best_fac, best_sim_res, kept_results
+    
 #%%## POPULATION CLASS - stores a list of facilities for the genetic algorithm and facilitates evolution
 class Population:
     def __init__(self, proj, objective, constraints, enum_lists, pop_size, fac_list=None):
@@ -432,6 +936,7 @@ class Population:
         #Tries to create an initial population, and sets self.valid to False if it doesn't work
         try:
             self.default_fac = self.get_default_fac() #Uses a default facility to set the constant modules and attributes
+            self.default_genome = tuple([i[2][0] for i in self.iter_list]) #The default facility uses the minimum of each range
             if fac_list == None:
                 self.fac_list = []
                 self.valid = self.get_initial_pop() #Returns true if the initial population was created successfully
@@ -447,12 +952,12 @@ class Population:
         self.size = len(self.fac_list)
         self.obj_list = [None] * self.size
         self.ranks = [None] * self.size
-        if self.objective in ['LCOE ($/MWh)', 'ICC ($)','Unit Cost ($/kW)']:
-            self.maximize = False
-            self.penalty = 10000000
-        else:            
+        if is_maximized_objective(self.objective):
             self.maximize = True
             self.penalty = -10000000
+        else:
+            self.maximize = False
+            self.penalty = 10000000
         
     #The default facility includes all the modules and attributes that must be included in the facility
     def get_default_fac(self):
@@ -561,30 +1066,57 @@ class Population:
     
     #Returns a random facility by using the default facility and getting random modules/attributes within the specified ranges
     def get_random_fac(self, name):
-        fac = deepcopy(self.default_fac)
-        fac.name = name
-        #Set random module counts and attributes
-        for i in self.iter_list:
-            mod_name = i[0]
-            att = i[1]
-            min_range = i[2][0]
-            max_range = i[2][1]
-            mod = self.get_mod_by_name(mod_name)
-            if mod is False:
+        genome = list(self.default_genome)
+        #Get random module counts and attributes
+        for i in range(0, len(self.iter_list)):
+            mod_name, att, minmax_list = self.iter_list[i]
+            if self.get_mod_by_name(mod_name) is False:
                 print('Trying to get module that does not exist.')
                 break
-            
             if att == 'Module Count': #Get a random module count
-                rand_num = random.randint(min_range, max_range)
-                fac.set_mod_count(mod, rand_num)
+                genome[i] = random.randint(minmax_list[0], minmax_list[1])
             else: #This assumes that modules are already in the facility (i.e. module count comes before other attributes, which I think they should)
                 rand_num = random.random()
-                rand_att = min_range + (rand_num*(max_range-min_range))
-                fac_valid = fac.set_mod_att(mod, att, rand_att)
+                genome[i] = minmax_list[0] + (rand_num*(minmax_list[1]-minmax_list[0]))
+        return self.get_genome_fac(name, tuple(genome))
+    
+    #Returns the genome of a facility, which is a tuple with the module count or attribute value for each element of the iter_list
+    def get_genome(self, fac):
+        if fac.genome is not None:
+            return fac.genome
+        genome = list(self.default_genome) #For facilities that were not created from a genome, such as a provided fac_list
+        for i in range(0, len(self.iter_list)):
+            mod_name, att, minmax_list = self.iter_list[i]
+            if att == 'Module Count':
+                if mod_name == fac.spill_mod.name:
+                    genome[i] = fac.num_spill
+                else:
+                    genome[i] = fac.pass_dict.get(mod_name, 0)
+            elif mod_name in fac.pass_dict.keys():
+                genome[i] = getattr(fac.get_mod_by_name(mod_name), att.lower().replace(' ', '_')) #Attribute names match the redesign parameters, i.e. Design Flow = design_flow
+        return tuple(genome)
+    
+    #Creates a facility from a genome by setting the module counts and attributes of the default facility
+    #Only the modules with iterated attributes are copied, the other modules and the project data are shared with the default facility
+    def get_genome_fac(self, name, genome):
+        att_mod_names = [i[0] for i in self.iter_list if i[1] != 'Module Count']
+        fac = self.default_fac.get_design_copy(name, att_mod_names)
+        for i in range(0, len(self.iter_list)):
+            mod_name, att = self.iter_list[i][0], self.iter_list[i][1]
+            mod = self.get_mod_by_name(mod_name)
+            if mod is False:
+                break
+            if att == 'Module Count':
+                if (mod_name in att_mod_names) and (mod_name not in fac.pass_dict.keys()): #The facility needs its own copy of a module that is redesigned
+                    mod = deepcopy(mod)
+                fac.set_mod_count(mod, genome[i])
+            elif mod_name in fac.pass_dict.keys(): #Attributes of modules that are not in the facility are not used
+                fac_valid = fac.set_mod_att(mod, att, genome[i])
                 if fac_valid == False:
                     print('Error - dynamic module is not valid.')
                     return False
         fac.update()
+        fac.genome = genome
         return fac
             
     #Get an initial population by creating random facilities
@@ -631,14 +1163,13 @@ class Population:
     
     #Return one module, takes modules from a good facility fac2 and gives it to another (cross_fac)
     def crossover(self, cross_fac, good_fac): 
-        out_fac = deepcopy(cross_fac)
         possible_mod_names = []
         for i in self.iter_list:
             mod_name = i[0]
             if (mod_name in good_fac.pass_dict.keys()) and (mod_name not in possible_mod_names):
                 possible_mod_names.append(mod_name)
         if len(possible_mod_names) <=0: #if good_fac has no pass mods, then return a random
-            return self.get_random_fac()
+            return self.get_random_fac(cross_fac.name)
         elif len(possible_mod_names) == 1:
             num_mod_cross = 1
             mod_indices = [0]
@@ -647,15 +1178,18 @@ class Population:
             mod_indices = [x for x in range(0, len(possible_mod_names)-1)]
             random.shuffle(mod_indices)
         
-        for i in range(0, num_mod_cross):
-            mod, count = good_fac.get_pass_mod(possible_mod_names[mod_indices[i]])
-            out_fac.add_pass_mod(mod, count)
-        out_fac.update()
-        return out_fac
+        #Take the module counts and attributes of the selected modules from the good facility
+        genome = list(self.get_genome(cross_fac))
+        good_genome = self.get_genome(good_fac)
+        cross_mod_names = [possible_mod_names[mod_indices[i]] for i in range(0, num_mod_cross)]
+        for i in range(0, len(self.iter_list)):
+            if self.iter_list[i][0] in cross_mod_names:
+                genome[i] = good_genome[i]
+        return self.get_genome_fac(cross_fac.name, tuple(genome))
                 
     #Creates a new facilitiy by random modifying the module counts and module attributes (must be within the specified ranges)
     def mutate(self, fac): #only works with passage modules
-        result_fac = deepcopy(fac)
+        genome = list(self.get_genome(fac))
         #Randomly pick the number of attributes/modules to mutate
         if len(self.iter_list) == 1:
             num_att_mut = 1
@@ -667,19 +1201,12 @@ class Population:
         #Randomly mutate the selected number of attributes/moduels
         for i in range(0, num_att_mut):
             mod_name, att, minmax_list = self.iter_list[att_indices[i]]
-            mod = self.get_mod_by_name(mod_name)
             if att == 'Module Count':
-                ran_count = random.randint(minmax_list[0], minmax_list[1])
-                result_fac.set_mod_count(mod, ran_count)
+                genome[att_indices[i]] = random.randint(minmax_list[0], minmax_list[1])
             else:
                 rand_num = random.random()
-                rand_att = minmax_list[0] + (rand_num*(minmax_list[1]-minmax_list[0]))
-                fac_valid = result_fac.set_mod_att(mod, att, rand_att)
-                if fac_valid == False:
-                    print('Error - dynamic module is not valid.')
-                    return False
-        result_fac.update()
-        return result_fac
+                genome[att_indices[i]] = minmax_list[0] + (rand_num*(minmax_list[1]-minmax_list[0]))
+        return self.get_genome_fac(fac.name, tuple(genome))
         
     #Checks if a value satisfies a constraint    
     def check_constraint(self, val, operand, req):
@@ -723,7 +1250,7 @@ class Population:
                 if (val is None) or (val is False):
                     print('Error calculating constraint') 
                 else:
-                    if self.check_constraint(val, operand, req) == False:
+                    if (self.check_constraint(val, operand, req) == False) and is_numeric_objective(obj_list[f]):
                         obj_list[f] += self.penalty
         return obj_list
     
@@ -733,7 +1260,7 @@ class Population:
         ranks = [None] * len(self.obj_list)
         self.obj_list = self.get_obj_list() #Get objectives
         for i in range(0, len(self.obj_list)): #Go through list, if unable to simulate, then objective will be False, so need to set objective to infinitely bad obejective
-            if self.obj_list[i] is False: #Account for errors
+            if not is_numeric_objective(self.obj_list[i]): #Account for errors and objectives that are not numbers (e.g. 'N/A' unit cost)
                 if self.maximize==True:
                     self.obj_list[i] = -1*self.M
                 else:
@@ -760,10 +1287,178 @@ class Population:
         return opt_list
     
 
+#%%## RESULTS ACCUMULATOR - collects the run dicts and creates the results DataFrame once instead of merging a DataFrame for every run
+class ResultsAccumulator:
+    def __init__(self):
+        self.metrics = [] #Metric names in the order they were first added
+        self.metric_rows = {} #Metric name: row index
+        self.run_names = []
+        self.columns = [] #One list of values per run, in metric row order
+        self.df = None #DataFrame created by get_df, reset when a run is added
+    #Returns the number of runs
+    def __len__(self):
+        return len(self.run_names)
+    #Adds a run in the form {'Metric': value}, metrics that are not in the previous runs are added as new rows
+    def add_run(self, run_name, results_dict):
+        col = [np.nan] * len(self.metrics)
+        for metric, val in results_dict.items():
+            row = self.metric_rows.get(metric)
+            if row is None:
+                self.metric_rows[metric] = len(self.metrics)
+                self.metrics.append(metric)
+                col.append(val)
+            else:
+                col[row] = val
+        self.run_names.append(run_name)
+        self.columns.append(col)
+        self.df = None
+    #Adds each run column from a DataFrame with a Metric column, such as a DataFrame from get_df
+    def add_df(self, results_df):
+        if len(results_df) <= 0:
+            return
+        metrics = results_df['Metric'].to_list()
+        for run_name in results_df.columns:
+            if run_name != 'Metric':
+                vals = results_df[run_name].to_list()
+                self.add_run(run_name, dict(zip(metrics, vals)))
+    #Removes all of the runs
+    def clear(self):
+        self.__init__()
+    #Returns a DataFrame with a Metric column and one column per run, in the same form as outer merging each run on Metric
+    def get_df(self):
+        if len(self.run_names) <= 0:
+            return pd.DataFrame()
+        if self.df is None:
+            data = {0: self.metrics}
+            for j in range(0, len(self.columns)):
+                data[j+1] = self.columns[j] + [np.nan] * (len(self.metrics) - len(self.columns[j]))
+            self.df = pd.DataFrame(data)
+            self.df.columns = ['Metric'] + self.run_names #Set after creation so that repeated run names are allowed
+        return self.df
+
+#%%## RUN PROGRESS - tracks the progress of a model run, sends it to a progress callback, and checks if the run was cancelled
+class RunProgress:
+    def __init__(self, stage, total, objective=None, progress_callback=None, cancel_event=None):
+        self.stage = stage #Name of the run, e.g. Enumeration
+        self.total = total #Number of evaluations in the run
+        self.objective = objective
+        self.progress_callback = progress_callback #Function that is called with the progress dict after each update
+        self.cancel_event = cancel_event #threading.Event that is set to stop the run between evaluations
+        self.maximize = True
+        if objective is not None:
+            self.maximize = is_maximized_objective(objective)
+        self.completed = 0
+        self.best_obj = None
+        self.best_fac = None
+        self.start_time = time.perf_counter()
+        self.lock = threading.Lock() #The threads in a thread pool update the same progress
+    #Returns True if the run has been cancelled
+    def is_cancelled(self):
+        return (self.cancel_event is not None) and self.cancel_event.is_set()
+    #Adds completed evaluations, updates the best objective if the new objective is better, and sends the progress to the callback
+    #Objectives that are not numbers (e.g. 'N/A') are not compared
+    def update(self, count=1, obj=None, fac=None):
+        with self.lock:
+            self.completed += count
+            if is_numeric_objective(obj) and ((self.best_obj is None) or (self.maximize and (obj > self.best_obj)) or ((not self.maximize) and (obj < self.best_obj))):
+                self.best_obj = obj
+                self.best_fac = fac
+            if self.progress_callback is not None:
+                self.progress_callback(self.get_dict())
+    #Returns the progress as a dict, the remaining time is estimated from the average time of the completed evaluations
+    def get_dict(self):
+        elapsed = time.perf_counter() - self.start_time
+        remaining = None
+        if self.completed > 0:
+            remaining = elapsed / self.completed * max(self.total - self.completed, 0)
+        return {'Stage': self.stage, 'Completed': self.completed, 'Total': self.total, 'Objective': self.objective, 'Best Objective': self.best_obj, \
+                'Best Facility': self.best_fac, 'Elapsed (s)': elapsed, 'Remaining (s)': remaining, 'Cancelled': self.is_cancelled()}
+
+#%%## OBJECTIVE DICT - the objective function metrics of a simulation, each metric is calculated from the simulation results the first time it is used
+#Reading a single metric only calculates that metric, anything that reads the whole dict (iterating, copying, dict(), update()) calculates every metric first
+#Once the simulation results are compacted, only the metrics calculated before their time series were removed are listed
+class ObjectiveDict(dict):
+    def __init__(self, sim_res, values=None):
+        dict.__init__(self)
+        self.sim_res = sim_res
+        if values is not None:
+            dict.update(self, values)
+    
+    #Calculates and saves a metric the first time it is used
+    def __missing__(self, key):
+        if key not in SimResults.obj_metrics:
+            raise KeyError(key)
+        val = SimResults.obj_metrics[key](self.sim_res)
+        dict.__setitem__(self, key, val)
+        return val
+    
+    #Calculates the given metrics, or every metric if metrics is None
+    def calculate(self, metrics=None):
+        if metrics is None:
+            metrics = SimResults.obj_metrics.keys()
+        for key in metrics:
+            self[key]
+    
+    #Returns True if the metric is calculated already
+    def is_calculated(self, key):
+        return dict.__contains__(self, key)
+    
+    #Returns a plain dict of the metrics calculated so far without calculating the others
+    def get_calculated(self):
+        return dict(dict.items(self))
+    
+    #Returns True if the remaining metrics can be calculated from the simulation time series
+    def can_calculate(self):
+        return getattr(self.sim_res, 'has_series', True)
+    
+    #Returns the metric names in the order of SimResults.obj_metrics followed by any other saved values (e.g., computation time)
+    def keys(self):
+        if self.can_calculate():
+            self.calculate()
+        return [key for key in SimResults.obj_metrics if dict.__contains__(self, key)] + [key for key in dict.keys(self) if key not in SimResults.obj_metrics]
+    def __iter__(self):
+        return iter(self.keys())
+    def values(self):
+        return [self[key] for key in self.keys()]
+    def items(self):
+        return [(key, self[key]) for key in self.keys()]
+    def __len__(self):
+        return len(self.keys())
+    def __contains__(self, key):
+        return ((key in SimResults.obj_metrics) and self.can_calculate()) or dict.__contains__(self, key)
+    def get(self, key, default=None):
+        if key in self:
+            return self[key]
+        return default
+    def __repr__(self):
+        return repr(dict(self.items()))
+    
+    #Returns a copy for another simulation results object, only the metrics calculated so far are copied
+    def copy(self, sim_res=None):
+        return ObjectiveDict(self.sim_res if sim_res is None else sim_res, self.get_calculated())
+    
+    #Only the calculated metrics are pickled, so results returned from a worker process keep the remaining metrics uncalculated
+    def __reduce__(self):
+        return (ObjectiveDict, (self.sim_res, self.get_calculated()))
+
 #%%## SIMULATION RESULTS - saves the results of the facility simulation and computes performance metrics
 class SimResults:
+    #All of the possible objective function metrics that can be used as objectives or constraints, in the order they are saved in the results
+    obj_metrics = {'LCOE ($/MWh)': lambda sr: sr.LCOE, 'NPV ($)': lambda sr: sr.NPV, 'ICC ($)': lambda sr: sr.icc, 'Unit cost ($/kW)': lambda sr: sr.cost_per_kw, \
+                   'Annual Energy (MWh)': lambda sr: sr.gen_perf_dict['Total Annual MWh'], 'Effective Mortality (%)': lambda sr: sr.get_fish_performance('M_eff'), \
+                   'Effective Passage (%)': lambda sr: sr.get_fish_performance('U_eff'), 'Sediment Flow Ratio (%)': lambda sr: sr.pass_mod_flow_ratios['Sed'], \
+                   'Sediment Passage Frequency (%)': lambda sr: sr.sed_perf_dict['Sediment Passage Frequency'], 'Avg Trap Efficiency (%)': lambda sr: sr.sed_perf_dict['Trap Efficiency'], \
+                   'Recreation Availability (%)': lambda sr: sr.rec_perf_dict['Recreation Availability'], 'Annual Recreation (Hours)': lambda sr: sr.rec_perf_dict['Annual Recreation Hours'], \
+                   'Flood Return Period (yr)': lambda sr: sr.design_flood_period, 'Avg Impoundment Volume (ft3)': lambda sr: sr.avg_imp_volume, \
+                   'Annual Benefits ($)': lambda sr: sr.bene_dict['Total Annual'], 'Annual Expenses ($)': lambda sr: sr.expns_dict['Total Annual']}
+    #Daily time series that are removed when the results are compacted
+    series_atts = ['inflows', 'pass_allos', 'spill_allos', 'over_allos', 'flush_allos', 'hwater_eles', 'spill_eles', 'tail_eles', 'comb_pass_allos', \
+                   'heads', 'gross_heads', 'gen_series_dict', 'res_vols']
+    
+    #metrics is the list of objective metrics calculated with the results, all of the metrics are calculated if metrics is None
+    #The other metrics and their performance tables (module capacity factors, fish, sediment, flood, and reservoir volumes) are calculated the first time they are used
     def __init__(self, proj, fac, inflows, pass_allos, spill_allos, over_allos, \
-                 flush_allos, hwater_eles, spill_eles, tail_eles):
+                 flush_allos, hwater_eles, spill_eles, tail_eles, metrics=None):
         #Created once a facility is evaluated in the SMH Project                  
         self.proj = proj
         self.fac = fac
@@ -771,13 +1466,18 @@ class SimResults:
         self.fac_prefs = self.proj.fac_prefs
         self.rule_curve = self.fac.rule_curve
         self.inflows = inflows
+        self.dates = self.inflows.index #Kept when the results are compacted for the fish passage tables
         self.pass_allos = pass_allos
         self.spill_allos = spill_allos
         self.over_allos = over_allos
         self.flush_allos = flush_allos
-        self.hwater_eles = hwater_eles
+        self.hwater_eles = np.asarray(hwater_eles, dtype=float) #(days x modules)
         self.spill_eles = spill_eles
-        self.tail_eles = tail_eles  
+        self.tail_eles = np.asarray(tail_eles, dtype=float)
+        self.series_dtype = getattr(self.proj, 'result_dtype', np.float64) #Data type of the time series that are only used for plots and tables
+        self.has_series = True #False once the results are compacted and only the metrics calculated so far are kept
+        self.allo_cache_hits = self.fac.allo_cache_hits #Number of daily allocations taken from the facility allocation cache
+        self.allo_cache_misses = self.fac.allo_cache_misses #Number of daily allocations that had to be calculated
         
         #Combines the passage module, spillway, flushing allocations
         self.comb_rule_curve = self.rule_curve.copy()
@@ -792,27 +1492,118 @@ class SimResults:
         
         self.M = 100000000 #Arbitrarily high penalty function
         
-        #Calculates the heads and reservoir volumes for each timestep
-        self.heads = [[j - self.tail_eles[i] for j in self.hwater_eles[i]] for i in range(0, len(self.hwater_eles))] 
-        self.gross_heads = [self.spill_eles[i] - self.tail_eles[i] for i in range(0, len(self.inflows))]
+        #Calculates the heads for each timestep
+        self.heads = self.hwater_eles - self.tail_eles[:, None] #(days x modules)
+        self.gross_heads = np.asarray(self.spill_eles, dtype=float) - self.tail_eles
+        
+        #Use functions to calculate the generation and economic performance, the other metrics are calculated when they are used
+        self.sim_years = len(self.inflows)/365
+        self.gen_perf_dict, self.gen_cf_dict, self.gen_series_dict = self.calc_gen_performance()
+        self.update_economics()
+        
+        #The time series that are not used by the metrics are stored with the results data type once the generation is calculated
+        self.hwater_eles = self.hwater_eles.astype(self.series_dtype, copy=False)
+        self.tail_eles = self.tail_eles.astype(self.series_dtype, copy=False)
+        self.heads = self.heads.astype(self.series_dtype, copy=False)
+        self.gross_heads = self.gross_heads.astype(self.series_dtype, copy=False)
+        
+        #This dict contains all of the possible objective function metrics that can be used as objectives or constraints
+        self.obj_dict = ObjectiveDict(self)
+        self.obj_dict.calculate(metrics)
+    
+    #####Simulation Results - Performance metrics that are calculated the first time they are used
+    #Reservoir volume for each timestep, None if no volume equation is provided
+    @cached_property
+    def res_vols(self):
         if self.site.reservoir_eq is not None:
-            self.res_vols = [self.site.reservoir_eq.get_y(hw) for hw in self.spill_eles]          
+            return np.array(self.calc_res_vols(), dtype=self.series_dtype)
         else:
-            self.res_vols = None
-        
-        #Use functions to calculate the performance metrics for the simulation
+            return None
+    @cached_property
+    def pass_mod_hours(self):
+        return self.calc_mod_hours()
+    @cached_property
+    def pass_mod_cfs(self):
+        return self.calc_mod_cfs()
+    @cached_property
+    def pass_mod_flow_ratios(self):
+        return self.calc_mod_flow_ratios()
+    @cached_property
+    def start_stop_list(self):
+        return self.calc_mod_start_stops()
+    @cached_property
+    def rec_perf_dict(self):
+        return self.calc_recreation_performance()
+    @cached_property
+    def fish_perf_dicts(self): #Upstream and downstream fish performance dicts
+        return self.calc_fish_performance()
+    @property
+    def fish_up_dict(self):
+        return self.fish_perf_dicts[0]
+    @property
+    def fish_down_dict(self):
+        return self.fish_perf_dicts[1]
+    @cached_property
+    def sed_perf_dict(self):
+        return self.calc_sediment_performance()
+    #Flood performance metrics are only calculated if peak flow data is provided
+    @cached_property
+    def design_flood_period(self):
+        if self.site.peak_flows is not None:
+            return round(self.site.peak_flows.get_return_period_from_flow(self.fac.total_spill_cap), 2)
+        else:
+            return None
+    @cached_property
+    def flood_period_percent(self): #% design flood period based on reference design flood of 100 years
+        if self.design_flood_period is not None:
+            return round(min(1.0, self.design_flood_period/100), 4)
+        else:
+            return None
+    #Average reservoir volume is only calculated if a volume equation is provided
+    @cached_property
+    def avg_imp_volume(self):
+        if self.res_vols is None:
+            return None
+        elif self.res_vols.dtype == np.float64:
+            return np.mean(self.res_vols)
+        else: #The stored volumes have a smaller data type, so they are calculated again
+            return np.mean(self.calc_res_vols())
+    #Total over-flow allocation, used for the flooding expenses
+    @cached_property
+    def flood_volume(self):
+        return sum(self.over_allos)
+    
+    #Calculates every performance metric, used before the results are shown or saved
+    def calc_all_metrics(self):
+        self.obj_dict.calculate()
+        for att in ['res_vols', 'pass_mod_hours', 'pass_mod_cfs', 'pass_mod_flow_ratios', 'start_stop_list', 'rec_perf_dict', 'fish_perf_dicts', \
+                    'sed_perf_dict', 'design_flood_period', 'flood_period_percent', 'avg_imp_volume', 'flood_volume']:
+            getattr(self, att)
+    
+    #Removes the daily time series of results that are no longer plotted or saved, the metrics and performance tables calculated so far are kept
+    #The fish passage dicts are kept if they were calculated, so the species and holistic tables are still available
+    #Compacted results can still be copied, compared, and have their economics updated, but their plots, time series tables, and uncalculated metrics raise an error
+    def compact(self):
+        for att in SimResults.series_atts:
+            self.__dict__.pop(att, None)
+        self.__dict__.pop('screen_tree', None)
+        if not any(self.__dict__.get('fish_perf_dicts', [])): #The dates are only kept for the fish passage tables
+            self.__dict__.pop('dates', None)
+        self.has_series = False
+    
+    #Raises a clear error when a time series that was removed by compact is used
+    def __getattr__(self, att):
+        if (att in SimResults.series_atts) and (self.__dict__.get('has_series') is False):
+            raise ValueError('The {} time series were removed when the simulation results were compacted.'.format(att))
+        raise AttributeError("'SimResults' object has no attribute '{}'".format(att))
+            
+
+    #Calculates the costs, benefits, NPV, and LCOE from the cost table and the operation results
+    #Only uses the stored results, so it can be called again after a cost table change without simulating the facility
+    def update_economics(self):
         self.initial_costs_dict, self.icc_breakdown_dict = self.calc_initial_costs()
         self.icc = round(self.initial_costs_dict['ICC'])
         self.total_cost = self.initial_costs_dict['Total']
-        self.sim_years = len(self.inflows)/365
-        self.gen_perf_dict, self.gen_cf_dict, self.gen_series_dict = self.calc_gen_performance()
-        self.pass_mod_hours = self.calc_mod_hours()
-        self.pass_mod_cfs = self.calc_mod_cfs()
-        self.pass_mod_flow_ratios = self.calc_mod_flow_ratios()
-        self.start_stop_list = self.calc_mod_start_stops()
-        self.rec_perf_dict = self.calc_recreation_performance()
-        self.fish_up_dict, self.fish_down_dict = self.calc_fish_performance()
-        self.sed_perf_dict = self.calc_sediment_performance()
         self.bene_dict = self.calc_annual_benefits()
         self.expns_dict = self.calc_annual_expenses()
         self.NPV = self.calc_npv()
@@ -823,29 +1614,10 @@ class SimResults:
             self.cost_per_kw = round(self.total_cost / self.fac.nameplate_cap, 2)
         else:
             self.cost_per_kw = 'N/A'
-
-        #Calculate flood performance metrics only if peak flow data is provided
-        if self.site.peak_flows is not None:
-            self.design_flood_period = round(self.site.peak_flows.get_return_period_from_flow(self.fac.total_spill_cap), 2)
-            self.flood_period_percent = round(min(1.0, self.design_flood_period/100), 4) #% design flood period based on reference design flood of 100 years
-        else:
-            self.design_flood_period = None
-            self.flood_period_percent = None
         
-        #Calculate average reservoir volume only if a volume equation is provided
-        if self.res_vols is not None:
-            self.avg_imp_volume = np.mean(self.res_vols)
-        else:
-            self.avg_imp_volume = None
-        
-        #This dict contains all of the possible objective function metrics that can be used as objectives or constraints
-        self.obj_dict = {'LCOE ($/MWh)': self.LCOE, 'NPV ($)':self.NPV, 'ICC ($)':self.icc,'Unit cost ($/kW)': self.cost_per_kw, \
-                         'Annual Energy (MWh)':self.gen_perf_dict['Total Annual MWh'], 'Effective Mortality (%)':self.get_fish_performance('M_eff'), 
-                         'Effective Passage (%)': self.get_fish_performance('U_eff'),'Sediment Flow Ratio (%)':self.pass_mod_flow_ratios['Sed'],
-                         'Sediment Passage Frequency (%)': self.sed_perf_dict['Sediment Passage Frequency'], 'Avg Trap Efficiency (%)': self.sed_perf_dict['Trap Efficiency'], \
-                         'Recreation Availability (%)': self.rec_perf_dict['Recreation Availability'], 'Annual Recreation (Hours)': self.rec_perf_dict['Annual Recreation Hours'],\
-                         'Flood Return Period (yr)': self.design_flood_period, 'Avg Impoundment Volume (ft3)':self.avg_imp_volume, \
-                         'Annual Benefits ($)': self.bene_dict['Total Annual'],'Annual Expenses ($)': self.expns_dict['Total Annual']}
+        if hasattr(self, 'obj_dict'): #Update the economic objectives when recalculating
+            self.obj_dict.update({'LCOE ($/MWh)': self.LCOE, 'NPV ($)':self.NPV, 'ICC ($)':self.icc,'Unit cost ($/kW)': self.cost_per_kw, \
+                                  'Annual Benefits ($)': self.bene_dict['Total Annual'],'Annual Expenses ($)': self.expns_dict['Total Annual']})
             
     #Returns a dict with the requested information, that can be turned into a dataframe
     def get_run_dict(self, obj=True, fac=False, mods=False, cost=False, bene=False, expns=False):
@@ -863,6 +1635,50 @@ class SimResults:
         if expns:
             out_dict.update(self.expns_dict)
         return out_dict
+    
+    #Removes the project and facility references so the results can be returned from a worker process without the project data
+    def detach(self):
+        self.proj = None
+        self.fac = None
+        self.site = None
+        self.fac_prefs = None
+        self.rule_curve = None
+        self.comb_rule_curve = None
+        self.__dict__.pop('screen_tree', None) #The screen tree is built again from the facility screens when it is needed
+    
+    #Sets the project and facility references after the results are returned from a worker process
+    def attach(self, proj, fac):
+        self.proj = proj
+        self.fac = fac
+        self.site = self.proj.site
+        self.fac_prefs = self.proj.fac_prefs
+        self.rule_curve = self.fac.rule_curve
+        self.comb_rule_curve = self.rule_curve.copy()
+        if self.fac.flushing:
+            self.comb_rule_curve.append([self.fac.flush_mod, 1])
+        self.comb_rule_curve.append([self.fac.spill_mod, 1])
+        self.__dict__.pop('screen_tree', None)
+    
+    #Returns a copy of the results for another facility with the same design, the time series are shared with these results
+    def get_copy(self, proj, fac):
+        sim_res = copy(self)
+        sim_res.obj_dict = self.obj_dict.copy(sim_res)
+        sim_res.attach(proj, fac)
+        return sim_res
+    
+    #Returns the approximate memory used by the time series in MB
+    def get_memory_size(self):
+        size = 0
+        for val in vars(self).values():
+            if isinstance(val, np.ndarray):
+                size += val.nbytes
+            elif isinstance(val, (pd.DataFrame, pd.Series)):
+                size += np.sum(val.memory_usage(index=True))
+            elif isinstance(val, list):
+                size += 8*len(val) + sum([8*len(i) for i in val if isinstance(i, list)])
+            elif isinstance(val, dict): #Generation series, dict.values is used so that the objective dict does not calculate its metrics
+                size += sum([i.nbytes for i in dict.values(val) if isinstance(i, np.ndarray)])
+        return size/1000000
         
     #Saves a computation time
     def add_time(self, time):
@@ -1176,7 +1992,7 @@ class SimResults:
         else:    
             spill_height = self.fac.spill_mod.crest_height
             
-        spill_rec = Rectangle((0, bed_ele), self.fac.spill_mod.length, spill_height, facecolor='grey', edgecolor='black')
+        spill_rec = patches.Rectangle((0, bed_ele), self.fac.spill_mod.length, spill_height, facecolor='grey', edgecolor='black')
         ax.add_patch(spill_rec)
         
         x_min = -3*self.fac.spill_mod.length
@@ -1316,6 +2132,9 @@ class SimResults:
         else:
             out_dict['Trap Efficiency'] = None
         return out_dict
+    #Calculates the reservoir volume for each time step from the spillway headwater elevations
+    def calc_res_vols(self):
+        return [self.site.reservoir_eq.get_y(hw) for hw in self.spill_eles]
     #Calculates the trap efficiency for one time step using the Eizel-Din model
     def calc_trap_eff_t(self, t):
         Q_t = self.inflows['Discharge (cfs)'][t]
@@ -1327,23 +2146,27 @@ class SimResults:
     
     ####Economic
     #Calculates several generation performance measures
+    #The power of each module is calculated once with get_power_array and used for the series, annual generation, and capacity factors
     def calc_gen_performance(self):
         gen_dict = {}
         gen_series = {}
         cf_dict = {}
+        rule_names = self.get_rule_names()
+        power = self.get_power_array()
+        gen_rows = []
         for m in range(0, len(self.fac.rule_curve)):
             mod = self.fac.rule_curve[m][0]
             if mod.module_class == 'Gen':
-                gen_series[self.get_rule_names()[m]] = [self.get_mod_power(m,t) for t in range(0, len(self.inflows))]
-                mod_heads = [i[m] for i in self.heads]
-                gen_dict[self.get_rule_names()[m]] = self.calc_annual_mod_gen(mod, self.pass_allos[m], mod_heads)
-                cf_dict[self.get_rule_names()[m]] = gen_dict[self.get_rule_names()[m]]/(mod.nom_power * mod.hours_available())
+                gen_rows.append(m)
+                gen_series[rule_names[m]] = power[m].astype(self.series_dtype)
+                gen_dict[rule_names[m]] = self.calc_annual_mod_gen(power[m].tolist())
+                cf_dict[rule_names[m]] = gen_dict[rule_names[m]]/(mod.nom_power * mod.hours_available())
         
         total_gen = round(sum(gen_dict.values()))
         gen_dict['Total Simulation Generation'] = round(total_gen * self.sim_years) #gen_dict has annual mod gen
         gen_dict['Total Annual'] = total_gen
         gen_dict['Total Annual MWh'] = round(total_gen/1000)
-        gen_series['Total Plant Generation (kW)'] = [self.calc_day_plant_power(t) for t in range(0, len(self.inflows))] 
+        gen_series['Total Plant Generation (kW)'] = power[gen_rows].sum(axis=0).astype(self.series_dtype)
         if self.fac.nameplate_cap > 0:
             cf_dict['Plant'] = round(total_gen/(self.fac.nameplate_cap * 8760), 4) #This is based on nameplate capacity, not max_cap, so it might go over 100%
         else:
@@ -1374,7 +2197,7 @@ class SimResults:
     def calc_annual_expenses(self):
         cs_tb = self.proj.costs
         start_stops = self.start_stop_list
-        flood_volume = sum(self.over_allos)
+        flood_volume = self.flood_volume
         
         #Annual Plant O&M Costs
         if cs_tb.om_type == '(%) Percent of ICC': #Fixed Cost
@@ -1412,9 +2235,18 @@ class SimResults:
     #Calculate the power from one module for the specifed flow at the timestep
     def get_mod_power(self, rule_curve_index, time_step):
         return self.rule_curve[rule_curve_index][0].get_power(self.pass_allos[rule_curve_index][time_step], self.heads[time_step][rule_curve_index])
-    #Calculate the annualized module generation
-    def calc_annual_mod_gen(self, gen_mod, allos, heads):
-        gen_sum = sum([gen_mod.get_power(allos[f], heads[f]) for f in range(0, len(allos))])
+    #Returns a (rule curve modules x days) array with the power (kW) of each generation module, the other modules have no power
+    def get_power_array(self):
+        power = np.zeros((len(self.rule_curve), len(self.inflows)))
+        heads = np.array(self.heads, dtype=float) #(days x modules)
+        for m in range(0, len(self.rule_curve)):
+            mod = self.rule_curve[m][0]
+            if mod.module_class == 'Gen':
+                power[m] = mod.get_power_array(self.pass_allos[m], heads[:, m])
+        return power
+    #Calculate the annualized module generation from the daily module power
+    def calc_annual_mod_gen(self, mod_power):
+        gen_sum = sum(mod_power)
         return gen_sum * 24 / self.sim_years #kW/day * 1day * (24hrs/day) 
     #Calculate the initial costs and save the components as a dict
     def calc_initial_costs(self): 
@@ -1579,53 +2411,71 @@ class SimResults:
             return False, False
          
     #Calculate the effective upstream passage for a given species at each timestep
+    #The efficiencies are calculated for every module (rows of comb_pass_allos) and every upstream passage day at once
+    #The module sums are added in module order and the powers use Python floats, so the values are identical to calculating each day separately
     def calc_upstream_passage_efficiency(self, species): #Returns array of U_s,t that is len(inflows) long
-        Ust_list = []
-        for t in range(0, len(self.inflows)):
-            Amst_list = []
-            Ems_list = []
-            Pms_list = []
-            if species.on_up_month(self.inflows.index[t].month):
-                for j in range(0, len(self.comb_rule_curve)):
-                    rel_dis = self.comb_pass_allos[j][t]/sum(self.comb_pass_allos[:,t])
-                    Amst_list.append(species.get_attraction_eff(rel_dis))
-                    Ems_list.append(self.comb_rule_curve[j][0].entr_effs[species.name])
-                    Pms_list.append(self.comb_rule_curve[j][0].pass_effs[species.name])
-                sum_EA = sum([Ems_list[i]*Amst_list[i] for i in range(0, len(self.comb_rule_curve))])
-                if sum_EA <= 0: #No attraction flows
-                    Ust = 0
-                else:
-                    Ust = sum([((Ems_list[i]**2)*(Amst_list[i]**2)*Pms_list[i])/(sum_EA) for i in range(0, len(self.comb_rule_curve))])
-            else:
-                Ust = None
-            Ust_list.append(Ust)
+        up_days = species.get_up_month_mask(self.inflows.index.month)
+        allos = self.comb_pass_allos[:, up_days]
+        Ems = [mod[0].entr_effs[species.name] for mod in self.comb_rule_curve]
+        Pms = [mod[0].pass_effs[species.name] for mod in self.comb_rule_curve]
+        
+        total_allos = np.zeros(allos.shape[1])
+        for j in range(0, len(self.comb_rule_curve)):
+            total_allos = total_allos + allos[j]
+        Amst = species.get_attraction_effs(allos/total_allos)
+        sum_EA = np.zeros(allos.shape[1])
+        for j in range(0, len(self.comb_rule_curve)):
+            sum_EA = sum_EA + Ems[j]*Amst[j]
+        
+        attr_days = ~(sum_EA <= 0) #Days with attraction flows
+        Ust = np.zeros(np.count_nonzero(attr_days))
+        for j in range(0, len(self.comb_rule_curve)):
+            Amst_sq = np.array([A**2 for A in Amst[j][attr_days].tolist()])
+            Ust = Ust + ((Ems[j]**2)*Amst_sq*Pms[j])/sum_EA[attr_days]
+        
+        Ust_list = [None]*len(self.inflows) #None outside of the upstream passage months
+        Ust_iter = iter(Ust.tolist())
+        for t, attr in zip(np.flatnonzero(up_days).tolist(), attr_days.tolist()):
+            if attr:
+                Ust_list[t] = next(Ust_iter)
+            else: #No attraction flows
+                Ust_list[t] = 0
         return Ust_list
     #Calculates the downstream effective mortality for a given species at each timestep
+    #The mortality is calculated for every downstream passage day at once, screened facilities use the screen tree that is built once for the simulation
     def calc_downstream_mortality(self, species): #Gives Meff,s,t or the effective mortality for a given species at time t
-        Mst_list = []
-        for t in range(0, len(self.inflows)):
-            guid_weighted_flows = []
-            mort_rates = []
-            if species.on_down_month(self.inflows.index[t].month): #If migratory month
-                if self.fac.has_screens == True: #If there is a screen, then have to create a screen tree
-                    tree = ScreenTree('Root')                    
-                    for s in self.fac.screens:
-                        self.add_screen_to_tree(tree, s, self.comb_rule_curve)
-                    mod_fish_flow_percs = tree.calc_fish_flow(self.comb_rule_curve, self.comb_pass_allos[:,t], species)
-                    Mst = 1.0 - sum(mod_fish_flow_percs)
-                else: #If no screen tree, then apply across all modules at once
-                    for j in range(0, len(self.comb_rule_curve)):
-                        mod = self.comb_rule_curve[j][0]
-                        guid_weighted_flows.append((1-mod.guide_effs[species.name])*self.comb_pass_allos[j][t])
-                        mort_rates.append(mod.mort_rates[species.name])
-                    if sum(guid_weighted_flows) <= 0: #If no where to go, then all are killed
-                        Mst = 1
-                    else:
-                        Mst = sum([(guid_weighted_flows[k]*mort_rates[k])/sum(guid_weighted_flows) for k in range(0, len(self.comb_rule_curve))])
-            else:
-                Mst = None #Set mortality to none if no migration
-            Mst_list.append(Mst)
+        down_days = species.get_down_month_mask(self.inflows.index.month)
+        allos = self.comb_pass_allos[:, down_days]
+        if self.fac.has_screens == True: #If there is a screen, then use the screen tree
+            mod_fish_flow_percs = self.screen_tree.calc_fish_flow_array(self.comb_rule_curve, allos, species)
+            total_percs = np.zeros(allos.shape[1])
+            for j in range(0, len(self.comb_rule_curve)):
+                total_percs = total_percs + mod_fish_flow_percs[j]
+            Mst_days = list(1.0 - total_percs)
+        else: #If no screen tree, then apply across all modules at once
+            guid_weighted_flows = np.zeros(allos.shape)
+            total_flows = np.zeros(allos.shape[1])
+            for j in range(0, len(self.comb_rule_curve)):
+                guid_weighted_flows[j] = (1-self.comb_rule_curve[j][0].guide_effs[species.name])*allos[j]
+                total_flows = total_flows + guid_weighted_flows[j]
+            Mst = np.zeros(allos.shape[1])
+            with np.errstate(divide='ignore', invalid='ignore'):
+                for j in range(0, len(self.comb_rule_curve)):
+                    Mst = Mst + (guid_weighted_flows[j]*self.comb_rule_curve[j][0].mort_rates[species.name])/total_flows
+            Mst_days = [1 if total <= 0 else M for total, M in zip(total_flows, Mst)] #If no where to go, then all are killed
+        
+        Mst_list = [None]*len(self.inflows) #Set mortality to none if no migration
+        for t, Mst in zip(np.flatnonzero(down_days).tolist(), Mst_days):
+            Mst_list[t] = Mst
         return Mst_list
+    #The screen tree for the facility screens and the combined rule curve, built the first time the downstream fish passage is calculated
+    @cached_property
+    def screen_tree(self):
+        tree = ScreenTree('Root')
+        for s in self.fac.screens:
+            self.add_screen_to_tree(tree, s, self.comb_rule_curve)
+        tree.compile_tree(self.comb_rule_curve)
+        return tree
     #Adds a screen to the tree to create the top down structure that fish flow through
     def add_screen_to_tree(self, tree, screen, rule_curve):
         all_nodes = tree.get_all_nodes()
@@ -1791,7 +2641,7 @@ class SimResults:
             out_df = pd.DataFrame(data=['Could not assess fish passage performance'], columns=['Error'])
         else:
             out_df = pd.DataFrame(temp_up_dict)
-            out_df['dateTime'] = self.inflows.index
+            out_df['dateTime'] = self.dates
             out_df.set_index('dateTime', drop=True, inplace=True)
         return out_df
     #Returns a table with the generation related time series data
@@ -1817,7 +2667,7 @@ class SimResults:
     #Returns a dict of the holistic performance metrics
     def get_holistic_dict(self):
         holi_dict = {}
-        if self.res_vols is not None:
+        if self.site.reservoir_eq is not None: #Same as checking the reservoir volumes, which are removed when the results are compacted
            holi_dict['1 - Average Trap Efficiency'] = round(1-self.sed_perf_dict['Trap Efficiency'], 4)
         #Check if has generation module
         has_gen = False
@@ -1886,6 +2736,21 @@ class Species:
         else:
             Amst = 1/(1 + math.exp(-100*(((1/self.a)*rel_dis)-self.b)))
             return Amst
+    #Returns a boolean array that is True for the months (array of month numbers) during the upstream passage months
+    def get_up_month_mask(self, months):
+        return np.isin(np.asarray(months), list(self.up_months))
+    #Returns a boolean array that is True for the months (array of month numbers) during the downstream passage months
+    def get_down_month_mask(self, months):
+        return np.isin(np.asarray(months), list(self.down_months))
+    #Returns an array of attraction efficiencies for an array of relative discharges
+    #The exponentials use math.exp so that each value matches get_attraction_eff
+    def get_attraction_effs(self, rel_dis):
+        rel_dis = np.asarray(rel_dis, dtype=float)
+        Amst = np.zeros(rel_dis.shape)
+        attr = ~(rel_dis <= 0)
+        exps = [math.exp(x) for x in (-100*(((1/self.a)*rel_dis[attr])-self.b)).tolist()]
+        Amst[attr] = 1/(1 + np.array(exps))
+        return Amst
     
     
     
@@ -1901,6 +2766,9 @@ class FlowData:
         
         self.sorted_flows, self.sorted_flow_probs = self.build_flow_duration()
         
+    #Returns a tuple of the values that determine the flow data, used to compare flow data
+    def get_signature(self):
+        return (self.name, self.df.shape, int(pd.util.hash_pandas_object(self.df).sum()))
     #Returns a subset of the flow time series between two dates
     def get_flow_subset(self, start_date, end_date):
         mask = (self.df.index >= start_date) & (self.df.index < end_date)
@@ -2194,6 +3062,14 @@ class Equation:
     #Sets the dynamic module attribute type
     def set_dynamic_type(self, text):
         self.dynamic_type = text
+    #The equation function is not saved when pickling, so it is recreated from the form and coefficients
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.pop('func', None)
+        return state
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.set_func()
     #Sets the function that represents the actual equation
     def set_func(self):
         if self.form == 'Linear':
@@ -2212,6 +3088,9 @@ class Equation:
             self.func = lambda x:self.coeffs[0]*(x[0]**self.coeffs[1])*(x[1]**self.coeffs[2])+self.coeffs[3]
         elif self.form == 'Binomial':
             self.func = lambda x:self.coeffs[0]*(self.coeffs[1]*x + self.coeffs[2])**self.coeffs[3] + self.coeffs[4]
+    #Returns a tuple of the values that determine the equation results, used to compare equations
+    def get_signature(self):
+        return (self.form, tuple(self.coeffs), self.lb, self.ub, self.lbz, self.ubz, self.discount_factor)
     #Return the result of the equation for a given x
     #Multi variable equations must send x as a tuple (x,z)
     def get_y(self, x):
@@ -2227,6 +3106,25 @@ class Equation:
                 return out_val
             except:
                 return False
+    #Returns the results of the equation for an array of x values, the values outside of the bounds or that cause an error are nan
+    #Multi variable equations are not supported
+    def get_y_array(self, x):
+        x = np.asarray(x, dtype=float)
+        y = np.full(x.shape, np.nan)
+        in_bounds = np.ones(x.shape, dtype=bool)
+        if self.lb is not None:
+            in_bounds &= x >= self.lb
+        if self.ub is not None:
+            in_bounds &= x <= self.ub
+        try:
+            with np.errstate(all='ignore'):
+                y[in_bounds] = self.func(x[in_bounds])
+        except: #Use the scalar function if the equation can not be evaluated on an array
+            y[in_bounds] = [np.nan if v is False else v for v in [self.get_y(v) for v in x[in_bounds]]]
+            return y
+        if self.discount_factor is not None:
+            y = y * self.discount_factor
+        return y
             
     #Checks if the provided x is without the specified bounds
     def check_bounds(self, x): 
@@ -2356,6 +3254,19 @@ class PiecewiseEquation:
                 if (x >= self.range_list[i]) and (x <= self.range_list[i+1]):
                     return self.eq_list[i].get_y(x)
         return False
+    #Returns the results of the equation for an array of x values, the values outside of the ranges are nan
+    def get_y_array(self, x):
+        x = np.asarray(x, dtype=float)
+        y = np.full(x.shape, np.nan)
+        left = (x >= self.lb) & (x <= self.ub) #Values that have not been assigned to a range, the first range that contains x is used
+        for i in range(0, len(self.range_list)-1):
+            in_range = left & (x >= self.range_list[i]) & (x <= self.range_list[i+1])
+            y[in_range] = self.eq_list[i].get_y_array(x[in_range])
+            left &= ~in_range
+        return y
+    #Returns a tuple of the values that determine the equation results, used to compare equations
+    def get_signature(self):
+        return (self.form, tuple(self.range_list), tuple([eq.get_signature() for eq in self.eq_list]))
     #Returns text string of piecwise equation, on two lines
     def get_text(self):
         out_str = ''
@@ -2394,13 +3305,14 @@ class PiecewiseEquation:
 
 #%%## PREFERENCES CLASS - collects information about the users design and operation preferences
 class Facility_preferences:
-    def __init__(self, operation_priorities, design_nol, test_start, test_end, allow_overrun, spill_min_flow=None, min_flow_type=None, notch_flow=None, gen_dispatch_mode='Design Flow'):
+    def __init__(self, operation_priorities, design_nol, test_start, test_end, allow_overrun, spill_min_flow=None, min_flow_type=None, notch_flow=None, gen_dispatch_mode='Design Flow', sim_engine='Daily Loop'):
         self.op_rules = operation_priorities #List of module type strings e.g. ['Generation', 'Sediment Passage', 'Aquatic Species', 'Recreation', 'Water Passage']
         self.nol = design_nol #Normal operating headwater level
         self.test_start = test_start #Start date of simulation, must be within inflow data
         self.test_end = test_end #End date of simulation, must be within inflow data
-        self.gen_dispatch_mode = gen_dispatch_mode #'Design Ramping','Peak Ramping', 'Simple Greedy', 'Advanced Greedy'  
+        self.gen_dispatch_mode = gen_dispatch_mode #'Design Ramping','Peak Ramping', 'Simple Greedy', 'Advanced Greedy', 'Dynamic Programming'  
         self.allow_overrun = allow_overrun #Allows the turbines to be ramped past the design flow
+        self.sim_engine = sim_engine #'Daily Loop' simulates one day at a time, 'Vectorized' allocates all days at once using arrays
         if spill_min_flow is None: #Allocates the spillway minium flow before allocation
             self.spill_min_flow = 0.0
         else:
@@ -2411,15 +3323,15 @@ class Facility_preferences:
         else:
             self.notch_flow = notch_flow
             
-        self.labels = ['Normal Operating Level', 'Test Data Start Date', 'Test Data End Date', 'Spillway Minimum Flow', 'Minimum Flow Type', 'Spillway Notch Flow', 'Generation Dispatch Mode']
-        self.units = ['ft', 'Date', 'Date', 'cfs', 'Text', 'cfs', 'Text']
+        self.labels = ['Normal Operating Level', 'Test Data Start Date', 'Test Data End Date', 'Spillway Minimum Flow', 'Minimum Flow Type', 'Spillway Notch Flow', 'Generation Dispatch Mode', 'Simulation Engine']
+        self.units = ['ft', 'Date', 'Date', 'cfs', 'Text', 'cfs', 'Text', 'Text']
         self.update_data_list()
     #Returns a table of the information
     def get_df(self):
          return pd.DataFrame(data=self.data_list, index=self.labels, columns=['Value']).rename_axis('Attribute')
     #Updates the data list
     def update_data_list(self):
-        self.data_list = [round(self.nol, 2), self.test_start.strftime('%Y-%m-%d'), self.test_end.strftime('%Y-%m-%d'), self.spill_min_flow, self.min_flow_type, self.notch_flow, self.gen_dispatch_mode]  
+        self.data_list = [round(self.nol, 2), self.test_start.strftime('%Y-%m-%d'), self.test_end.strftime('%Y-%m-%d'), self.spill_min_flow, self.min_flow_type, self.notch_flow, self.gen_dispatch_mode, self.sim_engine]  
     
 #%%## MODULE LIBRARY CLASS - collects the modules the be used in facility creation
 class Module_library:
@@ -2884,6 +3796,33 @@ class ScreenTree(): #This object acts as the top of the screen tree containing s
             child.calc_fish_flow(mod_fish_flow_percs, rule_curve, pass_allos_t, species)
             
         return mod_fish_flow_percs
+    #Saves the modules covered by each screen as an array of rule curve indices, so the fish flows can be calculated for many time steps at once
+    def compile_tree(self, rule_curve):
+        for child in self.children:
+            child.compile_node(rule_curve)
+    #Same as calc_fish_flow for every time step at once, pass_allos is a (modules x time steps) array of allocations for the rule curve used in compile_tree
+    #Returns a (modules x time steps) array of fish flow percentages, the values match calc_fish_flow for each time step
+    def calc_fish_flow_array(self, rule_curve, pass_allos, species):
+        mod_fish_flows = np.zeros(pass_allos.shape)
+        mods_accounted = np.zeros(len(rule_curve), dtype=bool)
+        mort_rates = np.zeros(len(rule_curve))
+        mod_fish_flow_sum = np.zeros(pass_allos.shape[1])
+        for child in self.children:
+            #Calculate flow through each screen
+            mod_screen_flow = child.calc_screen_flow_array(pass_allos)*(1.0-child.screen.guide_effs[species.name])
+            mod_fish_flow_sum = mod_fish_flow_sum + mod_screen_flow
+            mod_fish_flows[child.cover_idx] = mod_screen_flow
+            mort_rates[child.cover_idx] = child.screen.mort_rates[species.name]
+            mods_accounted[child.cover_idx] = True
+        for m in np.flatnonzero(~mods_accounted): #account for mods without screens
+            mod_fish_flows[m] = pass_allos[m]*(1.0-rule_curve[m][0].guide_effs[species.name])
+            mod_fish_flow_sum = mod_fish_flow_sum + mod_fish_flows[m]
+            mort_rates[m] = rule_curve[m][0].mort_rates[species.name]
+        
+        mod_fish_flow_percs = calc_fish_flow_percs(mod_fish_flows, mort_rates, mod_fish_flow_sum) #percentages for the first screen level
+        for child in self.children:
+            child.calc_fish_flow_array(mod_fish_flow_percs, rule_curve, pass_allos, species)
+        return mod_fish_flow_percs
         
 #Acts a node in the screen tree and is related to a screen in the facility
 class ScreenNode:
@@ -2948,6 +3887,52 @@ class ScreenNode:
             for m in range(0, len(rule_curve)): #account for mods without screens
                 if mods_in_node[m]==True:
                     mod_fish_flow_percentages[m] = mod_fish_flow_percentages[m] * sub_mod_fish_flow_percs[m]
+    #Saves the rule curve indices of the modules covered by the screen for the node and its children
+    def compile_node(self, rule_curve):
+        self.cover_idx = np.array([m for m in range(0, len(rule_curve)) if self.screen.check_covered(rule_curve[m][0].name)], dtype=int)
+        for child in self.children:
+            child.compile_node(rule_curve)
+    #Returns the total flow through the screen for each time step, the modules are added in rule curve order like Screen.calc_screen_flow
+    def calc_screen_flow_array(self, pass_allos):
+        out_flow = np.zeros(pass_allos.shape[1])
+        for m in self.cover_idx:
+            out_flow = out_flow + pass_allos[m]
+        return out_flow
+    #Same as calc_fish_flow for every time step at once, updates the (modules x time steps) mod_fish_flow_percentages array
+    def calc_fish_flow_array(self, mod_fish_flow_percentages, rule_curve, pass_allos, species):
+        sub_mod_fish_flows = np.zeros(pass_allos.shape)
+        mort_rates = np.zeros(len(rule_curve))
+        if len(self.children) > 0:
+            mod_fish_flow_sum = np.zeros(pass_allos.shape[1])
+            for child in self.children:
+                #Calculate flow through each screen, every module in the node gets the flow of the child screen
+                mod_screen_flow = child.calc_screen_flow_array(pass_allos)*(1.0-child.screen.guide_effs[species.name])
+                mod_fish_flow_sum = mod_fish_flow_sum + mod_screen_flow
+                sub_mod_fish_flows[self.cover_idx] = mod_screen_flow
+                mort_rates[self.cover_idx] = child.screen.mort_rates[species.name]
+            sub_mod_fish_flow_percs = calc_fish_flow_percs(sub_mod_fish_flows, mort_rates, mod_fish_flow_sum)
+            mod_fish_flow_percentages[self.cover_idx] = mod_fish_flow_percentages[self.cover_idx] * sub_mod_fish_flow_percs[self.cover_idx]
+            for child in self.children: #Recursively call calc_fish_flow_array for any sub mods
+                child.calc_fish_flow_array(mod_fish_flow_percentages, rule_curve, pass_allos, species)
+        else:
+            for m in self.cover_idx:
+                sub_mod_fish_flows[m] = pass_allos[m]*(1.0-rule_curve[m][0].guide_effs[species.name])
+                mort_rates[m] = rule_curve[m][0].mort_rates[species.name]
+            sub_mod_fish_flow_percs = calc_fish_flow_percs(sub_mod_fish_flows, mort_rates)
+            mod_fish_flow_percentages[self.cover_idx] = mod_fish_flow_percentages[self.cover_idx] * sub_mod_fish_flow_percs[self.cover_idx]
+
+#Returns the (modules x time steps) fish flow percentages after mortality for an array of module fish flows, used by the screen tree
+#The flows are divided by mod_fish_flow_sum (the sum of the module flows if None) and time steps without any fish flow are set to zero
+def calc_fish_flow_percs(mod_fish_flows, mort_rates, mod_fish_flow_sum=None):
+    total_flows = np.zeros(mod_fish_flows.shape[1])
+    for m in range(0, len(mod_fish_flows)): #The modules are added in order to match sum() for each time step
+        total_flows = total_flows + mod_fish_flows[m]
+    if mod_fish_flow_sum is None:
+        mod_fish_flow_sum = total_flows
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mod_fish_flow_percs = mod_fish_flows*(1.0-mort_rates)[:, None]/mod_fish_flow_sum
+    mod_fish_flow_percs[:, total_flows == 0] = 0.0
+    return mod_fish_flow_percs
 
 #%%## MODULE CLASS - the parent class for all SMH modules
 class Module:
@@ -3053,6 +4038,9 @@ class Passage_module(Module):
     #Checks if the given month is during the operating months
     def on_month(self, month):
        return month in self.op_months
+    #Checks an array of months against the operating months, returns a boolean array
+    def on_month_array(self, months):
+        return np.isin(months, self.op_months)
    #Calculates the number of maximum possible hours available depending on the operating months
     def hours_available(self):
         days = [31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31]
@@ -3164,6 +4152,30 @@ class Generation_module(Passage_module):
                     power_kw = self.max_power
                 
             return power_kw    
+    #Calculates the power output for arrays of module flows and gross heads, gives the same results as get_power for each element
+    def get_power_array(self, flows_cfs, heads_ft):
+        flows_cfs = np.asarray(flows_cfs, dtype=float)
+        power_kw = np.zeros(len(flows_cfs))
+        on = flows_cfs != 0
+        if not on.any():
+            return power_kw
+        flows = flows_cfs[on]
+        heads = np.asarray(heads_ft, dtype=float)[on]
+        flow_eff = self.flow_eff_eq.get_y_array(flows/self.design_flow)
+        if np.isnan(flow_eff).any():
+            flow_eff[np.isnan(flow_eff)] = 1
+            print('Flow outside of efficiency bounds, set to 1')
+        if self.head_eff_eq is not None:
+            head_eff = self.head_eff_eq.get_y_array(heads/self.design_head)
+            if np.isnan(head_eff).any():
+                head_eff[np.isnan(head_eff)] = 1
+                print('Head outside of efficiency bounds, set to 1')
+        else:
+            head_eff = 1
+        power_kw[on] = self.hydropower_equation(heads, flows, flow_eff, head_eff)
+        if self.max_power is not None:
+            power_kw = np.minimum(power_kw, self.max_power)
+        return power_kw
     #Calculates the flow at which the peak efficiency occurs. Takes the largest flow if points are equal
     def get_peak_eff_flow(self):
         if (type(self.flow_eff_eq) == Equation) or (type(self.flow_eff_eq) == PiecewiseEquation):
@@ -3188,6 +4200,9 @@ class Generation_module(Passage_module):
             return True
         else:
             return False
+    #Checks an array of heads against the head operating range, returns a boolean array
+    def check_head_array(self, heads):
+        return (heads >= self.min_op_head) & (heads <= self.max_op_head)
 
 #%%## FISH MODULE CLASS - reflects fish passage technologies like volitional fishways
 class Fish_module(Passage_module): 
@@ -3221,6 +4236,14 @@ class Fish_module(Passage_module):
             if head_diff > self.max_head_drop:
                 ok_head = False
         return ok_head
+    #Checks an array of headwater changes, returns a boolean array
+    def check_head_array(self, head_diffs):
+        ok_heads = np.ones(len(head_diffs), dtype=bool)
+        if self.max_head_drop is not None:
+            ok_heads &= ~(head_diffs < -1*self.max_head_drop)
+        if self.max_head_rise is not None:
+            ok_heads &= ~(head_diffs > self.max_head_drop)
+        return ok_heads
     #Checks if the tailwater elevation is within allowed bounds
     def check_tailwater_elevation(self, tail_ele):
         ok_tail = True
@@ -3231,6 +4254,14 @@ class Fish_module(Passage_module):
             if tail_ele > self.max_tail_ele:
                 ok_tail = False
         return ok_tail
+    #Checks an array of tailwater elevations, returns a boolean array
+    def check_tailwater_elevation_array(self, tail_eles):
+        ok_tails = np.ones(len(tail_eles), dtype=bool)
+        if self.min_tail_ele is not None:
+            ok_tails &= ~(tail_eles < self.min_tail_ele)
+        if self.max_tail_ele is not None:
+            ok_tails &= ~(tail_eles > self.max_tail_ele)
+        return ok_tails
     
 #%%## RECREATION MODULE CLASS - represents low-head recreation passage technologies like boat chutes     
 class Recreation_module(Passage_module):
@@ -3265,6 +4296,14 @@ class Recreation_module(Passage_module):
             if head_diff > self.max_head_drop:
                 ok_head = False
         return ok_head
+    #Checks an array of headwater changes, returns a boolean array
+    def check_head_array(self, head_diffs):
+        ok_heads = np.ones(len(head_diffs), dtype=bool)
+        if self.max_head_drop is not None:
+            ok_heads &= ~(head_diffs < -1*self.max_head_drop)
+        if self.max_head_rise is not None:
+            ok_heads &= ~(head_diffs > self.max_head_drop)
+        return ok_heads
     #Checks if the tailwater elevation is within allowed bounds       
     def check_tailwater_elevation(self, tail_ele):
         ok_tail = True
@@ -3275,6 +4314,14 @@ class Recreation_module(Passage_module):
             if tail_ele > self.max_tail_ele:
                 ok_tail = False
         return ok_tail
+    #Checks an array of tailwater elevations, returns a boolean array
+    def check_tailwater_elevation_array(self, tail_eles):
+        ok_tails = np.ones(len(tail_eles), dtype=bool)
+        if self.min_tail_ele is not None:
+            ok_tails &= ~(tail_eles < self.min_tail_ele)
+        if self.max_tail_ele is not None:
+            ok_tails &= ~(tail_eles > self.max_tail_ele)
+        return ok_tails
 #%%## SEDIMENT MODULE CLASS - represents sediment passage technologies like sluice gates                    
 class Sediment_module(Passage_module):
     def __init__(self, module_name, capital_cost, operating_cost,\
@@ -3372,6 +4419,103 @@ class Nonoverflow_module(Module):
         self.data_list = [self.name, round(self.cap_cost), round(self.op_cost), round(self.width, 2), round(self.length, 2)]  
 
 
+#%%## DISPATCH TABLE CACHE - shares generation dispatch tables between facilities with the same generation modules
+class DispatchTableCache:
+    def __init__(self, size=128):
+        self.size = size #Maximum number of generation module sets that are stored, the least recently used set is removed first
+        self.tables = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    #Returns the cached tables for a key, or None if the key is not in the cache
+    def get(self, key):
+        with self.lock:
+            if key in self.tables:
+                self.tables.move_to_end(key)
+                self.hits += 1
+                return self.tables[key]
+            else:
+                self.misses += 1
+                return None
+    #Adds tables to the cache
+    def put(self, key, tables):
+        with self.lock:
+            self.tables[key] = tables
+            self.tables.move_to_end(key)
+            while len(self.tables) > self.size:
+                self.tables.popitem(last=False)
+    #Removes all of the cached tables
+    def clear(self):
+        with self.lock:
+            self.tables.clear()
+            self.hits = 0
+            self.misses = 0
+
+gen_dispatch_cache = DispatchTableCache() #Process-wide cache used by all facilities
+
+#%%## DISPATCH TABLES - the dispatch tables for each combination of generation modules that are on, shared by the facilities that use the same cache entry
+#The lock is held while a table or an advanced greedy row is added, so the facilities and threads that share the tables do not fill them at the same time
+class DispatchTables(dict):
+    def __init__(self, tables=None):
+        dict.__init__(self, tables if tables is not None else {})
+        self.lock = threading.Lock()
+    #Copies and pickled tables are not shared, so they get their own lock
+    def __reduce__(self):
+        return (DispatchTables, (dict(self),))
+
+#%%## FITNESS CACHE - stores the simulation results of facility designs so that repeated designs are not simulated again
+class FitnessCache:
+    def __init__(self, size=256, max_mb=250):
+        self.size = size #Maximum number of designs that are stored, set to 0 to turn off the cache
+        self.max_mb = max_mb #Approximate maximum memory of the stored simulation results in MB, None for no memory limit
+        self.results = OrderedDict() #Design key: [simulation results or False, memory size in MB]
+        self.total_mb = 0
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    #Only the limits are kept when the project is copied or sent to a worker process
+    def __getstate__(self):
+        return {'size': self.size, 'max_mb': self.max_mb}
+    def __setstate__(self, state):
+        self.__init__(state['size'], state['max_mb'])
+    #Returns the cached simulation results (False if the design could not be simulated), or None if the key is not in the cache
+    def get(self, key):
+        with self.lock:
+            if key in self.results:
+                self.results.move_to_end(key)
+                self.hits += 1
+                return self.results[key][0]
+            else:
+                self.misses += 1
+                return None
+    #Adds simulation results to the cache and removes the least recently used results when over the limits
+    #A copy is stored so that compacting the facility's results does not remove the time series of the cached results
+    def put(self, key, sim_res):
+        if sim_res is not False:
+            sim_res = sim_res.get_copy(sim_res.proj, sim_res.fac)
+        mem_size = sim_res.get_memory_size() if sim_res is not False else 0
+        with self.lock:
+            if key in self.results:
+                self.total_mb -= self.results[key][1]
+            self.results[key] = [sim_res, mem_size]
+            self.results.move_to_end(key)
+            self.total_mb += mem_size
+            while (len(self.results) > self.size) or ((self.max_mb is not None) and (self.total_mb > self.max_mb) and (len(self.results) > 0)):
+                old_res, old_size = self.results.popitem(last=False)[1]
+                self.total_mb -= old_size
+    #Removes all of the cached results
+    def clear(self):
+        with self.lock:
+            self.results.clear()
+            self.total_mb = 0
+            self.hits = 0
+            self.misses = 0
+    #Returns the percentage of lookups that were found in the cache
+    def get_hit_rate(self):
+        if self.hits + self.misses <= 0:
+            return 0
+        return 100*self.hits/(self.hits + self.misses)
+
 #%%## FACILITY CLASS - represents an SMH facility as a collection of SMH modules at a given site
 class Facility:
     def __init__(self, name, proj, passage_modules, passage_counts, spill_mod, spill_mod_count, non_mod, foundation_mod, flush_mod=None, screens=[]):
@@ -3401,6 +4545,12 @@ class Facility:
         self.max_cap = 0
         self.pass_mod_cls = ['Gen', 'Sed', 'Fish', 'Rec', 'Wat']    
         self.results_list = [] #Store simulation results objects
+        self.max_detail_results = 3 #Number of latest simulation results that keep their daily time series, older results are compacted to the metrics calculated so far, None to keep every time series
+        self.genome = None #Module counts and attributes used by the genetic algorithm, set when the facility is created from a genome
+        self.allo_cache_size = 10000 #Maximum number of daily allocations stored in the allocation cache, set to 0 to turn off the cache
+        self.allo_cache = OrderedDict() #Least recently used cache of daily allocations
+        self.allo_cache_hits = 0
+        self.allo_cache_misses = 0
         
         #Save a dict of the module module names and counts
         self.pass_dict = {}
@@ -3422,11 +4572,35 @@ class Facility:
         self.max_cap = self.get_max_cap()
         self.flushing = self.get_sediment_characteristics()
         self.update_screens()
+        self.constant_head = self.check_constant_head()
         self.get_gen_mods_list()
+        self.reset_allocation_cache() #Cached allocations are only valid for the current design
+        self.update_gen_dispatch()
+    #Sets the generation dispatch tables, tables are shared with other facilities that have the same generation modules
+    def update_gen_dispatch(self):
+        use_cache = (self.num_gen > 0) and (self.fac_prefs.gen_dispatch_mode in ['Simple Greedy', 'Advanced Greedy', 'Dynamic Programming'])
+        if use_cache:
+            key = self.get_gen_dispatch_key()
+            cached = gen_dispatch_cache.get(key)
+            if cached is not None:
+                self.gen_dispatch_dict, self.gen_qe_dict, self.gen_dispatch_tables = cached
+                return
+        
+        self.gen_dispatch_dict, self.gen_qe_dict = None, None
         if self.fac_prefs.gen_dispatch_mode == 'Simple Greedy':
             self.gen_dispatch_dict, self.gen_qe_dict = self.get_simple_greedy_gen_dispatch()
         elif self.fac_prefs.gen_dispatch_mode == 'Advanced Greedy':
             self.gen_dispatch_dict = self.get_adv_greedy_gen_dispatch()
+        self.gen_dispatch_tables = DispatchTables() #Dispatch tables for each combination of generation modules that are on, created when first used
+        if use_cache:
+            gen_dispatch_cache.put(key, (self.gen_dispatch_dict, self.gen_qe_dict, self.gen_dispatch_tables))
+    #Returns a key with the attributes that affect the generation dispatch tables, in rule curve order
+    def get_gen_dispatch_key(self):
+        gen_keys = []
+        for j in range(0, self.num_gen):
+            mod = self.gen_mods[j]
+            gen_keys.append((mod.design_flow, self.min_gen_flows[j], self.max_gen_flows[j], self.peak_gen_flows[j], mod.peak_eff, mod.flow_eff_eq.get_signature()))
+        return (self.fac_prefs.gen_dispatch_mode, self.fac_prefs.allow_overrun, self.all_gen_mods_same, tuple(gen_keys))
     #Set the module count 
     def set_mod_count(self, mod, count):
         if mod.name in self.pass_dict.keys(): #module already in facility
@@ -3486,9 +4660,66 @@ class Facility:
         for key in self.pass_dict.keys():
             out_dict[key + ' Count'] = self.pass_dict[key]
         return out_dict
-    #Add a simulation result to the saved list
+    #Returns a hashable key of the facility design, facilities with the same key have the same simulation results within a project
+    def get_design_key(self):
+        pass_keys = tuple([(self.get_object_signature(mod), self.pass_dict[mod.name]) for mod in self.pass_mods if mod.name in self.pass_dict])
+        return (pass_keys, self.get_object_signature(self.spill_mod), self.num_spill, self.get_object_signature(self.non_mod), self.get_object_signature(self.fou_mod), \
+                self.get_object_signature(self.flush_mod), tuple([self.get_object_signature(screen) for screen in self.screens]))
+    #Returns a hashable signature of the attributes of a module, screen, or equation
+    def get_object_signature(self, obj):
+        if isinstance(obj, (Equation, PiecewiseEquation, FlowData)):
+            return obj.get_signature()
+        elif isinstance(obj, (list, tuple)):
+            return tuple([self.get_object_signature(i) for i in obj])
+        elif isinstance(obj, dict):
+            return tuple([(key, self.get_object_signature(val)) for key, val in obj.items()])
+        elif isinstance(obj, (Module, Screen, Site, Cost_tables, Facility_preferences, Species)):
+            return (type(obj).__name__,) + tuple([(key, self.get_object_signature(val)) for key, val in vars(obj).items() if key not in ['labels', 'units', 'data_list']])
+        elif isinstance(obj, (np.ndarray, pd.DataFrame, pd.Series)):
+            return (np.shape(obj), tuple(np.asarray(obj).ravel().tolist()))
+        else: #Numbers, text, and None, other objects are only matched to themselves
+            return obj
+    #Returns a copy of the facility design without the simulation results, the project data and the modules are shared with this facility
+    #Modules named in copy_mod_names (or all modules if True) are copied so that they can be redesigned without changing this facility
+    def get_design_copy(self, name=None, copy_mod_names=[]):
+        fac = copy(self)
+        if name is not None:
+            fac.name = name
+        copy_mod = lambda mod: deepcopy(mod) if (mod is not None) and ((copy_mod_names is True) or (mod.name in copy_mod_names)) else mod
+        fac.pass_mods = [copy_mod(mod) for mod in self.pass_mods]
+        fac.spill_mod = copy_mod(self.spill_mod)
+        fac.flush_mod = copy_mod(self.flush_mod)
+        if copy_mod_names is True:
+            fac.non_mod = deepcopy(self.non_mod)
+            fac.fou_mod = deepcopy(self.fou_mod)
+        fac.pass_dict = self.pass_dict.copy()
+        fac.screens = [deepcopy(screen) for screen in self.screens] #Screens are designed for each facility
+        fac.results_list = []
+        fac.allo_cache = OrderedDict()
+        fac.update()
+        return fac
+    #Returns a shallow copy of the facility without the project data, simulation results, or cached tables so that it can be sent to a worker process
+    def get_transfer_copy(self):
+        fac = copy(self)
+        fac.site = None
+        fac.fac_prefs = None
+        fac.results_list = []
+        fac.allo_cache = OrderedDict()
+        fac.gen_dispatch_dict, fac.gen_qe_dict, fac.gen_dispatch_tables = None, None, DispatchTables()
+        return fac
+    #Sets the project data for a facility received from get_transfer_copy and rebuilds the dispatch tables
+    def attach_project(self, proj):
+        self.site = proj.site
+        self.fac_prefs = proj.fac_prefs
+        self.update_gen_dispatch()
+    #Add a simulation result to the saved list, the results older than the latest max_detail_results are compacted
     def add_simulation_results(self, sim_res):
         self.results_list.append(sim_res)
+        max_detail = getattr(self, 'max_detail_results', None)
+        if (max_detail is not None) and (len(self.results_list) > max(1, max_detail)):
+            old_res = self.results_list[-max(1, max_detail)-1]
+            if old_res is not False:
+                old_res.compact()
     #Returns the latest simulation results
     def get_latest_sim_results(self):
         if len(self.results_list) > 0:
@@ -3531,6 +4762,15 @@ class Facility:
             mod = self.spill_mod
             return ((flow/(self.total_spill_width*mod.weir_coeff))**(2/3)) + mod.crest_height
 
+    #Resets the allocation cache hit and miss counts, and removes the cached allocations if clear is True
+    def reset_allocation_cache(self, clear=True):
+        if clear:
+            self.allo_cache.clear()
+        self.allo_cache_hits = 0
+        self.allo_cache_misses = 0
+    #Checks if the headwater is constant, which is when there is a controlled spillway and no screens
+    def check_constant_head(self):
+        return (self.spill_mod.op_mode == 'Controlled Spillway') and (self.has_screens == False)
     #Checks if there is a flushing gate
     def get_sediment_characteristics(self):
         if self.flush_mod is None:
@@ -3749,7 +4989,7 @@ class Facility:
                     else:
                         return self.gen_dispatch_dict[int(avail_flow)]
                 else:
-                    res = self.get_simple_greedy_gen_allocation_partial(avail_flow, gen_mods_on)
+                    res = self.get_gen_table_allocation(avail_flow, gen_mods_on)
                     if res is False:
                         print('Error during simple greedy partial allocation')
                         return self.get_peak_ramping_allocation(avail_flow, gen_mods_on)
@@ -3762,12 +5002,19 @@ class Facility:
                     else:
                         return self.gen_dispatch_dict[int(avail_flow)]
                 else:
-                    res = self.get_adv_greedy_gen_dispatch_partial(avail_flow, gen_mods_on)
+                    res = self.get_gen_table_allocation(avail_flow, gen_mods_on)
                     if res is False:
                         print('Error during advanced greedy partial allocation')
                         return self.get_peak_ramping_allocation(avail_flow, gen_mods_on)
                     else:
                         return res
+            elif self.fac_prefs.gen_dispatch_mode == 'Dynamic Programming':
+                res = self.get_gen_table_allocation(avail_flow, gen_mods_on)
+                if res is False:
+                    print('Error during dynamic programming allocation')
+                    return self.get_peak_ramping_allocation(avail_flow, gen_mods_on, allow_overrun)
+                else:
+                    return res
             elif self.fac_prefs.gen_dispatch_mode == 'Design Ramping':
                 return self.get_design_allocation(avail_flow, gen_mods_on, allow_overrun)
             else: #By default will use the 'Peak Ramping' mode
@@ -3776,6 +5023,42 @@ class Facility:
             print('Error allocating gen flows - reporting zero generation')
             return [0 for j in range(0, self.num_gen)]
 
+    #Runs the generation module dispatch for an array of available flows and a matching array of gen_mods_on rows, returns allocations (gen modules x days)
+    def get_gen_allocations(self, avail_flows, gen_mods_on, allow_overrun):
+        gen_allos = np.zeros((self.num_gen, len(avail_flows)))
+        if len(avail_flows) == 0:
+            return gen_allos
+        valid = (avail_flows >= self.min_gen_flow) & gen_mods_on.any(axis=1) #If not enough flow to turn on a module, leave zero allocations
+        try:
+            if self.fac_prefs.gen_dispatch_mode == 'Design Ramping':
+                gen_allos[:,valid] = self.get_design_allocations(avail_flows[valid], gen_mods_on[valid], allow_overrun)
+                return gen_allos
+            elif self.fac_prefs.gen_dispatch_mode == 'Dynamic Programming': #Looks up the dispatch table rows for each combination of modules that are on
+                valid_idx = np.flatnonzero(valid)
+                masks, inverse = np.unique(gen_mods_on[valid], axis=0, return_inverse=True)
+                inverse = inverse.reshape(-1)
+                for k in range(0, len(masks)):
+                    idx = valid_idx[inverse == k]
+                    gen_dispatch_table = self.get_gen_dispatch_table(masks[k])
+                    if gen_dispatch_table is False:
+                        print('Error during dynamic programming allocation')
+                        gen_allos[:,idx] = self.get_peak_ramping_allocations(avail_flows[idx], gen_mods_on[idx], allow_overrun)
+                    else:
+                        gen_allos[:,idx] = gen_dispatch_table[np.minimum(avail_flows[idx].astype(int), len(gen_dispatch_table)-1)].T
+                return gen_allos
+            elif self.fac_prefs.gen_dispatch_mode not in ['Simple Greedy', 'Advanced Greedy']: #By default will use the 'Peak Ramping' mode
+                gen_allos[:,valid] = self.get_peak_ramping_allocations(avail_flows[valid], gen_mods_on[valid], allow_overrun)
+                return gen_allos
+        except:
+            print('Error allocating gen flows - reporting zero generation')
+            return np.zeros((self.num_gen, len(avail_flows)))
+        #The greedy models are run once for each unique available flow and module combination
+        keys, inverse = np.unique(np.column_stack((avail_flows, gen_mods_on)), axis=0, return_inverse=True)
+        inverse = inverse.reshape(-1)
+        for k in range(0, len(keys)):
+            gen_allos[:,inverse == k] = np.array(self.get_gen_allocation(int(keys[k,0]), [bool(b) for b in keys[k,1:]], allow_overrun), dtype=float).reshape(-1,1)
+        return gen_allos
+    
     #Design ramping model - ramps generation modules to the design flow one at a time
     def get_design_allocation(self, avail_flow, gen_mods_on, allow_overrun):
         gen_allos = [0 for i in range(0, self.num_gen)]
@@ -3832,23 +5115,85 @@ class Facility:
                         #avail_flow = 0 
                         break
         return gen_allos
+    #Array version of get_design_allocation, ramps the generation modules for many days at once
+    def get_design_allocations(self, avail_flows, gen_mods_on, allow_overrun):
+        avail_flows = avail_flows.astype(float)
+        gen_allos = np.zeros((self.num_gen, len(avail_flows)))
+        ramping = np.ones(len(avail_flows), dtype=bool) #Days that have not run out of flow
+        for j in range(0, self.num_gen): #Ramp turbines to design flow
+            on = gen_mods_on[:,j] & ramping
+            full = on & (avail_flows >= self.des_gen_flows[j])
+            part = on & ~full & (avail_flows >= self.min_gen_flows[j])
+            avail_flows[full] -= self.des_gen_flows[j]
+            gen_allos[j,full] = self.des_gen_flows[j]
+            gen_allos[j,part] = avail_flows[part]
+            avail_flows[part] = 0
+            ramping &= ~part
+        if allow_overrun: #If flow left over, ramp to the max operating flow
+            ramping = avail_flows > 0
+            for j in range(0, self.num_gen):
+                on = ramping & (gen_allos[j] < self.max_gen_flows[j]) & gen_mods_on[:,j] & (gen_allos[j] > 0)
+                full = on & (avail_flows > self.max_gen_flows[j] - gen_allos[j])
+                part = on & ~full
+                avail_flows[full] -= self.max_gen_flows[j] - gen_allos[j,full]
+                gen_allos[j,full] = self.max_gen_flows[j]
+                gen_allos[j,part] = gen_allos[j,part] + avail_flows[part]
+                ramping &= ~part
+        return gen_allos
+    
+    #Array version of get_peak_ramping_allocation, ramps the generation modules for many days at once
+    def get_peak_ramping_allocations(self, avail_flows, gen_mods_on, allow_overrun):
+        avail_flows = avail_flows.astype(float)
+        gen_allos = np.zeros((self.num_gen, len(avail_flows)))
+        ramping = np.ones(len(avail_flows), dtype=bool)
+        for j in range(0, self.num_gen): #Ramp turbines to peak eff
+            on = gen_mods_on[:,j] & ramping
+            full = on & (avail_flows >= self.peak_gen_flows[j])
+            part = on & ~full & (avail_flows >= self.min_gen_flows[j])
+            gen_allos[j,full] = self.peak_gen_flows[j]
+            avail_flows[full] -= self.peak_gen_flows[j]
+            gen_allos[j,part] = avail_flows[part]
+            avail_flows[part] = 0
+            ramping &= ~part
+        ramping = avail_flows > 0 #If flow left over, ramp to design flows
+        for j in range(0, self.num_gen):
+            on = ramping & (gen_allos[j] < self.des_gen_flows[j]) & gen_mods_on[:,j] & (gen_allos[j] > 0)
+            full = on & (avail_flows >= self.des_gen_flows[j] - gen_allos[j])
+            part = on & ~full
+            avail_flows[full] -= self.des_gen_flows[j] - gen_allos[j,full]
+            gen_allos[j,full] = self.des_gen_flows[j]
+            gen_allos[j,part] = gen_allos[j,part] + avail_flows[part]
+            avail_flows[part] = 0
+            ramping &= ~part
+        if allow_overrun: #If flow left over, ramp to the max operating flow
+            ramping = avail_flows > 0
+            for j in range(0, self.num_gen):
+                on = ramping & (gen_allos[j] < self.max_gen_flows[j]) & gen_mods_on[:,j] & (gen_allos[j] > 0)
+                full = on & (avail_flows >= self.max_gen_flows[j] - gen_allos[j])
+                part = on & ~full
+                avail_flows[full] -= self.max_gen_flows[j] - gen_allos[j,full]
+                gen_allos[j,full] = self.max_gen_flows[j]
+                gen_allos[j,part] = gen_allos[j,part] + avail_flows[part]
+                ramping &= ~part
+        return gen_allos
     #Simple greedy dispatch model - uses incremental greedy approach to select allocation with largest incremental increase in power output. Returns allocations for all possible inflows assuming all modules are on.
     def get_simple_greedy_gen_dispatch(self):
         try:
             gen_dispatch_dict = {}
             gen_qe_dict = {}
+            qe_grids = self.get_gen_qe_grids()
             cur_allos = [0.0 for i in range(0, self.num_gen)]
             cur_qe = [0.0 for i in range(0, self.num_gen)]
                     
             cum_q = self.min_gen_flow
             for i in range(self.min_gen_flow, self.max_gen_flow+1, 1): #For each possible flow
-                qe_inc = np.array([0.0 for i in range(0, self.num_gen)])
-                new_qes = np.array([np.nan for i in range(0, self.num_gen)])
+                qe_inc = [0.0 for i in range(0, self.num_gen)]
+                new_qes = [np.nan for i in range(0, self.num_gen)]
 
                 for j in range(0, self.num_gen): #Try allocating flow to each module
                     new_q = cur_allos[j] + cum_q
                     if (new_q <= self.max_gen_flows[j]) and (new_q >= self.min_gen_flows[j]): #If the added flow is within the min and max allowed flow range, then test allocating flow
-                        new_qe = self.gen_mods[j].get_eff(new_q) * new_q
+                        new_qe = qe_grids[j][int(new_q)]
                         new_qes[j] = new_qe
                         qe_inc[j] = new_qe - cur_qe[j] #Calculate the increment in qe by allocating to module j
 
@@ -3867,20 +5212,23 @@ class Facility:
         except:
             return False, False
         
-    #Simple greedy model that applies to partial flows when only a subset of the genration modules are on, returns allocation for one timestep
-    def get_simple_greedy_gen_allocation_partial(self, avail_flow, gen_mods_on):
+    #Simple greedy model that applies to partial flows when only a subset of the genration modules are on
+    #Returns an array of allocations (flow x generation module) for every available flow up to the max generation flow, since no flow can be added past that point
+    def get_simple_greedy_gen_dispatch_partial(self, gen_mods_on):
         try:
+            gen_dispatch_table = np.zeros((self.max_gen_flow+1, self.num_gen))
+            qe_grids = self.get_gen_qe_grids()
             cur_allos = [0 for i in range(0, self.num_gen)]
             cur_qe = [0 for i in range(0, self.num_gen)]
             cum_q = self.min_gen_flow
 
-            for i in range(self.min_gen_flow, int(avail_flow)+1, 1): #For each possible flow
-                qe_inc = np.array([0.0 for i in range(0, self.num_gen)])
-                new_qes = np.array([np.nan for i in range(0, self.num_gen)])
+            for i in range(self.min_gen_flow, self.max_gen_flow+1, 1): #For each possible flow
+                qe_inc = [0.0 for i in range(0, self.num_gen)]
+                new_qes = [np.nan for i in range(0, self.num_gen)]
                 for j in range(0, self.num_gen): #Try allocating flow to each module
                     new_q = cur_allos[j] + cum_q
                     if (new_q <= self.max_gen_flows[j]) and (new_q >= self.min_gen_flows[j]) and (gen_mods_on[j]): #If the added flow is within the flow range, then test allocating flow
-                        new_qe = self.gen_mods[j].get_eff(new_q) * new_q
+                        new_qe = qe_grids[j][int(new_q)]
                         new_qes[j] = new_qe
                         qe_inc[j] = new_qe - cur_qe[j] #Calculate the increment in qe
 
@@ -3891,21 +5239,112 @@ class Facility:
                     cur_allos[k] += cum_q
                     cur_qe[k] = new_qes[k]
                     cum_q = 1
+                gen_dispatch_table[i] = cur_allos
 
-            return cur_allos
+            return gen_dispatch_table
         except:
             return False
+    #Returns the dispatch table for a combination of generation modules that are on, the table is created the first time the combination is used
+    #The tables can be shared with other facilities and threads, so a new table is built while holding the tables lock and then added in one assignment
+    def get_gen_dispatch_table(self, gen_mods_on):
+        key = tuple(bool(m) for m in gen_mods_on)
+        if key not in self.gen_dispatch_tables:
+            with self.gen_dispatch_tables.lock:
+                if key not in self.gen_dispatch_tables: #Another thread may have added the table while this one was waiting for the lock
+                    if self.fac_prefs.gen_dispatch_mode == 'Simple Greedy':
+                        gen_dispatch_table = self.get_simple_greedy_gen_dispatch_partial(gen_mods_on)
+                    elif self.fac_prefs.gen_dispatch_mode == 'Dynamic Programming':
+                        gen_dispatch_table = self.get_dp_gen_dispatch(gen_mods_on)
+                    else: #Advanced greedy rows are calculated when first used, unfilled rows are nan
+                        #Past this flow all of the modules that are on reach the peak and minimum flow checks and can be ramped to the max flow, so the allocation does not change
+                        on_idx = [j for j in range(0, self.num_gen) if gen_mods_on[j]]
+                        max_table_flow = math.ceil(sum([self.peak_gen_flows[j] + self.min_gen_flows[j] for j in on_idx])) + sum([self.max_gen_flows[j] for j in on_idx])
+                        gen_dispatch_table = np.full((max_table_flow+1, self.num_gen), np.nan)
+                    self.gen_dispatch_tables[key] = gen_dispatch_table
+        return self.gen_dispatch_tables[key]
+    #Looks up the allocation for one timestep from the dispatch table for the generation modules that are on, available flows are in whole cfs
+    #Advanced greedy rows are calculated and written while holding the tables lock, the first column marks a calculated row so it is written last
+    #and a row is only read once it is complete
+    def get_gen_table_allocation(self, avail_flow, gen_mods_on):
+        gen_dispatch_table = self.get_gen_dispatch_table(gen_mods_on)
+        if gen_dispatch_table is False:
+            return False
+        row = min(int(avail_flow), len(gen_dispatch_table)-1)
+        if np.isnan(gen_dispatch_table[row, 0]): #Advanced greedy row that has not been calculated
+            with self.gen_dispatch_tables.lock:
+                if np.isnan(gen_dispatch_table[row, 0]): #Another thread may have calculated the row while this one was waiting for the lock
+                    res = self.get_adv_greedy_gen_dispatch_partial(row, gen_mods_on)
+                    if res is False:
+                        return False
+                    gen_dispatch_table[row, 1:] = res[1:]
+                    gen_dispatch_table[row, 0] = res[0]
+        return gen_dispatch_table[row].tolist()
+    #Dynamic programming model - finds the allocation across the generation modules that are on that maximizes the total q*eff for every whole cfs available flow
+    #Each module can be off or run between its minimum and maximum flow, returns an array of allocations (flow x generation module)
+    def get_dp_gen_dispatch(self, gen_mods_on):
+        try:
+            qe_grids = self.get_gen_qe_grids()
+            best_qe = np.zeros(self.max_gen_flow+1) #Best total qe using the modules added so far, for each available flow
+            best_choices = [] #Flow allocated to each module for the best total qe at each available flow
+            for j in range(0, self.num_gen):
+                choices = np.zeros(self.max_gen_flow+1, dtype=int)
+                if gen_mods_on[j]:
+                    new_best_qe = best_qe.copy() #Module j is off
+                    for q in range(self.min_gen_flows[j], min(self.max_gen_flows[j], self.max_gen_flow)+1): #Try running module j at each flow
+                        qe = qe_grids[j][q]
+                        if (q > 0) and (qe > 0):
+                            test_qe = best_qe[:len(best_qe)-q] + qe
+                            better = test_qe > new_best_qe[q:]
+                            new_best_qe[q:][better] = test_qe[better]
+                            choices[q:][better] = q
+                    best_qe = new_best_qe
+                best_choices.append(choices)
+            
+            #Work backwards through the modules to get the allocation for each available flow
+            gen_dispatch_table = np.zeros((self.max_gen_flow+1, self.num_gen))
+            rem_flows = np.arange(0, self.max_gen_flow+1)
+            for j in range(self.num_gen-1, -1, -1):
+                gen_dispatch_table[:,j] = best_choices[j][rem_flows]
+                rem_flows = rem_flows - best_choices[j][rem_flows]
+            return gen_dispatch_table
+        except:
+            return False
+    #Calculates q*eff for each generation module at every whole cfs flow from the minimum to the maximum flow, lower flows are nan
+    #Each efficiency curve is evaluated once, so the greedy models can look up the values instead of calling get_eff for every increment
+    def get_gen_qe_grids(self):
+        qe_grids = []
+        for j in range(0, self.num_gen):
+            top_flow = max(self.min_gen_flows[j], self.max_gen_flows[j])
+            qe_grid = [np.nan for q in range(0, top_flow+1)]
+            for q in range(self.min_gen_flows[j], top_flow+1):
+                qe_grid[q] = self.gen_mods[j].get_eff(q) * q
+            qe_grids.append(qe_grid)
+        return qe_grids
     #Uses a greedy algorithm to allocate a given flow to modules that are already on
-    def greedy_allocate(self, avail_flow, cur_allos): #Can only allocate flow to modules that are on
-        cur_qe = [0.0 if cur_allos[i] <= 0 else self.gen_mods[i].get_eff(cur_allos[i])*cur_allos[i] for i in range(0, len(cur_allos))]
+    #The available flow only sets the number of 1 cfs increments, so the increments from each starting allocation are calculated once and saved in greedy_paths
+    def greedy_allocate(self, avail_flow, cur_allos, qe_grids, greedy_paths): #Can only allocate flow to modules that are on
+        key = tuple(cur_allos)
+        if key not in greedy_paths:
+            greedy_paths[key] = self.get_greedy_path(cur_allos, qe_grids)
+        path = greedy_paths[key]
+        step = min(max(int(math.floor(avail_flow)), 0), len(path)-1)
+        return path[step][0], path[step][1].copy()
+    #Runs the greedy increments from a starting allocation, returns a list of the total qe and allocations after each increment
+    #Stops once none of the modules that are on can take more flow, since the later increments do not change the allocation
+    def get_greedy_path(self, cur_allos, qe_grids):
+        cur_allos = list(cur_allos)
+        cur_qe = [0.0 if cur_allos[i] <= 0 else qe_grids[i][int(cur_allos[i])] for i in range(0, len(cur_allos))]
+        path = [[sum(cur_qe), cur_allos.copy()]]
         cum_q = 1
-        for k in range(0, int(math.floor(avail_flow))): #Until we run out of flow
-            qe_inc = np.array([0.0 for n in range(0, self.num_gen)])
-            new_qes = np.array([np.nan for n in range(0, self.num_gen)])
+        for k in range(0, self.max_gen_flow): #The available flow is never more than the max generation flow
+            if all([(cur_allos[j] <= 0) or (cur_allos[j] + cum_q > self.max_gen_flows[j]) for j in range(0, self.num_gen)]):
+                break
+            qe_inc = [0.0 for n in range(0, self.num_gen)]
+            new_qes = [np.nan for n in range(0, self.num_gen)]
             for j in range(0, self.num_gen): #Try allocating flow to each module
                 new_q = cur_allos[j] + cum_q
                 if (new_q <= self.max_gen_flows[j]) and (new_q >= self.min_gen_flows[j]) and  cur_allos[j] > 0: #If the added flow is within the min and max allowed flow range, then test allocating flow
-                    new_qe = self.gen_mods[j].get_eff(new_q) * new_q
+                    new_qe = qe_grids[j][int(new_q)]
                     new_qes[j] = new_qe
                     qe_inc[j] = new_qe - cur_qe[j] #Calculate the increment in qe by allocating to module j
             if max(qe_inc) > 0: #If no module has an increase (can't ramp anything)
@@ -3915,11 +5354,14 @@ class Facility:
                 cum_q = 1
             else:
                 cum_q += 1
-        return sum(cur_qe), cur_allos
+            path.append([sum(cur_qe), cur_allos.copy()])
+        return path
     #Advanced greedy approach - uses a nested greedy algorithm to decide when to turn on a new turbine and how to allocate flow across turbines that are on. Returns allocation for all inflows, assuming all modules are on.
     def get_adv_greedy_gen_dispatch(self):
         try:
             gen_dispatch_dict = {}
+            qe_grids = self.get_gen_qe_grids()
+            greedy_paths = {}
             mods_on = [False for i in range(0, self.num_gen)]
             for i in range(self.min_gen_flow, self.max_gen_flow+1, 1): #For each possible flow
                 cur_allos = [0.0 if not(mods_on[j]) else self.min_gen_flows[j] for j in range(0, self.num_gen)]  
@@ -3931,11 +5373,11 @@ class Facility:
                     if (not mods_on[j]) and (avail_flow >= self.min_gen_flows[j]):
                         temp_allos = cur_allos.copy()
                         temp_allos[j] = self.min_gen_flows[j]
-                        cur_qe[j], mods_on_allos[j] = self.greedy_allocate(avail_flow - self.min_gen_flows[j], temp_allos)
+                        cur_qe[j], mods_on_allos[j] = self.greedy_allocate(avail_flow - self.min_gen_flows[j], temp_allos, qe_grids, greedy_paths)
                         if self.all_gen_mods_same:
                             break
                 #Try allocating flow across mods that are already on
-                qe_keep, allos_keep = self.greedy_allocate(avail_flow, cur_allos.copy())
+                qe_keep, allos_keep = self.greedy_allocate(avail_flow, cur_allos.copy(), qe_grids, greedy_paths)
                 
                 if qe_keep > max(cur_qe): #If it is best just to allocate to the current on modules
                     gen_dispatch_dict[i] = allos_keep.copy()
@@ -4063,7 +5505,7 @@ class Facility:
             if mod_order[i] == 'Non':
                 m = self.non_mod
                 for j in range(0, self.num_non):
-                    non_rec = Rectangle((x, y), m.width, -m.length, facecolor=sty.MODULE_COLORS[mod_order[i]], edgecolor='black')
+                    non_rec = patches.Rectangle((x, y), m.width, -m.length, facecolor=sty.MODULE_COLORS[mod_order[i]], edgecolor='black')
                     ax.add_patch(non_rec)
                     patch_list.append([m.name, non_rec])
                     x += m.width
@@ -4074,14 +5516,14 @@ class Facility:
                 m = self.spill_mod
                 for j in range(0, self.num_spill):
                     if m.diversion == True:
-                        spill_rec = Rectangle((right_div, y), m.width,-m.length, facecolor=sty.MODULE_COLORS[mod_order[i]], edgecolor='black',zorder=2)
+                        spill_rec = patches.Rectangle((right_div, y), m.width,-m.length, facecolor=sty.MODULE_COLORS[mod_order[i]], edgecolor='black',zorder=2)
                         ax.add_patch(spill_rec)
                         patch_list.append([m.name, spill_rec])
                         right_div += m.width
                         if j == 0:
                             recs.append([m.name,spill_rec])
                     else:
-                        spill_rec = Rectangle((x, y), m.width, -m.length, facecolor=sty.MODULE_COLORS[mod_order[i]], edgecolor='black',zorder=2)
+                        spill_rec = patches.Rectangle((x, y), m.width, -m.length, facecolor=sty.MODULE_COLORS[mod_order[i]], edgecolor='black',zorder=2)
                         ax.add_patch(spill_rec)
                         patch_list.append([m.name, spill_rec])
                         x += m.width
@@ -4091,7 +5533,7 @@ class Facility:
                 for m in self.get_pass_class_list(mod_order[i]): 
                     for k in range(0, self.pass_dict[m.name]):
                         if m.diversion == True:
-                            rec_rec = Rectangle((right_div, y), m.width, m.length, facecolor=sty.MODULE_COLORS[mod_order[i]], edgecolor='black',zorder=2)
+                            rec_rec = patches.Rectangle((right_div, y), m.width, m.length, facecolor=sty.MODULE_COLORS[mod_order[i]], edgecolor='black',zorder=2)
                             rec_rec.xy = (x, y-(m.length/2))
                             ax.add_patch(rec_rec)
                             patch_list.append([m.name, rec_rec])
@@ -4099,7 +5541,7 @@ class Facility:
                             if k == 0:
                                 recs.append([m.name,rec_rec])
                         else:
-                            rec_rec = Rectangle((x, y), m.width, m.length, facecolor=sty.MODULE_COLORS[mod_order[i]], edgecolor='black',zorder=2)
+                            rec_rec = patches.Rectangle((x, y), m.width, m.length, facecolor=sty.MODULE_COLORS[mod_order[i]], edgecolor='black',zorder=2)
                             rec_rec.xy = (x, y-(m.length/2))
                             ax.add_patch(rec_rec)
                             patch_list.append([m.name, rec_rec])
@@ -4110,14 +5552,14 @@ class Facility:
                 for m in self.get_pass_class_list(mod_order[i]): 
                     for k in range(0, self.pass_dict[m.name]):
                         if m.diversion == True:
-                            fish_rec = Rectangle((right_div, y), m.width, m.length, facecolor=sty.MODULE_COLORS[mod_order[i]], edgecolor='black',zorder=2)
+                            fish_rec = patches.Rectangle((right_div, y), m.width, m.length, facecolor=sty.MODULE_COLORS[mod_order[i]], edgecolor='black',zorder=2)
                             ax.add_patch(fish_rec)
                             patch_list.append([m.name, fish_rec])
                             right_div += m.width
                             if k == 0:
                                 recs.append([m.name,fish_rec])
                         else:
-                            fish_rec = Rectangle((x, y), m.width, m.length, facecolor=sty.MODULE_COLORS[mod_order[i]], edgecolor='black',zorder=2)
+                            fish_rec = patches.Rectangle((x, y), m.width, m.length, facecolor=sty.MODULE_COLORS[mod_order[i]], edgecolor='black',zorder=2)
                             ax.add_patch(fish_rec)
                             patch_list.append([m.name, fish_rec])
                             x += m.width
@@ -4127,14 +5569,14 @@ class Facility:
                 for m in self.get_pass_class_list(mod_order[i]):
                     for k in range(0, self.pass_dict[m.name]):
                         if m.diversion == True:
-                            pass_rec = Rectangle((left_div - m.width, y), m.width, -m.length, facecolor=sty.MODULE_COLORS[mod_order[i]], edgecolor='black',zorder=2)
+                            pass_rec = patches.Rectangle((left_div - m.width, y), m.width, -m.length, facecolor=sty.MODULE_COLORS[mod_order[i]], edgecolor='black',zorder=2)
                             ax.add_patch(pass_rec)
                             patch_list.append([m.name, pass_rec])
                             left_div -= m.width
                             if k==0:
                                 recs.append([m.name,pass_rec])
                         else:
-                            pass_rec = Rectangle((x, y), m.width, -m.length, facecolor=sty.MODULE_COLORS[mod_order[i]], edgecolor='black',zorder=2)
+                            pass_rec = patches.Rectangle((x, y), m.width, -m.length, facecolor=sty.MODULE_COLORS[mod_order[i]], edgecolor='black',zorder=2)
                             ax.add_patch(pass_rec)
                             patch_list.append([m.name, pass_rec])
                             x += m.width
@@ -4148,24 +5590,24 @@ class Facility:
                 patch = patch_list[i][1]
                 if self.screens[j].check_covered(mod_name):
                     x,y = patch.get_xy()
-                    screen_patch = Rectangle((x,y+(2*(j+1))), patch.get_width(), 2, facecolor=sty.MODULE_COLORS['Screen'], edgecolor='black',zorder=3)
+                    screen_patch = patches.Rectangle((x,y+(2*(j+1))), patch.get_width(), 2, facecolor=sty.MODULE_COLORS['Screen'], edgecolor='black',zorder=3)
                     ax.add_patch(screen_patch)
                     if i == 0:
                         recs.append([self.screens[j].name, screen_patch])
                 
         
         #Left bank
-        left_bank_rec = Rectangle((left_div-x_offset,-y_offset-mdown), abs(left_div)+x_offset, (mup+mdown+(2*y_offset)), facecolor='tab:brown')
+        left_bank_rec = patches.Rectangle((left_div-x_offset,-y_offset-mdown), abs(left_div)+x_offset, (mup+mdown+(2*y_offset)), facecolor='tab:brown')
         ax.add_patch(left_bank_rec)
         #Right bank
-        right_bank_rec = Rectangle((self.total_width,-y_offset-mdown), right_div+x_offset, (mup+mdown+(2*y_offset)), facecolor='tab:brown')
+        right_bank_rec = patches.Rectangle((self.total_width,-y_offset-mdown), right_div+x_offset, (mup+mdown+(2*y_offset)), facecolor='tab:brown')
         ax.add_patch(right_bank_rec)
        
         recs.append(['Banks', left_bank_rec])
        
         #original bank line
         if self.total_width > self.site.stream_width:
-            orig_bank = Rectangle((self.site.stream_width,-y_offset-mdown), (x_offset+self.total_width-self.site.stream_width), (mup+mdown+(2*y_offset)), facecolor='brown', alpha=0.2)
+            orig_bank = patches.Rectangle((self.site.stream_width,-y_offset-mdown), (x_offset+self.total_width-self.site.stream_width), (mup+mdown+(2*y_offset)), facecolor='brown', alpha=0.2)
             ax.add_patch(orig_bank)
             recs.append(['Original Bank', orig_bank])
             
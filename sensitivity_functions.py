@@ -0,0 +1,352 @@
+# -*- coding: utf-8 -*-
+"""
+Functions to run sensitivity and Monte Carlo uncertainty analyses outside of the GUI. Each iteration is applied to an isolated copy of the project, so the user inputs are never modified.
+"""
+#%%## IMPORT PACKAGES
+import module_classes as mc
+import aux_functions as af
+import numpy as np
+import pandas as pd
+import concurrent.futures
+import math
+import os
+from copy import deepcopy
+stats = af.LazyModule('scipy.stats')
+
+#%%## Sensitivity functions
+#Returns the list of values for the sensitivity variable from a dict with the Min, Max, and Step
+def get_sensitivity_iterations(iterations):
+    iters = list(np.arange(iterations['Min'], iterations['Max'], iterations['Step']))
+    return np.append(iters, iterations['Max'])
+
+#Sets the sensitivity variable of the object to the given value
+def set_sensitivity_value(obj, variable_name, value, dict_key=None, unit_type=None):
+    if dict_key is not None:
+        getattr(obj, variable_name)[dict_key] = value
+    elif unit_type  == 'Discount Equation':
+        getattr(obj, variable_name).set_discount_factor(value)
+    else:
+        setattr(obj, variable_name, value)
+
+#Returns the results dict of an iteration from the enumeration results
+def get_sensitivity_results_dict(enum_res, objective, save_bools, variable_name, value):
+    if (enum_res is False) or (enum_res[1] is None): #If enumeration is unsuccessful, then output a placeholder results_dict
+        return {'Enumeration Objective': 'Unsucessful', variable_name: value}
+    best_sim_res = enum_res[1]
+    results_dict = best_sim_res.get_run_dict(*save_bools)
+    results_dict['Enumeration Objective'] = best_sim_res.obj_dict[objective]
+    results_dict[variable_name] = value
+    return results_dict
+
+#Sets the sensitivity value on the given project and returns the results dict from the enumeration
+#The object must be part of the project, so the project and object should be copied together, i.e. deepcopy((proj, obj, enum_params))
+def run_sensitivity_iteration(proj, obj, enum_params, variable_name, value, dict_key=None, unit_type=None, cancel_event=None):
+    set_sensitivity_value(obj, variable_name, value, dict_key, unit_type)
+    enum_res = proj.enumeration_optimization(*enum_params, cancel_event=cancel_event) #enum_res includes [best_fac, best_sim_res, results_df]
+    return get_sensitivity_results_dict(enum_res, enum_params[0], enum_params[2], variable_name, value)
+
+#Runs an enumeration for each sensitivity value and returns the results dataframe in sweep order
+#enum_params are the enumeration_optimization inputs [objective, enum_lists, save_bools, show_anim, executor]
+#The executor (Serial, Thread Pool, or Process Pool) runs the iterations, and the enumerations in a pool are run serially
+#The progress is sent to progress_callback after each sensitivity value, and setting cancel_event stops the analysis and returns the completed values
+def run_sensitivity_analysis(proj, obj, variable_name, iters, enum_params, dict_key=None, unit_type=None, executor='Serial', max_workers=None, \
+                             progress_callback=None, cancel_event=None):
+    enum_params = list(enum_params)
+    #Snapshot the project so the input objects are not changed, the object and the enumeration modules keep their links to the copied project
+    proj, obj, enum_params = deepcopy((proj, obj, enum_params))
+    results = mc.ResultsAccumulator()
+    progress = mc.RunProgress('Sensitivity Analysis', len(iters), enum_params[0], progress_callback, cancel_event)
+
+    #Economic parameters do not change the facility operation, so the designs are simulated once and only the economics are recalculated
+    if (dict_key is None) and (unit_type is None) and proj.is_economic_parameter(obj, variable_name):
+        econ_res = proj.enumeration_optimization(*enum_params, keep_results=True, progress_callback=progress_callback, cancel_event=cancel_event)
+        for i in iters:
+            if progress.is_cancelled(): #The enumeration may be incomplete, so none of the values are used
+                break
+            set_sensitivity_value(obj, variable_name, i)
+            enum_res = econ_res
+            if econ_res is not False:
+                enum_res = proj.update_economic_results(enum_params[0], econ_res[3])
+            results.add_run(variable_name + ' - ' + str(i), get_sensitivity_results_dict(enum_res, enum_params[0], enum_params[2], variable_name, i))
+            progress.update()
+        return results.get_df()
+
+    if executor == 'Thread Pool':
+        pool = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers)
+    elif executor == 'Process Pool':
+        pool = concurrent.futures.ProcessPoolExecutor(max_workers=max_workers)
+    else:
+        pool = None
+
+    iter_results = []
+    if pool is None:
+        for i in iters:
+            if progress.is_cancelled():
+                break
+            results_dict = run_sensitivity_iteration(*deepcopy((proj, obj, enum_params)), variable_name, i, dict_key, unit_type, cancel_event)
+            if progress.is_cancelled(): #The enumeration of this value may be incomplete
+                break
+            iter_results.append(results_dict)
+            progress.update()
+    else:
+        #Enumerations within a pool are run serially without the animation
+        enum_params[3] = False
+        enum_params[4] = 'Serial'
+        try:
+            futures = []
+            for i in iters:
+                if executor == 'Process Pool': #The arguments are pickled, so each process already has its own copy, the cancel event can not be sent to the process
+                    futures.append(pool.submit(run_sensitivity_iteration, proj, obj, enum_params, variable_name, i, dict_key, unit_type))
+                else:
+                    futures.append(pool.submit(run_sensitivity_iteration, *deepcopy((proj, obj, enum_params)), variable_name, i, dict_key, unit_type, cancel_event))
+            #Only the values that were complete before the analysis was cancelled are kept, in sweep order up to the first incomplete value
+            completed = set()
+            for future in concurrent.futures.as_completed(futures):
+                if progress.is_cancelled():
+                    for f in futures:
+                        f.cancel()
+                    break
+                completed.add(future)
+                progress.update()
+            for future in futures:
+                if future not in completed:
+                    break
+                iter_results.append(future.result())
+        finally:
+            pool.shutdown(cancel_futures=True)
+
+    for i, results_dict in zip(iters, iter_results):
+        results.add_run(variable_name + ' - ' + str(i), results_dict)
+    return results.get_df()
+
+#%%## Monte Carlo functions
+#An uncertain input that is sampled from a distribution during the Monte Carlo analysis
+class UncertainInput:
+    def __init__(self, obj, variable_name, distribution, params, dict_key=None, unit_type=None, name=None):
+        self.obj = obj #The object with the uncertain attribute, e.g. the cost table, a module, or a species
+        self.variable_name = variable_name #The attribute name
+        self.distribution = distribution #'Uniform' [low, high], 'Normal' [mean, std], 'Triangular' [low, mode, high], 'Lognormal' [mean, std] of the underlying normal
+        self.params = params #The distribution parameters
+        self.dict_key = dict_key #The key if the attribute is a dict, e.g. the species name for mort_rates
+        self.unit_type = unit_type #'Discount Equation' if sampling the discount factor of an equation
+        if name is None:
+            name = variable_name
+            if dict_key is not None:
+                name += ' - ' + str(dict_key)
+        self.name = name
+    
+    #Returns an array of sampled values
+    def sample(self, count, rng):
+        if self.distribution == 'Uniform':
+            return rng.uniform(self.params[0], self.params[1], count)
+        elif self.distribution == 'Normal':
+            return rng.normal(self.params[0], self.params[1], count)
+        elif self.distribution == 'Triangular':
+            return rng.triangular(self.params[0], self.params[1], self.params[2], count)
+        elif self.distribution == 'Lognormal':
+            return rng.lognormal(self.params[0], self.params[1], count)
+        else:
+            print('Unknown distribution: ', self.distribution)
+            return False
+    
+    #Sets the uncertain attribute to the given value
+    def set_value(self, value):
+        set_sensitivity_value(self.obj, self.variable_name, value, self.dict_key, self.unit_type)
+    
+    #Returns the level of the model that has to be recalculated when the input changes
+    #'Economic' only updates the economics, 'Fish' recalculates the results from the simulated flow allocations, and 'Operational' simulates the facility
+    def get_level(self, proj):
+        if (self.dict_key is None) and (self.unit_type is None) and proj.is_economic_parameter(self.obj, self.variable_name):
+            return 'Economic'
+        elif (type(self.obj) == mc.Species) or (self.variable_name in ['mort_rates', 'guide_effs', 'entr_effs', 'pass_effs']):
+            return 'Fish'
+        else:
+            return 'Operational'
+
+#Redesigns the dynamic modules of a facility with their current design values, so that changes to the module equations are included
+def redesign_facility_modules(proj, fac):
+    req_mods_dict = {'Non-overflow': fac.non_mod, 'Spill': fac.spill_mod, 'Flushing': fac.flush_mod}
+    proj.set_noniterable_parameters(req_mods_dict, fac.pass_mods)
+    for mod in fac.pass_mods:
+        if mod.is_dynamic() and (mod.module_class == 'Gen'):
+            mod.redesign(mod.design_flow, mod.design_head)
+    if fac.fou_mod.is_dynamic():
+        fac.fou_mod.redesign(fac.fou_mod.depth)
+    fac.update()
+
+#Evaluates the facility for each row of sampled input values and returns a list of the obj_dict results
+#The facility is only simulated when an operational value changes from the previous row, otherwise the simulated flow allocations are reused
+#The facility is updated before each simulation, so its allocation cache and dispatch tables use the sampled values
+def evaluate_monte_carlo_batch(proj, fac, inputs, samples):
+    if fac.site is None: #Facility from get_transfer_copy
+        fac.attach_project(proj)
+    levels = [inp.get_level(proj) for inp in inputs]
+    op_cols = [i for i in range(0, len(inputs)) if levels[i] == 'Operational']
+    fish_cols = [i for i in range(0, len(inputs)) if levels[i] == 'Fish']
+    redesign = any([inputs[i].unit_type == 'Discount Equation' for i in op_cols])
+    inflows = proj.site.daily_inflow.get_flow_subset(proj.fac_prefs.test_start, proj.fac_prefs.test_end)
+    op_outs = None
+    sim_res = None
+    op_values = None
+    fish_values = None
+    batch_results = []
+    for row in samples:
+        for i, inp in enumerate(inputs):
+            inp.set_value(row[i])
+        if (op_outs is None) or (op_values != [row[i] for i in op_cols]):
+            op_values = [row[i] for i in op_cols]
+            if redesign:
+                redesign_facility_modules(proj, fac)
+            else: #The allocation cache and the dispatch tables were created with the previous operational values
+                fac.update()
+            op_outs = proj.simulate_operation(fac, inflows['Discharge (cfs)'])
+            sim_res = None
+        if op_outs is False:
+            batch_results.append({})
+            continue
+        if (sim_res is None) or (fish_values != [row[i] for i in fish_cols]):
+            fish_values = [row[i] for i in fish_cols]
+            sim_res = mc.SimResults(proj, fac, inflows, *op_outs)
+        else: #Only economic inputs changed
+            sim_res.update_economics()
+        batch_results.append(dict(sim_res.obj_dict))
+    return batch_results
+
+#Evaluates the facility for each row of sampled input values on a copy of the project and returns a list of the obj_dict results in order
+#The rows are split into batches that are evaluated using the executor (Serial, Thread Pool, or Process Pool), batches are a multiple of group_size rows so grouped rows can share simulations
+def evaluate_samples(proj, fac, inputs, samples, executor='Serial', max_workers=None, batch_size=None, group_size=1):
+    #Snapshot the project so the input objects are not changed
+    proj, fac, inputs = deepcopy((proj, fac, inputs))
+    if executor == 'Thread Pool':
+        pool = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers)
+    elif executor == 'Process Pool':
+        pool = concurrent.futures.ProcessPoolExecutor(max_workers=max_workers)
+    else:
+        pool = None
+    
+    if pool is None:
+        return evaluate_monte_carlo_batch(proj, fac, inputs, samples)
+    if batch_size is None: #Use several batches per worker so that the workers stay busy
+        worker_count = max_workers if max_workers is not None else os.cpu_count()
+        batch_size = max(1, math.ceil(len(samples) / (4 * worker_count)))
+    batch_size = math.ceil(batch_size / group_size) * group_size
+    try:
+        futures = []
+        for start in range(0, len(samples), batch_size):
+            if executor == 'Process Pool':
+                futures.append(pool.submit(evaluate_monte_carlo_batch, proj, fac.get_transfer_copy(), inputs, samples[start:start+batch_size]))
+            else:
+                futures.append(pool.submit(evaluate_monte_carlo_batch, *deepcopy((proj, fac, inputs)), samples[start:start+batch_size]))
+        return [res for future in futures for res in future.result()]
+    finally:
+        pool.shutdown()
+
+#Samples the uncertain inputs and evaluates a facility for each sample, returning a dataframe with the sampled values and the obj_dict metrics of each sample
+#The samples are split into batches that are evaluated using the executor (Serial, Thread Pool, or Process Pool)
+def run_monte_carlo(proj, fac, inputs, sample_count, seed=None, executor='Serial', max_workers=None, batch_size=None):
+    rng = np.random.default_rng(seed)
+    samples = []
+    for inp in inputs:
+        values = inp.sample(sample_count, rng)
+        if values is False:
+            return False
+        samples.append(values)
+    samples = np.column_stack(samples)
+    sample_results = evaluate_samples(proj, fac, inputs, samples, executor, max_workers, batch_size)
+    
+    results_df = pd.DataFrame(samples, columns=[inp.name for inp in inputs])
+    metrics_df = pd.DataFrame(sample_results)
+    return pd.concat([results_df, metrics_df], axis=1)
+
+#Returns a table of the mean, standard deviation, and percentiles of the metrics from run_monte_carlo
+def get_monte_carlo_summary(mc_df, metrics=None, percentiles=[0.05, 0.25, 0.5, 0.75, 0.95]):
+    if metrics is None:
+        metrics = list(mc_df.columns)
+    metrics_df = mc_df[metrics].apply(pd.to_numeric, errors='coerce')
+    return metrics_df.describe(percentiles=percentiles).transpose()
+
+#%%## Sobol functions
+#Returns the Saltelli sample matrix for the base sample matrices A and B (N x d)
+#The rows are ordered in groups of d+2 for each base sample: A, AB_1, ..., AB_d, B, where AB_i is A with column i from B
+def get_saltelli_samples(A, B):
+    N, d = A.shape
+    samples = np.empty((N, d+2, d))
+    samples[:, 0, :] = A
+    for i in range(0, d):
+        samples[:, i+1, :] = A
+        samples[:, i+1, i] = B[:, i]
+    samples[:, d+1, :] = B
+    return samples.reshape(N*(d+2), d)
+
+#Returns the first-order (Saltelli 2010) and total (Jansen) indices from the model outputs in the Saltelli sample order
+def calc_sobol_indices(Y, d):
+    Y = np.asarray(Y, dtype=float).reshape(-1, d+2)
+    Y = Y - np.mean(Y[:, [0, d+1]]) #Centering the outputs reduces the error of the first-order estimate for metrics with a large mean, e.g. NPV
+    fA = Y[:, 0]
+    fB = Y[:, d+1]
+    var_y = np.var(np.concatenate([fA, fB]))
+    if (var_y <= 0) or np.isnan(var_y):
+        return np.full(d, np.nan), np.full(d, np.nan)
+    S1 = np.array([np.mean(fB*(Y[:, i+1] - fA)) for i in range(0, d)]) / var_y
+    ST = np.array([0.5*np.mean((fA - Y[:, i+1])**2) for i in range(0, d)]) / var_y
+    return S1, ST
+
+#Returns the half-width of the bootstrap confidence intervals of the first-order and total indices
+def calc_sobol_confidence(Y, d, rng, resamples=100, conf_level=0.95):
+    Y = np.asarray(Y, dtype=float).reshape(-1, d+2)
+    N = len(Y)
+    S1_list = []
+    ST_list = []
+    for r in range(0, resamples):
+        S1, ST = calc_sobol_indices(Y[rng.integers(0, N, N)], d)
+        S1_list.append(S1)
+        ST_list.append(ST)
+    z = stats.norm.ppf(0.5 + conf_level/2)
+    return z*np.std(S1_list, axis=0), z*np.std(ST_list, axis=0)
+
+#Runs a Sobol sensitivity analysis of a fixed facility and returns [sobol_df, converged, base_samples]
+#sobol_df has the first-order (S1) and total (ST) indices with their confidence intervals for each metric and input
+#Starting with base_samples, the samples are doubled until the largest confidence interval is below conf_tol or max_base_samples is reached
+#Each base sample needs len(inputs)+2 evaluations, which share the simulated flow allocations when the changed input is economic
+def run_sobol_analysis(proj, fac, inputs, base_samples=256, metrics=None, seed=None, conf_tol=0.05, max_base_samples=None, \
+                       executor='Serial', max_workers=None, batch_size=None):
+    if max_base_samples is None:
+        max_base_samples = base_samples
+    rng = np.random.default_rng(seed)
+    d = len(inputs)
+    sample_results = []
+    N = 0
+    new_N = base_samples
+    while True:
+        #Sample the new base rows of A and B, then evaluate their Saltelli rows
+        A = []
+        B = []
+        for inp in inputs:
+            values = inp.sample(2*new_N, rng)
+            if values is False:
+                return False
+            A.append(values[:new_N])
+            B.append(values[new_N:])
+        samples = get_saltelli_samples(np.column_stack(A), np.column_stack(B))
+        sample_results += evaluate_samples(proj, fac, inputs, samples, executor, max_workers, batch_size, group_size=d+2)
+        N += new_N
+        
+        #Calculate the indices for each metric and check the convergence
+        results_df = pd.DataFrame(sample_results).apply(pd.to_numeric, errors='coerce')
+        if metrics is None:
+            metrics = list(results_df.columns)
+        rows = []
+        max_conf = 0
+        for metric in metrics:
+            Y = results_df[metric].values
+            S1, ST = calc_sobol_indices(Y, d)
+            S1_conf, ST_conf = calc_sobol_confidence(Y, d, rng)
+            for i, inp in enumerate(inputs):
+                rows.append([metric, inp.name, S1[i], S1_conf[i], ST[i], ST_conf[i]])
+            max_conf = np.nanmax([max_conf, np.nanmax(S1_conf, initial=0), np.nanmax(ST_conf, initial=0)])
+        converged = max_conf <= conf_tol
+        if converged or (2*N > max_base_samples):
+            break
+        new_N = N
+    sobol_df = pd.DataFrame(rows, columns=['Metric', 'Input', 'S1', 'S1 Confidence', 'ST', 'ST Confidence'])
+    return [sobol_df, converged, N]
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+"""
+Shared fixtures for the waterSHED tests. The projects are imported once from the case study workbooks and copied for each test, so tests can change their inputs.
+"""
+import os
+import sys
+from copy import deepcopy
+import matplotlib
+matplotlib.use('Agg') #The tests run without a display
+import pytest
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+import module_classes as mc
+from waterSHED_batch import get_workbook_project
+
+CASE_STUDIES = ['Deerfield', 'Housatonic', 'Schuylkill']
+_projects = {}
+
+#Returns a copy of the case study project, the workbook is only imported the first time
+def load_project(case_name):
+    if case_name not in _projects:
+        path_name = os.path.join(REPO_DIR, 'Workbooks', 'waterSHED_Workbook_{}.xlsx'.format(case_name))
+        proj = get_workbook_project(path_name, case_name)
+        assert not isinstance(proj, str), proj
+        _projects[case_name] = proj
+    return deepcopy(_projects[case_name])
+
+#Returns a facility with every passage module of the library, generation modules are repeated gen_count times
+def get_test_facility(proj, gen_count=2, spill_count=2, screens=[]):
+    lib = proj.mod_lib
+    pass_mods = [mod for mod in lib.pass_mods_list if mod.module_class != 'Spill']
+    counts = [gen_count if mod.module_class == 'Gen' else 1 for mod in pass_mods]
+    return mc.Facility('Test', proj, pass_mods, counts, lib.all_mods_dict['Spill'][0], spill_count, lib.all_mods_dict['Non'][0], lib.all_mods_dict['Fou'][0], None, screens=screens)
+
+#Returns the enumeration inputs of a grid of generator design flows and module counts
+def get_enum_lists(proj, design_flows=[200, 400, 600], gen_counts=[1, 2]):
+    get_mod = lambda mod_class: proj.mod_lib.all_mods_dict[mod_class][0]
+    req_mods_dict = {'Non-overflow': get_mod('Non'), 'Foundation': get_mod('Fou'), 'Flushing': None, 'Spill': get_mod('Spill')}
+    pass_mods_list = [get_mod('Gen'), get_mod('Sed'), get_mod('Fish'), get_mod('Rec')]
+    const_list = [[mod.name, 'Module Count', 1] for mod in pass_mods_list[1:]]
+    enum_list = [[get_mod('Gen').name, 'Design Flow', design_flows], [get_mod('Gen').name, 'Module Count', gen_counts]]
+    return [req_mods_dict, pass_mods_list, const_list, enum_list, {}]
+
+#Returns a trash rack screen in front of the given modules
+def get_test_screen(mod_names):
+    def get_eq(name, form, coeffs, dynamic_type):
+        return mc.Equation(name, form, coeffs, 'x', 'y', dynamic_type=dynamic_type)
+    return mc.Screen('Rack', get_eq('Cost', 'Constant', [1000], 'Constant'), get_eq('Op Cost', 'Constant', [10], 'Constant'), \
+                     get_eq('Head Loss', 'Linear', [0.0005, 0.05], 'Function of Op. Flow'), get_eq('Width', 'Constant', [40], 'Constant'), \
+                     get_eq('Height', 'Constant', [12], 'Constant'), mod_names)
+
+@pytest.fixture
+def deerfield():
+    return load_project('Deerfield')
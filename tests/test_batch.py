@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the workbook preferences and the preference overrides of the headless batch runner.
+"""
+import os
+import pandas as pd
+import waterSHED_batch as wb
+from conftest import REPO_DIR
+
+DEERFIELD_PATH = os.path.join(REPO_DIR, 'Workbooks', 'waterSHED_Workbook_Deerfield.xlsx')
+SIMULATE_JOB = {'type': 'simulate', 'modules': {'Kaplan': 2, 'Obermeyer Spillway': 2}, 'non_overflow': 'Precast Concrete', 'foundation': 'Precast Foundation'}
+
+def test_workbook_default_engine(deerfield):
+    assert deerfield.fac_prefs.sim_engine == 'Daily Loop'
+
+def test_workbook_engine_row(tmp_path):
+    #The sheets are copied as values with the Simulation Engine row added to the preferences
+    sheets = pd.read_excel(DEERFIELD_PATH, sheet_name=None, header=None)
+    prefs_df = sheets['Preferences']
+    prefs_df.loc[len(prefs_df), [0, 1]] = ['Simulation Engine', 'Vectorized']
+    path_name = str(tmp_path / 'engine.xlsx')
+    with pd.ExcelWriter(path_name) as writer:
+        for sheet_name, df in sheets.items():
+            df.to_excel(writer, sheet_name=sheet_name, header=False, index=False)
+    proj = wb.get_workbook_project(path_name, 'Deerfield')
+    assert proj.fac_prefs.sim_engine == 'Vectorized'
+    assert proj.fac_prefs.get_df().loc['Simulation Engine', 'Value'] == 'Vectorized'
+
+def test_preference_overrides(deerfield):
+    assert wb.set_preference_overrides(deerfield, {'sim_engine': 'Vectorized', 'gen_dispatch_mode': 'Simple Greedy'})
+    assert (deerfield.fac_prefs.sim_engine, deerfield.fac_prefs.gen_dispatch_mode) == ('Vectorized', 'Simple Greedy')
+    assert not wb.set_preference_overrides(deerfield, {'sim_engine': 'Fast'})
+    assert deerfield.fac_prefs.sim_engine == 'Vectorized'
+
+def test_batch_engine_overrides(tmp_path, monkeypatch):
+    #Records the preferences used for each simulation
+    used_prefs = []
+    simulate_operation = wb.mc.SMH_project.simulate_operation
+    def record_simulate_operation(proj, fac, flows):
+        used_prefs.append((proj.fac_prefs.sim_engine, proj.fac_prefs.gen_dispatch_mode))
+        return simulate_operation(proj, fac, flows)
+    monkeypatch.setattr(wb.mc.SMH_project, 'simulate_operation', record_simulate_operation)
+    
+    jobs = [dict(SIMULATE_JOB, name='Loop', sim_engine='Daily Loop'), dict(SIMULATE_JOB, name='Spec'), dict(SIMULATE_JOB, name='Bad', sim_engine='Fast')]
+    wb.run_batch([{'path': DEERFIELD_PATH, 'case_study': 'Deerfield'}], jobs, str(tmp_path), {'sim_engine': 'Vectorized', 'gen_dispatch_mode': 'Simple Greedy'})
+    assert used_prefs == [('Daily Loop', 'Simple Greedy'), ('Vectorized', 'Simple Greedy')]
+    out_folder = tmp_path / 'waterSHED_Workbook_Deerfield'
+    loop_df = pd.read_csv(out_folder / 'Loop_Allocations.csv')
+    vec_df = pd.read_csv(out_folder / 'Spec_Allocations.csv')
+    assert loop_df.equals(vec_df)
+    assert not (out_folder / 'Bad_Results.csv').exists()
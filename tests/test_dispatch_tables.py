@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the generation dispatch tables that are shared between facilities and threads through the dispatch table cache.
+"""
+import concurrent.futures
+import pickle
+import random
+import sys
+from copy import deepcopy
+import numpy as np
+import pytest
+import module_classes as mc
+from conftest import load_project, get_test_facility
+
+#Returns the facility and the combinations of generation modules that are on
+def get_dispatch_case(gen_dispatch_mode):
+    proj = load_project('Deerfield')
+    proj.fac_prefs.gen_dispatch_mode = gen_dispatch_mode
+    mc.gen_dispatch_cache.clear()
+    fac = get_test_facility(proj, gen_count=3)
+    masks = [[True, True, True], [True, False, True], [False, True, False]]
+    return proj, fac, masks
+
+@pytest.mark.parametrize('gen_dispatch_mode', ['Advanced Greedy', 'Simple Greedy', 'Dynamic Programming'])
+def test_shared_tables_with_threads(gen_dispatch_mode):
+    proj, fac, masks = get_dispatch_case(gen_dispatch_mode)
+    #Reference allocations from a facility with its own tables
+    ref_fac = deepcopy(fac)
+    ref_fac.gen_dispatch_tables = mc.DispatchTables()
+    cases = [(flow, tuple(mask)) for mask in masks for flow in range(0, fac.max_gen_flow+1, 7)]
+    ref_allos = {case: ref_fac.get_gen_table_allocation(*case) for case in cases}
+    
+    #Facilities with the same generation modules share the cached tables
+    facs = [get_test_facility(proj, gen_count=3) for i in range(0, 4)]
+    assert all([f.gen_dispatch_tables is facs[0].gen_dispatch_tables for f in facs])
+    def get_allocations(i):
+        order = cases.copy()
+        random.Random(i).shuffle(order)
+        return {case: facs[i % len(facs)].get_gen_table_allocation(*case) for case in order}
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6) #Switches threads often so that the threads fill the same tables at the same time
+    try:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=8) as pool:
+            thread_allos = list(pool.map(get_allocations, range(0, 8)))
+    finally:
+        sys.setswitchinterval(switch_interval)
+    for allos in thread_allos:
+        assert allos == ref_allos
+    assert set(facs[0].gen_dispatch_tables.keys()) == set([tuple(mask) for mask in masks])
+
+def test_copied_tables_have_own_lock():
+    proj, fac, masks = get_dispatch_case('Advanced Greedy')
+    fac.get_gen_table_allocation(500, masks[0])
+    for tables in [deepcopy(fac).gen_dispatch_tables, pickle.loads(pickle.dumps(fac.gen_dispatch_tables))]:
+        assert isinstance(tables, mc.DispatchTables)
+        assert tables is not fac.gen_dispatch_tables
+        assert tables.lock is not fac.gen_dispatch_tables.lock
+        np.testing.assert_array_equal(tables[tuple(masks[0])], fac.gen_dispatch_tables[tuple(masks[0])])
+    assert isinstance(fac.get_transfer_copy().gen_dispatch_tables, mc.DispatchTables)
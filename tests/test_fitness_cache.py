@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the fitness cache of evaluated facility designs.
+"""
+from conftest import get_test_facility
+
+#Returns the objective metrics of a facility evaluated without the fitness cache
+def evaluate_uncached(proj):
+    size = proj.fitness_cache.size
+    proj.fitness_cache.size = 0
+    obj_dict = dict(proj.evaluate(get_test_facility(proj)).obj_dict)
+    proj.fitness_cache.size = size
+    return obj_dict
+
+def test_repeated_design_uses_cache(deerfield):
+    first = deerfield.evaluate(get_test_facility(deerfield))
+    second = deerfield.evaluate(get_test_facility(deerfield))
+    assert deerfield.fitness_cache.hits == 1
+    assert second is not first
+    assert second.NPV == first.NPV
+
+def test_cost_change_is_not_cached(deerfield):
+    deerfield.evaluate(get_test_facility(deerfield))
+    deerfield.costs.energy += 10
+    sim_res = deerfield.evaluate(get_test_facility(deerfield))
+    assert deerfield.fitness_cache.hits == 0
+    assert dict(sim_res.obj_dict) == evaluate_uncached(deerfield)
+
+def test_site_and_preference_changes_are_not_cached(deerfield):
+    deerfield.evaluate(get_test_facility(deerfield))
+    deerfield.site.daily_inflow.df.iloc[0:100, 0] *= 2
+    deerfield.fac_prefs.nol -= 1
+    sim_res = deerfield.evaluate(get_test_facility(deerfield))
+    assert deerfield.fitness_cache.hits == 0
+    assert dict(sim_res.obj_dict) == evaluate_uncached(deerfield)
@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the run progress and the objective directions used by the enumeration, the genetic algorithm, and the progress window.
+"""
+import module_classes as mc
+import waterSHED_styles as styles
+from conftest import get_enum_lists
+
+def test_minimized_objectives_are_metrics():
+    assert set(mc.MINIMIZED_OBJECTIVES) <= set(mc.SimResults.obj_metrics)
+    assert not mc.is_maximized_objective('Unit cost ($/kW)')
+    assert mc.is_maximized_objective('NPV ($)')
+
+def test_progress_skips_non_numeric_objectives():
+    progress_list = []
+    progress = mc.RunProgress('Enumeration', 4, 'Unit cost ($/kW)', progress_list.append)
+    progress.update(1, 500.0, 'A')
+    progress.update(1, 'N/A', 'B')
+    progress.update(1, 300.0, 'C')
+    progress.update(1, 400.0, 'D')
+    assert (progress.best_obj, progress.best_fac) == (300.0, 'C')
+    assert [styles.format_value(p['Best Objective'], 'round-2') for p in progress_list] == ['500.0', '500.0', '300.0', '300.0']
+    assert styles.format_value('N/A', 'round-2') == 'N/A'
+
+def test_unit_cost_enumeration(deerfield):
+    #Facilities without generation modules have an 'N/A' unit cost
+    progress_list = []
+    enum_res = deerfield.enumeration_optimization('Unit cost ($/kW)', get_enum_lists(deerfield, gen_counts=[0, 1, 2]), [True, False, False, False, False, False], \
+                                                  keep_results=True, progress_callback=progress_list.append)
+    unit_costs = [sim_res.cost_per_kw for sim_res in enum_res[3]]
+    assert 'N/A' in unit_costs
+    assert enum_res[1].cost_per_kw == min([cost for cost in unit_costs if cost != 'N/A'])
+    assert progress_list[-1]['Best Objective'] == enum_res[1].cost_per_kw
+    best_fac, best_sim_res = deerfield.update_economic_results('Unit cost ($/kW)', enum_res[3])
+    assert best_sim_res.cost_per_kw == enum_res[1].cost_per_kw
@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the Monte Carlo and Sobol sensitivity functions. The batch evaluation reuses simulations between samples, so its results are compared with evaluating each sample from scratch.
+"""
+from copy import deepcopy
+import numpy as np
+import pytest
+import sensitivity_functions as sf
+from conftest import get_test_facility, get_enum_lists
+
+#Returns the project, facility, and uncertain inputs of a module attribute that changes the facility operation
+def get_operational_case(proj, mod_name, variable_name, spill_mode='Controlled Spillway'):
+    spill_mod = proj.mod_lib.all_mods_dict['Spill'][0]
+    if spill_mode != 'Controlled Spillway':
+        spill_mod.op_mode = spill_mode
+        spill_mod.weir_coeff = 3.1
+        spill_mod.crest_height = proj.fac_prefs.nol
+    fac = get_test_facility(proj)
+    mod = [mod for mod in fac.pass_mods if mod.name == mod_name][0]
+    inputs = [sf.UncertainInput(mod, variable_name, 'Uniform', [0, 1])]
+    return proj, fac, inputs
+
+#Returns the run dict of the results without the computation time
+def get_run_dict(sim_res, save_bools):
+    run_dict = sim_res.get_run_dict(*save_bools)
+    run_dict.pop('Computation Time (sec)', None)
+    return run_dict
+
+#Returns the obj_dict results of each sample evaluated on a new copy of the project without any cached allocations or results
+def evaluate_fresh(proj, fac, inputs, samples):
+    results = []
+    for row in samples:
+        row_proj, row_fac, row_inputs = deepcopy((proj, fac, inputs))
+        for i, inp in enumerate(row_inputs):
+            inp.set_value(row[i])
+        row_proj.fitness_cache.size = 0
+        row_fac.allo_cache_size = 0
+        row_fac.update()
+        results.append(dict(row_proj.evaluate(row_fac).obj_dict))
+    return results
+
+#Checks that the batch results equal the results of evaluating each sample from scratch
+def check_batch(proj, fac, inputs, samples, **kwargs):
+    batch_results = sf.evaluate_samples(proj, fac, inputs, samples, **kwargs)
+    fresh_results = evaluate_fresh(proj, fac, inputs, samples)
+    assert len(batch_results) == len(fresh_results)
+    for batch_res, fresh_res in zip(batch_results, fresh_results):
+        assert batch_res == fresh_res
+    return batch_results
+
+def test_batch_fishway_design_flow(deerfield):
+    proj, fac, inputs = get_operational_case(deerfield, 'Vertical Slot Fishway', 'design_flow', 'Uncontrolled Spillway')
+    results = check_batch(proj, fac, inputs, [[60], [350], [60]])
+    assert results[0]['Annual Energy (MWh)'] != results[1]['Annual Energy (MWh)']
+
+def test_batch_generator_design_flow(deerfield):
+    proj, fac, inputs = get_operational_case(deerfield, 'Kaplan', 'design_flow')
+    check_batch(proj, fac, inputs, [[200], [500], [500], [200]])
+
+@pytest.mark.parametrize('executor', ['Thread Pool', 'Process Pool'])
+def test_batch_executors(deerfield, executor):
+    proj, fac, inputs = get_operational_case(deerfield, 'Vertical Slot Fishway', 'design_flow', 'Uncontrolled Spillway')
+    check_batch(proj, fac, inputs, [[60], [350], [200], [60]], executor=executor, max_workers=2, batch_size=2)
+
+def test_sobol_matches_uncached_run(deerfield):
+    proj, fac, inputs = get_operational_case(deerfield, 'Vertical Slot Fishway', 'design_flow', 'Uncontrolled Spillway')
+    inputs[0].params = [60, 350]
+    inputs.append(sf.UncertainInput(proj.costs, 'energy', 'Uniform', [30, 90]))
+    metrics = ['Annual Energy (MWh)', 'NPV ($)']
+    sobol_df = sf.run_sobol_analysis(proj, fac, inputs, base_samples=8, metrics=metrics, seed=1)[0]
+    uncached_proj, uncached_fac, uncached_inputs = deepcopy((proj, fac, inputs)) #Copied together so the inputs change the copied objects
+    uncached_fac.allo_cache_size = 0
+    uncached_df = sf.run_sobol_analysis(uncached_proj, uncached_fac, uncached_inputs, base_samples=8, metrics=metrics, seed=1)[0]
+    assert sobol_df.equals(uncached_df)
+    energy_ST = sobol_df.set_index(['Metric', 'Input']).loc[('Annual Energy (MWh)', 'design_flow'), 'ST']
+    assert energy_ST > 0.5 #The energy only depends on the fishway design flow
+
+@pytest.mark.parametrize('executor', ['Serial', 'Process Pool'])
+def test_economic_sweep_compacts_kept_results(deerfield, executor):
+    save_bools = [True, True, True, False, False, False]
+    enum_res = deerfield.enumeration_optimization('NPV ($)', get_enum_lists(deerfield), save_bools, False, executor, 2, None, keep_results=True)
+    kept_results = enum_res[3]
+    assert len(kept_results) == 6
+    assert [sim_res.has_series for sim_res in kept_results].count(True) == 1 #Only the best result keeps its time series
+    assert enum_res[1].has_series
+    for energy in [30, 120]:
+        deerfield.costs.energy = energy
+        best_fac, best_sim_res = deerfield.update_economic_results('NPV ($)', kept_results)
+        full_res = deerfield.enumeration_optimization('NPV ($)', get_enum_lists(deerfield), save_bools)
+        assert best_fac.name == full_res[0].name
+        assert get_run_dict(best_sim_res, save_bools) == get_run_dict(full_res[1], save_bools)
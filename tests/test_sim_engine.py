@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""
+Parity tests for the simulation engines. The Vectorized engine must return the same daily flow allocations as the Daily Loop engine.
+"""
+from copy import deepcopy
+import numpy as np
+import pytest
+import module_classes as mc
+from conftest import CASE_STUDIES, load_project, get_test_facility, get_test_screen
+
+#Spillway operation and screen scenarios, the uncontrolled spillway and screens make the headwater depend on operation
+SCENARIOS = {'controlled': ('Controlled Spillway', False), 'uncontrolled': ('Uncontrolled Spillway', False), \
+             'screen': ('Controlled Spillway', True), 'uncontrolled_screen': ('Uncontrolled Spillway', True)}
+
+#Returns the project and facility of the scenario
+def get_scenario(case_name, spill_mode, screen, gen_dispatch_mode='Design Ramping'):
+    proj = load_project(case_name)
+    proj.fac_prefs.gen_dispatch_mode = gen_dispatch_mode
+    spill_mod = proj.mod_lib.all_mods_dict['Spill'][0]
+    if spill_mode != 'Controlled Spillway':
+        spill_mod.op_mode = spill_mode
+        spill_mod.weir_coeff = 3.1
+        spill_mod.crest_height = proj.fac_prefs.nol
+    screens = []
+    if screen:
+        gen_names = [mod.name for mod in proj.mod_lib.pass_mods_list if mod.module_class == 'Gen']
+        screens = [get_test_screen(gen_names)]
+    return proj, get_test_facility(proj, screens=screens)
+
+#Simulates the facility with both engines and checks that the allocations are equal
+def check_engine_parity(proj, fac):
+    flows = proj.site.daily_inflow.get_flow_subset(proj.fac_prefs.test_start, proj.fac_prefs.test_end)['Discharge (cfs)']
+    outs = {}
+    for engine in ['Daily Loop', 'Vectorized']:
+        proj.fac_prefs.sim_engine = engine
+        outs[engine] = proj.simulate_operation(fac, flows)
+        assert outs[engine] is not False
+    loop_outs, vec_outs = outs['Daily Loop'], outs['Vectorized']
+    for i, name in enumerate(['pass_allos', 'spill_allos', 'over_allos', 'flush_allos']):
+        np.testing.assert_array_equal(np.asarray(vec_outs[i], dtype=float), np.asarray(loop_outs[i], dtype=float), err_msg=name)
+
+@pytest.mark.parametrize('scenario', list(SCENARIOS.keys()))
+@pytest.mark.parametrize('case_name', CASE_STUDIES)
+def test_engine_parity(case_name, scenario):
+    proj, fac = get_scenario(case_name, *SCENARIOS[scenario])
+    assert fac.constant_head == (scenario == 'controlled') #Only the controlled spillway without screens uses the constant head path
+    check_engine_parity(proj, fac)
+
+@pytest.mark.parametrize('gen_dispatch_mode', ['Peak Ramping', 'Simple Greedy', 'Advanced Greedy', 'Dynamic Programming'])
+def test_engine_parity_dispatch_modes(gen_dispatch_mode):
+    proj, fac = get_scenario('Deerfield', 'Uncontrolled Spillway', True, gen_dispatch_mode)
+    check_engine_parity(proj, fac)
+
+#Returns a facility with two of the library generation modules and two half size copies, so the greedy dispatch is not always optimal
+def get_mixed_gen_facility(proj):
+    lib = proj.mod_lib
+    gen_mod = lib.all_mods_dict['Gen'][0]
+    small_mod = deepcopy(gen_mod)
+    small_mod.name = 'Small ' + gen_mod.name
+    small_mod.redesign(gen_mod.design_flow/2, gen_mod.design_head)
+    pass_mods = [mod for mod in lib.pass_mods_list if mod.module_class != 'Spill'] + [small_mod]
+    counts = [2 if mod.module_class == 'Gen' else 1 for mod in pass_mods]
+    return mc.Facility('Mixed', proj, pass_mods, counts, lib.all_mods_dict['Spill'][0], 2, lib.all_mods_dict['Non'][0], lib.all_mods_dict['Fou'][0], None)
+
+#The dynamic programming table must have at least the total q*eff of both greedy models for every whole cfs available flow
+@pytest.mark.parametrize('case_name', CASE_STUDIES)
+def test_dp_dispatch_at_least_greedy(case_name):
+    proj = load_project(case_name)
+    proj.fac_prefs.gen_dispatch_mode = 'Dynamic Programming'
+    fac = get_mixed_gen_facility(proj)
+    get_total_qe = lambda allos: sum([fac.gen_mods[j].get_eff(q) * q for j, q in enumerate(allos) if q > 0])
+    for gen_mods_on in [[True] * fac.num_gen, [True, False, True, True]]:
+        dp_table = fac.get_dp_gen_dispatch(gen_mods_on)
+        simple_table = fac.get_simple_greedy_gen_dispatch_partial(gen_mods_on)
+        assert dp_table is not False
+        improved = False
+        for avail_flow in range(0, fac.max_gen_flow+1):
+            dp_qe = get_total_qe(dp_table[avail_flow])
+            greedy_qe = max(get_total_qe(simple_table[avail_flow]), get_total_qe(fac.get_adv_greedy_gen_dispatch_partial(avail_flow, gen_mods_on)))
+            assert dp_qe >= greedy_qe - 1e-9, avail_flow
+            assert dp_table[avail_flow].sum() <= avail_flow
+            assert not any([dp_table[avail_flow][j] > 0 for j in range(0, fac.num_gen) if not gen_mods_on[j]])
+            improved = improved or (dp_qe > greedy_qe + 1e-9)
+        assert improved #The mixed modules have flows where the greedy models are not optimal
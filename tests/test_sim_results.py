@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for compacting simulation results, which removes the daily time series of older results while keeping the metrics calculated so far.
+"""
+import pytest
+import module_classes as mc
+from conftest import get_test_facility
+
+#Returns the results of a facility evaluated with only the energy and NPV metrics
+def evaluate_lite(proj):
+    proj.fitness_cache.size = 0
+    return proj.evaluate(get_test_facility(proj), metrics=['Annual Energy (MWh)', 'NPV ($)'])
+
+def test_compact_does_not_calculate_metrics(deerfield):
+    sim_res = evaluate_lite(deerfield)
+    calculated = sim_res.obj_dict.get_calculated()
+    sim_res.compact()
+    assert not sim_res.has_series
+    assert sim_res.obj_dict.get_calculated() == calculated
+    assert dict(sim_res.obj_dict) == calculated
+    for att in ['fish_perf_dicts', 'sed_perf_dict']:
+        assert att not in vars(sim_res)
+    assert not any(att in vars(sim_res) for att in sim_res.series_atts)
+
+#Adds a species with fish passage metrics for every module, the case study workbooks do not have species
+def add_test_species(proj):
+    proj.species_list = [mc.Species('Shad', [4, 5, 6], [9, 10, 11])]
+    for mod in proj.mod_lib.pass_mods_list + [proj.mod_lib.all_mods_dict['Spill'][0]]:
+        mod.add_fish_effs('Shad', 0.2, 0.3 if mod.module_class == 'Gen' else 0.1, 0.5, 0.6)
+
+def test_compacted_results_keep_fish_dicts(deerfield):
+    add_test_species(deerfield)
+    sim_res = evaluate_lite(deerfield)
+    species_df = sim_res.get_species_df()
+    holistic_df = sim_res.get_holistic_df()
+    sim_res.compact()
+    assert 'Shad' in sim_res.fish_up_dict
+    assert sim_res.get_species_df().equals(species_df)
+    assert sim_res.get_holistic_df().equals(holistic_df)
+    assert sim_res.obj_dict['Effective Mortality (%)'] == sim_res.get_fish_performance('M_eff')
+
+def test_compacted_results_without_fish_dicts(deerfield):
+    add_test_species(deerfield)
+    sim_res = evaluate_lite(deerfield)
+    sim_res.compact()
+    with pytest.raises(ValueError, match='compacted'):
+        sim_res.get_species_df()
+
+def test_compacted_results_errors(deerfield):
+    sim_res = evaluate_lite(deerfield)
+    sim_res.compact()
+    with pytest.raises(ValueError, match='compacted'):
+        sim_res.pass_allos
+    with pytest.raises(ValueError, match='compacted'):
+        sim_res.get_generation_timeseries_df()
+    with pytest.raises(ValueError, match='compacted'):
+        sim_res.obj_dict['Sediment Passage Frequency (%)']
+    assert sim_res.obj_dict.get('Sediment Passage Frequency (%)') is None
+    with pytest.raises(AttributeError):
+        sim_res.not_an_attribute
+
+def test_compacted_results_economics(deerfield):
+    sim_res = evaluate_lite(deerfield)
+    sim_res.compact()
+    copy_res = sim_res.get_copy(sim_res.proj, sim_res.fac)
+    deerfield.costs.energy += 10
+    copy_res.update_economics()
+    assert copy_res.NPV > sim_res.NPV
+    assert copy_res.get_run_dict()['NPV ($)'] == copy_res.NPV
+
+def test_facility_compacts_old_results(deerfield):
+    fac = get_test_facility(deerfield)
+    for i in range(0, fac.max_detail_results + 2):
+        deerfield.fitness_cache.size = 0
+        deerfield.evaluate(fac)
+    assert [sim_res.has_series for sim_res in fac.results_list] == [False, False, True, True, True]
+    assert fac.results_list[0].obj_dict['NPV ($)'] == fac.results_list[-1].obj_dict['NPV ($)']
@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the USGS response cache. The USGS services are replaced by a local stand-in HTTP server, so the tests do not use the internet.
+"""
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import urlparse, parse_qs
+import pandas as pd
+import pytest
+import aux_functions as af
+
+#Stand-in for the daily values and peak flow services, the requests are counted and the server can be set to fail
+class StandInHandler(BaseHTTPRequestHandler):
+    requests_list = []
+    fail = False
+    def do_GET(self):
+        StandInHandler.requests_list.append(self.path)
+        if StandInHandler.fail:
+            self.send_response(500)
+            self.end_headers()
+            return
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        if url.path.startswith('/nwis/dv'):
+            content = json.dumps(get_series_response(query['startDT'][0], query['endDT'][0])).encode('utf-8')
+        elif url.path.startswith('/peak'):
+            content = '#Stand-in peak flows\nagency_cd\tsite_no\tpeak_dt\tpeak_va\nUSGS\t{}\t2010-04-01\t5000\n'.format(query['site_no'][0]).encode('utf-8')
+        else:
+            self.send_response(404)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+    def log_message(self, *args): #The requests are not printed
+        pass
+
+#Returns a daily values response with a flow for each day
+def get_series_response(start_date, end_date):
+    values = [{'value': str(100 + i), 'qualifiers': ['A'], 'dateTime': d.strftime('%Y-%m-%dT00:00:00.000')} for i, d in enumerate(pd.date_range(start_date, end_date))]
+    return {'value': {'timeSeries': [{'variable': {'noDataValue': -999999.0}, 'values': [{'value': values}]}]}}
+
+@pytest.fixture(scope='module')
+def server_url():
+    server = HTTPServer(('127.0.0.1', 0), StandInHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield 'http://127.0.0.1:{}'.format(server.server_address[1])
+    server.shutdown()
+
+@pytest.fixture
+def cache(server_url, tmp_path):
+    StandInHandler.requests_list = []
+    StandInHandler.fail = False
+    return af.USGSCache(cache_dir=str(tmp_path / 'usgs_cache'), timeout=5, service_url=server_url + '/nwis', peak_url=server_url + '/peak')
+
+#Returns the dates of the values in a daily values response
+def get_dates(data):
+    return [v['dateTime'][0:10] for v in data['value']['timeSeries'][0]['values'][0]['value']]
+
+def test_cache_hit(cache):
+    first = cache.get_series_json('dv', '01234567', '2010-01-01', '2010-12-31')
+    second = cache.get_series_json('dv', '01234567', '2010-01-01', '2010-12-31')
+    assert len(StandInHandler.requests_list) == 1
+    assert first == second
+    assert len(get_dates(second)) == 365
+    assert cache.get_peak_text('01234567') == cache.get_peak_text('01234567')
+    assert len(StandInHandler.requests_list) == 2
+
+def test_sub_range_slice(cache):
+    cache.get_series_json('dv', '01234567', '2010-01-01', '2010-12-31')
+    data = cache.get_series_json('dv', '01234567', '2010-03-01', '2010-03-10')
+    assert len(StandInHandler.requests_list) == 1
+    assert get_dates(data) == [d.strftime('%Y-%m-%d') for d in pd.date_range('2010-03-01', '2010-03-10')]
+    cache.get_series_json('dv', '01234567', '2009-12-01', '2010-01-10') #Outside of the cached range
+    assert len(StandInHandler.requests_list) == 2
+
+def test_expired_entry(cache):
+    cache.ttl_days = 1
+    cached = cache.get_series_json('dv', '01234567', '2010-01-01', '2010-01-31')
+    for name in os.listdir(cache.cache_dir): #Makes the entry two days old
+        old_time = time.time() - 2 * 86400
+        os.utime(os.path.join(cache.cache_dir, name), (old_time, old_time))
+    cache.get_series_json('dv', '01234567', '2010-01-01', '2010-01-31')
+    assert len(StandInHandler.requests_list) == 2 #Expired entries are downloaded again
+    for name in os.listdir(cache.cache_dir):
+        os.utime(os.path.join(cache.cache_dir, name), (old_time, old_time))
+    StandInHandler.fail = True #The expired entry is used when the API can not be reached
+    assert cache.get_series_json('dv', '01234567', '2010-01-01', '2010-01-31') == cached
+    assert len(StandInHandler.requests_list) == 3
+    cache.offline = True #The expired entry is used without calling the API in offline mode
+    assert cache.get_series_json('dv', '01234567', '2010-01-01', '2010-01-31') == cached
+    assert len(StandInHandler.requests_list) == 3
+
+def test_offline_miss(cache):
+    cache.offline = True
+    with pytest.raises(ConnectionError):
+        cache.get_series_json('dv', '01234567', '2010-01-01', '2010-01-31')
+    daily_data, diag_dict = af.get_daily_USGS_data('01234567', '2010-01-01', '2010-01-31', cache=cache)
+    assert len(daily_data) == 0
+    assert diag_dict['Error'] == af.get_USGS_access_error(cache)
+    assert len(StandInHandler.requests_list) == 0
+
+def test_size_eviction(cache):
+    cache.get_series_json('dv', '01234567', '2010-01-01', '2010-12-31')
+    entry_mb = sum([os.path.getsize(os.path.join(cache.cache_dir, name)) for name in os.listdir(cache.cache_dir)]) / 1e6
+    cache.max_size_mb = 1.5 * entry_mb #Room for one year of data
+    old_time = time.time() - 60
+    for name in os.listdir(cache.cache_dir):
+        os.utime(os.path.join(cache.cache_dir, name), (old_time, old_time))
+    cache.get_series_json('dv', '07654321', '2010-01-01', '2010-12-31')
+    assert os.listdir(cache.cache_dir) == ['dv_07654321_00060-00065_2010-01-01_2010-12-31.json'] #The oldest entry was removed
+    cache.get_series_json('dv', '01234567', '2010-01-01', '2010-12-31')
+    assert len(StandInHandler.requests_list) == 3
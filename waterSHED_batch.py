@@ -0,0 +1,288 @@
+# -*- coding: utf-8 -*-
+"""
+Runs the waterSHED model without the user interface. The inputs are read from waterSHED Workbooks and the runs are described by a JSON job spec, so many site studies can be run on machines without a display.
+
+Usage: python waterSHED_batch.py job_spec.json [--workbooks path1.xlsx path2.xlsx] [--case-study name] [--output-dir folder]
+
+Example job spec:
+{
+    "workbooks": [{"path": "Workbooks/waterSHED_Workbook_Deerfield.xlsx", "case_study": "Deerfield"}],
+    "output_dir": "batch_results",
+    "sim_engine": "Vectorized",
+    "jobs": [
+        {"name": "Base", "type": "simulate", "modules": {"Kaplan": 2, "Obermeyer Spillway": 1},
+         "non_overflow": "Precast Concrete", "foundation": "Precast Foundation"},
+        {"name": "Enum", "type": "enumerate", "objective": "NPV ($)", "executor": "Process Pool",
+         "modules": {"Kaplan": {"Module Count": [1, 2, 3], "Design Flow": [200, 400]}, "Obermeyer Spillway": 1},
+         "non_overflow": "Precast Concrete", "foundation": "Precast Foundation"},
+        {"name": "Discount", "type": "sensitivity", "object": "Costs", "variable": "discount", "min": 3, "max": 9, "step": 3,
+         "objective": "NPV ($)", "modules": {"Kaplan": {"Module Count": [1, 2, 3]}, "Obermeyer Spillway": 1},
+         "non_overflow": "Precast Concrete", "foundation": "Precast Foundation"}
+    ]
+}
+
+Job types and their additional keys:
+- simulate: simulates the facility with the module counts in "modules"
+- enumerate: "objective", "save" (list of six save booleans for obj, fac, mods, cost, bene, expns)
+- optimize: "objective", "constraints", "iterations", "population_size", "best_count", "mutate_count", "random_count", "cross_num", the population size must equal the sum of the four counts and the module lists are [min, max] ranges
+- sensitivity: the enumerate keys and "object" ('Site', 'Costs', 'Preferences', a module, screen, or species name), "variable", "min", "max", "step", and the optional "dict_key" and "unit_type"
+- monte_carlo: "inputs" (list of {"object", "variable", "distribution", "params", "dict_key", "unit_type", "name"}), "samples", "seed"
+- sobol: the monte_carlo keys, "metrics", "conf_tol", and "max_samples"
+The workbooks are paths, or dicts with the "path" and a "case_study" name whose dynamic modules from case_study_functions are added to the module library.
+The module values are a count, or a dict of attribute values where a list is iterated and a number is constant.
+All jobs can include "executor" ('Serial', 'Thread Pool', or 'Process Pool') and "max_workers".
+The job spec and each job can include "sim_engine" ('Daily Loop' or 'Vectorized') and "gen_dispatch_mode" to override the workbook preferences, a job value is used instead of the job spec value for that job.
+"""
+#%%## IMPORT PACKAGES
+import module_classes as mc
+import sensitivity_functions as sf
+import case_study_functions as csf
+from workbook_functions import import_from_workbook
+import pandas as pd
+import argparse
+import json
+import time
+import os
+
+#%%## Project functions
+#Returns the SMH project from a waterSHED Workbook, or an error message if the workbook could not be imported
+#If a case study name is given, the dynamic modules of the case study are added to the module library
+def get_workbook_project(path_name, case_name=None):
+    imported_vals = import_from_workbook(path_name, 'All')
+    if type(imported_vals) == str:
+        return imported_vals
+    for i in imported_vals:
+        if type(i) == str:
+            return i
+    site, costs, prefs, mods, species = imported_vals
+    mod_lib = mc.Module_library()
+    for mod in mods:
+        if mod.name not in mod_lib.get_name_list():
+            mod_lib.add_static(mod)
+    if case_name is not None:
+        for mod in csf.get_default_modules(case_name):
+            mod_lib.add_dynamic(mod)
+    if len(species) <= 0:
+        species = None
+    return mc.SMH_project(site, costs, prefs, mod_lib, species_list=species)
+
+#Returns a module or screen from the module library by name, or False if it does not exist
+def get_library_object(proj, name):
+    for mod in proj.mod_lib.all_mods_list + proj.mod_lib.screens_list:
+        if mod.name == name:
+            return mod
+    print('Module not found in the library: ', name)
+    return False
+
+#Returns the object that is changed in a sensitivity or uncertainty analysis
+def get_job_object(proj, name):
+    if name == 'Site':
+        return proj.site
+    elif name == 'Costs':
+        return proj.costs
+    elif name == 'Preferences':
+        return proj.fac_prefs
+    if proj.species_list is not None:
+        for spec in proj.species_list:
+            if spec.name == name:
+                return spec
+    return get_library_object(proj, name)
+
+#Returns the enumeration lists [required mods dict, list of passage mods, list of constant variables, list of iterated variables, dict of screen booleans] for a job
+#For optimize jobs, the iterated variables are [min, max] ranges
+def get_job_enum_lists(proj, job):
+    req_mods_dict = {'Non-overflow': get_library_object(proj, job['non_overflow']), 'Foundation': get_library_object(proj, job['foundation']), 'Flushing': None}
+    if job.get('flushing') is not None:
+        req_mods_dict['Flushing'] = get_library_object(proj, job['flushing'])
+    pass_mods_list = []
+    const_list = []
+    iter_list = []
+    for mod_name, params in job['modules'].items():
+        mod = get_library_object(proj, mod_name)
+        if mod is False:
+            return False
+        if type(params) != dict: #Only the module count is given
+            params = {'Module Count': params}
+        if mod.module_class == 'Spill':
+            req_mods_dict['Spill'] = mod
+        else:
+            pass_mods_list.append(mod)
+        for att, val in params.items():
+            if type(val) == list:
+                iter_list.append([mod_name, att, val])
+            else:
+                const_list.append([mod_name, att, val])
+    if (False in req_mods_dict.values()) or ('Spill' not in req_mods_dict):
+        print('The non-overflow, foundation, and spillway modules are required.')
+        return False
+    screen_bool_dict = {}
+    for sc in proj.mod_lib.screens_list:
+        screen_bool_dict[sc.name] = sc.name in job.get('screens', [])
+    return [req_mods_dict, pass_mods_list, const_list, iter_list, screen_bool_dict]
+
+#Returns the facility from the module counts of a simulate job
+def get_job_facility(proj, job):
+    enum_lists = get_job_enum_lists(proj, job)
+    if enum_lists is False:
+        return False
+    req_mods_dict, pass_mods_list, const_list, iter_list, screen_bool_dict = enum_lists
+    counts = {mod_name: val for mod_name, att, val in const_list if att == 'Module Count'}
+    screens = [sc for sc in proj.mod_lib.screens_list if screen_bool_dict[sc.name]]
+    return mc.Facility(job.get('name', 'Facility'), proj, pass_mods_list, [counts.get(mod.name, 1) for mod in pass_mods_list], \
+                       req_mods_dict['Spill'], counts.get(req_mods_dict['Spill'].name, 1), req_mods_dict['Non-overflow'], req_mods_dict['Foundation'], \
+                       req_mods_dict['Flushing'], screens=screens)
+
+#Returns the uncertain inputs of a monte_carlo or sobol job
+def get_job_inputs(proj, job):
+    inputs = []
+    for inp in job['inputs']:
+        obj = get_job_object(proj, inp['object'])
+        if obj is False:
+            return False
+        inputs.append(sf.UncertainInput(obj, inp['variable'], inp['distribution'], inp['params'], inp.get('dict_key'), inp.get('unit_type'), inp.get('name')))
+    return inputs
+
+#%%## Job functions
+#Facility preferences that can be overridden by the job spec or a job, with their options
+pref_override_options = {'sim_engine': ['Daily Loop', 'Vectorized'], \
+                         'gen_dispatch_mode': ['Design Ramping', 'Peak Ramping', 'Simple Greedy', 'Advanced Greedy', 'Dynamic Programming']}
+
+#Sets the facility preferences given in the overrides dict, returns False if an override is not one of the options
+def set_preference_overrides(proj, overrides):
+    for key, options in pref_override_options.items():
+        if overrides.get(key) is not None:
+            if overrides[key] not in options:
+                print('Unknown {}: {}'.format(key, overrides[key]))
+                return False
+            setattr(proj.fac_prefs, key, overrides[key])
+    proj.fac_prefs.update_data_list()
+    return True
+
+#Runs a job on the project and returns a dict of result dataframes by file suffix, or False if unsuccessful
+def run_job(proj, job):
+    job_type = job['type']
+    executor = job.get('executor', 'Serial')
+    max_workers = job.get('max_workers')
+    save_bools = job.get('save', [True, True, True, True, True, True])
+    if job_type == 'simulate':
+        fac = get_job_facility(proj, job)
+        if fac is False:
+            return False
+        sim_res = proj.evaluate(fac)
+        if sim_res is False:
+            return False
+        return {'Results': pd.DataFrame({'Value': sim_res.get_run_dict(*save_bools)}).rename_axis('Metric').reset_index(), \
+                'Allocations': sim_res.get_allocations_df(), 'Elevations': sim_res.get_elevation_df()}
+    elif job_type == 'enumerate':
+        enum_lists = get_job_enum_lists(proj, job)
+        if enum_lists is False:
+            return False
+        enum_res = proj.enumeration_optimization(job['objective'], enum_lists, save_bools, executor=executor, max_workers=max_workers)
+        if enum_res is False:
+            return False
+        return {'Results': enum_res[2], 'Best': pd.DataFrame({'Value': enum_res[1].get_run_dict(*save_bools)}).rename_axis('Metric').reset_index()}
+    elif job_type == 'optimize':
+        enum_lists = get_job_enum_lists(proj, job)
+        if enum_lists is False:
+            return False
+        #The population is replaced by the best, mutated, random, and crossover facilities each iteration, the defaults match the Optimize page
+        ga_counts = [job.get('best_count', 3), job.get('mutate_count', 3), job.get('random_count', 3), job.get('cross_num', 3)]
+        pop_size = job.get('population_size', sum(ga_counts))
+        if pop_size != sum(ga_counts):
+            print('The population size must equal the sum of the best, mutate, random, and crossover counts.')
+            return False
+        opt_facs = proj.optimize(job['objective'], job.get('constraints', []), enum_lists, iterations=job.get('iterations', 20), population_size=pop_size, \
+                                 best_count=ga_counts[0], mutate_count=ga_counts[1], random_count=ga_counts[2], cross_num=ga_counts[3], \
+                                 print_results=False, executor=executor, max_workers=max_workers)
+        if type(opt_facs) == str:
+            print(opt_facs)
+            return False
+        sim_res = opt_facs[0].get_latest_sim_results()
+        if sim_res is False:
+            return False
+        return {'Best': pd.DataFrame({'Value': sim_res.get_run_dict(*save_bools)}).rename_axis('Metric').reset_index()}
+    elif job_type == 'sensitivity':
+        enum_lists = get_job_enum_lists(proj, job)
+        obj = get_job_object(proj, job['object'])
+        if (enum_lists is False) or (obj is False):
+            return False
+        iters = sf.get_sensitivity_iterations({'Min': job['min'], 'Max': job['max'], 'Step': job['step']})
+        enum_params = [job['objective'], enum_lists, save_bools, False, 'Serial']
+        return {'Results': sf.run_sensitivity_analysis(proj, obj, job['variable'], iters, enum_params, job.get('dict_key'), job.get('unit_type'), executor=executor, max_workers=max_workers)}
+    elif job_type in ['monte_carlo', 'sobol']:
+        fac = get_job_facility(proj, job)
+        inputs = get_job_inputs(proj, job)
+        if (fac is False) or (inputs is False):
+            return False
+        if job_type == 'monte_carlo':
+            mc_df = sf.run_monte_carlo(proj, fac, inputs, job.get('samples', 1000), seed=job.get('seed'), executor=executor, max_workers=max_workers)
+            if mc_df is False:
+                return False
+            return {'Samples': mc_df, 'Summary': sf.get_monte_carlo_summary(mc_df).rename_axis('Metric').reset_index()}
+        sobol_res = sf.run_sobol_analysis(proj, fac, inputs, base_samples=job.get('samples', 256), metrics=job.get('metrics'), seed=job.get('seed'), \
+                                          conf_tol=job.get('conf_tol', 0.05), max_base_samples=job.get('max_samples'), executor=executor, max_workers=max_workers)
+        if sobol_res is False:
+            return False
+        print('Sobol analysis converged: {} with {} base samples'.format(sobol_res[1], sobol_res[2]))
+        return {'Indices': sobol_res[0]}
+    else:
+        print('Unknown job type: ', job_type)
+        return False
+
+#Runs all of the jobs for each workbook and writes the results as csv files in a folder for each workbook
+#The preference overrides of the job spec are used for every job, each job can override them again
+def run_batch(workbooks, jobs, output_dir, overrides={}):
+    for workbook in workbooks:
+        if type(workbook) == dict:
+            path_name = workbook['path']
+            proj = get_workbook_project(path_name, workbook.get('case_study'))
+        else:
+            path_name = workbook
+            proj = get_workbook_project(path_name)
+        if type(proj) == str:
+            print('Unable to import {}: {}'.format(path_name, proj))
+            continue
+        if not set_preference_overrides(proj, overrides):
+            print('Unable to run the jobs for {}'.format(os.path.basename(path_name)))
+            continue
+        spec_prefs = {key: getattr(proj.fac_prefs, key) for key in pref_override_options.keys()}
+        out_folder = os.path.join(output_dir, os.path.splitext(os.path.basename(path_name))[0])
+        os.makedirs(out_folder, exist_ok=True)
+        for i, job in enumerate(jobs):
+            job_name = job.get('name', '{} {}'.format(job['type'], i+1))
+            start_time = time.perf_counter()
+            try:
+                set_preference_overrides(proj, spec_prefs) #Preferences changed by the previous job are reset
+                if set_preference_overrides(proj, job):
+                    job_res = run_job(proj, job)
+                else:
+                    job_res = False
+            except Exception as e:
+                print('Error during {} ({}): {}'.format(job_name, os.path.basename(path_name), e))
+                continue
+            if job_res is False:
+                print('Unable to complete {} ({})'.format(job_name, os.path.basename(path_name)))
+                continue
+            for suffix, df in job_res.items():
+                df.to_csv(os.path.join(out_folder, '{}_{}.csv'.format(job_name, suffix)), index=False)
+            print('Completed {} ({}) in {} seconds'.format(job_name, os.path.basename(path_name), round(time.perf_counter()-start_time, 2)))
+
+#%%## Driver Code
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Runs waterSHED jobs on waterSHED Workbooks without the user interface.')
+    parser.add_argument('job_spec', help='JSON file with the workbooks, output folder, and list of jobs')
+    parser.add_argument('--workbooks', nargs='+', help='Workbook paths, used instead of the workbooks in the job spec')
+    parser.add_argument('--case-study', help='Case study name whose dynamic modules are added for the workbooks given with --workbooks')
+    parser.add_argument('--output-dir', help='Folder for the results, used instead of the output_dir in the job spec')
+    args = parser.parse_args()
+
+    with open(args.job_spec) as f:
+        job_spec = json.load(f)
+    if args.workbooks is not None:
+        workbooks = [{'path': path_name, 'case_study': args.case_study} for path_name in args.workbooks]
+    else:
+        workbooks = job_spec.get('workbooks', [])
+    output_dir = args.output_dir if args.output_dir is not None else job_spec.get('output_dir', 'batch_results')
+    if len(workbooks) <= 0:
+        parser.error('No workbooks were provided.')
+    run_batch(workbooks, job_spec['jobs'], output_dir, {key: job_spec.get(key) for key in pref_override_options.keys()})
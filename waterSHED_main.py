@@ -18,20 +18,26 @@ import webbrowser
 import pandas as pd
 import queue
 import threading
+import traceback
 import module_classes as mc
 import dynamic_modules as dm
 import aux_functions as af
 import case_study_functions as csf
-from PIL import Image, ImageTk
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import tksheet as tksheet
+import sensitivity_functions as sf
+from copy import deepcopy
+from workbook_functions import check_entry, create_mod_from_dict, import_from_workbook, get_static_module_attributes, get_dynamic_module_attributes
 import numpy as np
 import waterSHED_styles as styles
 import os
-from openpyxl import load_workbook
 import time
 import math
+#The plotting, image, table, and spreadsheet packages are imported the first time they are used to reduce the startup time
+plt = af.LazyModule('matplotlib.pyplot', lambda m: m.rcParams.update({'figure.max_open_warning': 0}))
+backend_tkagg = af.LazyModule('matplotlib.backends.backend_tkagg')
+Image = af.LazyModule('PIL.Image')
+ImageTk = af.LazyModule('PIL.ImageTk')
+tksheet = af.LazyModule('tksheet')
+openpyxl = af.LazyModule('openpyxl')
 #%%## Styles
 #Colors
 TITLE_BG_COLOR = styles.TITLE_BG_COLOR
@@ -53,7 +59,6 @@ SUBTITLE_FONT = styles.SUBTITLE_FONT
 LINK_FONT = styles.LINK_FONT
 TEXT_ITALIC_FONT = styles.TEXT_ITALICS_FONT
 
-plt.rcParams.update({'figure.max_open_warning': 0})
 #%%## MAIN TKINTER APP
 class tkinterApp(): 
     def __init__(self, master):  
@@ -69,7 +74,7 @@ class tkinterApp():
         self.opt_facs = [] #List of optimal facilities
         self.enum_res = [] #List of enumeration results, including [fac, sim_res, results_df]
         self.species_list = [] #List of Species objects
-        self.saved_sim_results = [] #List of saved SimResults objects
+        self.saved_sim_results = mc.ResultsAccumulator() #Saved simulation results, use get_df() for the DataFrame
         
         #Dimension parameters used to change scale of the window
         self.canvas_width = 870
@@ -95,16 +100,13 @@ class tkinterApp():
         self.canvas.bind('<Configure>', self.FrameWidth)
         self.canvas.bind_all('<MouseWheel>', self._on_mousewheel)
 
-        #List of pages
+        #List of pages and their names in the side bar
         self.pages = (StartPage, SitePage, AddModulePage,AddDynamicModulePage, AddScreenPage, FishPage, CostsPage, PreferencesPage, EnumeratePage, OptimizePage)
+        self.page_names = {StartPage: 'Start', SitePage: 'Site Inputs', AddModulePage: 'Add Modules', AddDynamicModulePage: 'Add Dynamic', AddScreenPage: 'Add Screen', \
+                           FishPage: 'Species Passage', CostsPage: 'Cost Tables', PreferencesPage: 'Preferences', EnumeratePage: 'Enumerate', OptimizePage: 'Optimize'}
             
-        #Creates frames for each page
+        #Frames for each page, a page is only created the first time it is shown or used
         self.frames = {}   
-        for F in self.pages: 
-            frame = F(self.mainframe, self) 
-            self.frames[F] = frame  
-            frame.grid(row = 0, column = 0, sticky ="nsew", padx=2.5, pady=5) 
-            frame.grid_columnconfigure(0, weight=1)
         self.show_frame(StartPage) 
    
         #Packing main window objects
@@ -119,7 +121,8 @@ class tkinterApp():
         self.master.iconphoto(False, self.p1)
 
     #Checks if inputs are correct and then creates a SMH_Project instance and runs the genetic algorithm optimization from the Project class
-    def optimize_facility(self, enum_lists, objective, constraints, iterations, pop_size, best_num, mut_num, random_num, cross_num, show_anim):
+    #The optimization runs in a model thread, the iterations are shown in the progress window instead of the model animation
+    def optimize_facility(self, enum_lists, objective, constraints, iterations, pop_size, best_num, mut_num, random_num, cross_num, executor, show_anim):
         if self.check_complete:
             try:
                 if len(self.species_list) > 0:
@@ -127,14 +130,30 @@ class tkinterApp():
                 else:
                     species = None
                 self.proj = mc.SMH_project(self.site, self.costs, self.preferences, self.mod_lib, species_list=species)
-                self.opt_facs = self.proj.optimize(objective, constraints, enum_lists, iterations=iterations, population_size=pop_size, best_count=best_num, mutate_count=mut_num, random_count=random_num, cross_num=cross_num, show_anim=show_anim)
-                self.frames[OptimizePage].optimization_complete()
-                tk.messagebox.showinfo("Success", "Successfully optimized the facility design")
+                kwargs = {'iterations': iterations, 'population_size': pop_size, 'best_count': best_num, 'mutate_count': mut_num, 'random_count': random_num, \
+                          'cross_num': cross_num, 'executor': executor}
+                self.model_popup = progressWindow(self, 'Optimization', self.proj.optimize, [objective, constraints, enum_lists], kwargs, self.optimization_finished, show_anim)
             except:
                 tk.messagebox.showerror('Error', 'Unknown error during optimization process.')
+                
+    #Updates the optimize page once the optimization thread is done
+    def optimization_finished(self, status, results, cancelled, run_time):
+        if status == 'Error':
+            tk.messagebox.showerror('Error', 'Unknown error during optimization process.')
+        elif isinstance(results, str): #Error message from the optimization
+            tk.messagebox.showerror('Error', results)
+        elif len(results) == 0:
+            tk.messagebox.showinfo('Cancelled', 'The optimization was cancelled before the first iteration was complete.')
+        else:
+            self.opt_facs = results
+            self.get_frame(OptimizePage).optimization_complete()
+            if cancelled:
+                tk.messagebox.showinfo('Cancelled', 'The optimization was cancelled, the best facility design of the last complete iteration is shown.')
+            else:
+                tk.messagebox.showinfo("Success", "Successfully optimized the facility design. Total time = {} seconds".format(round(run_time, 2)))
 
-    #Checks if the inputs are correct and then runs the enumeration optimization through the Project class
-    def enumerate_facility(self, objective, enum_lists, save_bools, show_anim):
+    #Checks if the inputs are correct and then runs the enumeration optimization through the Project class in a model thread
+    def enumerate_facility(self, objective, enum_lists, save_bools, show_anim, executor):
         if self.check_complete:
             try:
                 if len(self.species_list) > 0:
@@ -142,31 +161,36 @@ class tkinterApp():
                 else:
                     species = None
                 self.proj = mc.SMH_project(self.site, self.costs, self.preferences, self.mod_lib, species_list=species)
-                start_time = time.perf_counter()
-                self.enum_res = self.proj.enumeration_optimization(objective, enum_lists, save_bools,show_anim=show_anim)
-                end_time = time.perf_counter()
-                self.enum_res 
-                if self.enum_res is False:
-                    tk.messagebox.showerror('Error', 'Unable to enumerate the facility, make sure the enumeration parameters for any dynamic modules are feasible.')
-                    return False
-                if len(self.saved_sim_results) <= 0:
-                    self.saved_sim_results = self.enum_res[2]
-                else:
-                    self.saved_sim_results = pd.merge(self.saved_sim_results, self.enum_res[2], on='Metric', sort=False, how='outer')
-                self.frames[EnumeratePage].enumeration_complete()
-                tk.messagebox.showinfo("Success", "Successfully enumerated the facility design. Total time = {} seconds".format(round(end_time-start_time, 2)))
+                self.model_popup = progressWindow(self, 'Enumeration', self.proj.enumeration_optimization, [objective, enum_lists, save_bools], {'executor': executor}, \
+                                                  self.enumeration_finished, show_anim)
             except:
                 tk.messagebox.showerror('Error', 'Unknown error during enumeration process.')
         else:
             tk.messagebox.showerror('Error', 'All required objects must be created before running sensitivity analysis.')
             return False
+    
+    #Updates the enumerate page once the enumeration thread is done
+    def enumeration_finished(self, status, results, cancelled, run_time):
+        if status == 'Error':
+            tk.messagebox.showerror('Error', 'Unknown error during enumeration process.')
+        elif results is False:
+            tk.messagebox.showerror('Error', 'Unable to enumerate the facility, make sure the enumeration parameters for any dynamic modules are feasible.')
+        elif results[1] is None: 
+            tk.messagebox.showinfo('Cancelled', 'The enumeration was cancelled before a facility design was simulated.')
+        else:
+            self.enum_res = results
+            self.saved_sim_results.add_df(self.enum_res[2])
+            self.get_frame(EnumeratePage).enumeration_complete()
+            if cancelled:
+                tk.messagebox.showinfo('Cancelled', 'The enumeration was cancelled, the best facility design of the simulated designs is shown.')
+            else:
+                tk.messagebox.showinfo("Success", "Successfully enumerated the facility design. Total time = {} seconds".format(round(run_time, 2)))
         
-    #Checks if inputs are correct, then runs through each sensitivity case using the appropriate optimization function
+    #Checks if inputs are correct, then runs through each sensitivity case using the appropriate optimization function in a model thread
     def sensitivity_analysis(self, obj, variable_name, iterations, dict_key=None, unit_type=None): 
         if self.check_complete:
             try:
-                results_df = None
-                enum_params = self.frames[EnumeratePage].get_enumeration_parameters()
+                enum_params = self.get_frame(EnumeratePage).get_enumeration_parameters()
                 if enum_params is False:
                     tk.messagebox.showerror('Error', 'Please ensure proper inputs on the enumeration page.')
                     return False
@@ -177,48 +201,35 @@ class tkinterApp():
                 else:
                     species = None
                 #Determine variable iteration
-                iters = list(np.arange(iterations['Min'], iterations['Max'], iterations['Step']))
-                iters = np.append(iters, iterations['Max'])
-                for i in iters:
-                    #Set sensitivity variable
-                    iter_name = variable_name + ' - ' + str(i)
-                    if dict_key is not None:
-                        getattr(obj, variable_name)[dict_key] = i
-                    elif unit_type  == 'Discount Equation':
-                        getattr(obj, variable_name).set_discount_factor(i)
-                    else:    
-                        setattr(obj, variable_name, i)
-                    #Run enumeration
-                    proj = mc.SMH_project(self.site, self.costs, self.preferences, self.mod_lib, species_list=species)
-                    enum_res = proj.enumeration_optimization(*enum_params) #enum_res includes [best_fac, best_sim_res, results_df]
-                    if enum_res is False: #If enumeration is unsuccessful, then output a placeholder results_dict
-                        results_dict = {'Enumeration Objective': 'Unsucessful', variable_name: i}
-                        temp_df = pd.DataFrame.from_dict(results_dict, orient='index', columns=[iter_name]).reset_index()
-                        temp_df.rename(columns={'index':'Metric'},inplace=True)
-                    else: #If enumeration is successful, then save results
-                        best_sim_res = enum_res[1]
-                        results_dict = best_sim_res.get_run_dict(*enum_params[3])
-                        results_dict['Enumeration Objective'] = best_sim_res.obj_dict[enum_params[0]]
-                        results_dict[variable_name] = i
-                        temp_df = pd.DataFrame.from_dict(results_dict, orient='index', columns=[iter_name]).reset_index()
-                        temp_df.rename(columns={'index':'Metric'},inplace=True)
-                    if results_df is None:
-                        results_df = temp_df
-                    else:
-                        results_df = pd.merge(results_df, temp_df, on='Metric', sort=False, how='outer')
-                self.sens_results = results_df
-                if len(self.saved_sim_results) <= 0:
-                    self.saved_sim_results = self.sens_results
-                else:
-                    self.saved_sim_results = pd.merge(self.saved_sim_results, self.sens_results, on='Metric', sort=False, how='outer')
-                self.frames[EnumeratePage].sensitivity_complete(variable_name)
-                tk.messagebox.showinfo("Success", "Successfully conducted sensitivity analysis")
+                iters = sf.get_sensitivity_iterations(iterations)
+                
+                #Each iteration runs on a copy of the project, using the enumeration executor to run the iterations
+                #The inputs are copied before the thread starts since the sensitivity frame resets the original values once this function returns
+                proj = mc.SMH_project(self.site, self.costs, self.preferences, self.mod_lib, species_list=species)
+                proj, obj, enum_params = deepcopy((proj, obj, list(enum_params)))
+                self.model_popup = progressWindow(self, 'Sensitivity Analysis', sf.run_sensitivity_analysis, [proj, obj, variable_name, iters, enum_params, dict_key, unit_type], \
+                                                  {'executor': enum_params[4]}, lambda *vals: self.sensitivity_finished(variable_name, *vals))
             except:
                 tk.messagebox.showerror('Error', 'Unknown error during sensitivity analysis.')
         else:
             tk.messagebox.showerror('Error', 'All required objects must be created before running sensitivity analysis.')
             return False
     
+    #Updates the sensitivity results once the sensitivity analysis thread is done
+    def sensitivity_finished(self, variable_name, status, results, cancelled, run_time):
+        if status == 'Error':
+            tk.messagebox.showerror('Error', 'Unknown error during sensitivity analysis.')
+        elif len(results) == 0:
+            tk.messagebox.showinfo('Cancelled', 'The sensitivity analysis was cancelled before the first value was complete.')
+        else:
+            self.sens_results = results
+            self.saved_sim_results.add_df(self.sens_results)
+            self.get_frame(EnumeratePage).sensitivity_complete(variable_name)
+            if cancelled:
+                tk.messagebox.showinfo('Cancelled', 'The sensitivity analysis was cancelled, the results of the completed values are shown.')
+            else:
+                tk.messagebox.showinfo("Success", "Successfully conducted sensitivity analysis")
+    
     #Checks if all of the required objects have been created for the SMH Project object
     def check_complete(self):
         if type(self.costs) == list:
@@ -301,7 +312,7 @@ class tkinterApp():
         canvas_width = event.width
         self.canvas.itemconfig(self.canvas_frame, width=canvas_width)
     def show_frame(self, cont): 
-        frame = self.frames[cont] 
+        frame = self.get_frame(cont) 
         frame.tkraise() 
         self.canvas.yview_moveto(0) #Resets view to top on frame switch
     def _on_mousewheel(self, event):
@@ -315,41 +326,70 @@ class tkinterApp():
         self.master.config(cursor="")
         self.master.update() 
       
-    #Update functions
+    #Returns the frame of a page, creating the page the first time
+    def get_frame(self, cont):
+        if cont not in self.frames:
+            frame = cont(self.mainframe, self) 
+            self.frames[cont] = frame  
+            frame.grid(row = 0, column = 0, sticky ="nsew", padx=2.5, pady=5) 
+            frame.grid_columnconfigure(0, weight=1)
+            #The module libraries are created from the current inputs, but the other pages are only filled in by the update functions
+            if (cont in [EnumeratePage, OptimizePage]) and (len(self.mod_lib.all_mods_list) + len(self.mod_lib.screens_list) > 0):
+                frame.update_mod_select_frame()
+            elif (cont == SitePage) and (self.site is not None):
+                frame.site_added()
+            elif (cont == CostsPage) and (self.costs is not None):
+                frame.costs_added()
+            elif (cont == PreferencesPage) and (self.preferences is not None):
+                frame.preferences_added()
+            elif (cont == FishPage) and (len(self.species_list) > 0):
+                frame.species_updated()
+        return self.frames[cont]
+    
+    #Update functions - pages that have not been created yet are skipped, since they are created with the current inputs
     def mods_added(self):
-        self.frames[AddModulePage].mod_lib_frame.update()
-        self.frames[AddDynamicModulePage].mod_lib_frame.update()
-        self.frames[EnumeratePage].update_mod_select_frame()
-        self.frames[OptimizePage].update_mod_select_frame()
-        self.frames[FishPage].update_fish_eff_frame()
-        self.frames[AddScreenPage].update_cover_mod_frame()
-        self.frames[OptimizePage].constraints_frame.pack_con_input_frame()
+        if AddModulePage in self.frames:
+            self.frames[AddModulePage].mod_lib_frame.update()
+        if AddDynamicModulePage in self.frames:
+            self.frames[AddDynamicModulePage].mod_lib_frame.update()
+        if EnumeratePage in self.frames:
+            self.frames[EnumeratePage].update_mod_select_frame()
+        if OptimizePage in self.frames:
+            self.frames[OptimizePage].update_mod_select_frame()
+            self.frames[OptimizePage].constraints_frame.pack_con_input_frame()
+        if FishPage in self.frames:
+            self.frames[FishPage].update_fish_eff_frame()
+        if AddScreenPage in self.frames:
+            self.frames[AddScreenPage].update_cover_mod_frame()
     def site_added(self):
-        self.frames[SitePage].site_added()
+        if SitePage in self.frames:
+            self.frames[SitePage].site_added()
     def costs_added(self):
-        self.frames[CostsPage].costs_added()
+        if CostsPage in self.frames:
+            self.frames[CostsPage].costs_added()
     def species_added(self):
-        self.frames[FishPage].species_updated()
+        if FishPage in self.frames:
+            self.frames[FishPage].species_updated()
     def preferences_added(self):
-        self.frames[PreferencesPage].preferences_added()
+        if PreferencesPage in self.frames:
+            self.frames[PreferencesPage].preferences_added()
     def screen_added(self):
-        self.frames[EnumeratePage].update_mod_select_frame()
-        self.frames[FishPage].update_fish_eff_frame()
-        self.frames[AddScreenPage].update_cover_mod_frame()
-        self.frames[AddScreenPage].screen_lib.update()        
-        self.frames[OptimizePage].constraints_frame.pack_con_input_frame()
+        if EnumeratePage in self.frames:
+            self.frames[EnumeratePage].update_mod_select_frame()
+        if FishPage in self.frames:
+            self.frames[FishPage].update_fish_eff_frame()
+        if AddScreenPage in self.frames:
+            self.frames[AddScreenPage].update_cover_mod_frame()
+            self.frames[AddScreenPage].screen_lib.update()        
+        if OptimizePage in self.frames:
+            self.frames[OptimizePage].constraints_frame.pack_con_input_frame()
     def dynamic_updated(self):
         self.mod_lib.update()
         self.mods_added()
     def save_run(self, sim_res_dict, run_name):
-        temp_df = pd.DataFrame.from_dict(sim_res_dict, orient='index', columns=[run_name]).reset_index()
-        temp_df.rename(columns={'index':'Metric'},inplace=True)
-        if len(self.saved_sim_results) <= 0:
-            self.saved_sim_results = temp_df
-        else:
-            self.saved_sim_results = pd.merge(self.saved_sim_results, temp_df, on='Metric', sort=False, how='outer')
+        self.saved_sim_results.add_run(run_name, sim_res_dict)
     def clear_runs(self):
-        self.saved_sim_results = []
+        self.saved_sim_results.clear()
             
 
 #%%## SURROUNDING TKINTER CLASSES
@@ -372,8 +412,8 @@ class SideBar(tk.Frame):
         btn_pad_y = 5
         self.buttons = []
         i = 0
-        for F in controller.frames:
-            new_button = tk.Button(self, bg='white',width=15, text=controller.frames[F].page_name, command = lambda x=F:controller.show_frame(x))
+        for F in controller.pages:
+            new_button = tk.Button(self, bg='white',width=15, text=controller.page_names[F], command = lambda x=F:controller.show_frame(x))
             new_button.grid(row=i, column=0, padx=btn_pad_x, pady=btn_pad_y)
             self.buttons.append(new_button)
             i = i + 1
@@ -554,7 +594,7 @@ class inflowFrame(tk.Frame):
         self.fig_var.trace('w', self.on_option_switch)
         self.fig_menu = tk.OptionMenu(self.right_frame, self.fig_var, *self.fig_options)
         self.table_btn = tk.Button(self.right_frame,text='View Table', font=TEXT_FONT, command=lambda:self.view_table())
-        self.canvas_fig = FigureCanvasTkAgg(self.fig, master=self)
+        self.canvas_fig = backend_tkagg.FigureCanvasTkAgg(self.fig, master=self)
         self.pop_btn = tk.Button(self.right_frame, text='Pop-out Figure', font=TEXT_FONT, command=lambda:self.pop_figure())
         self.Qfind_frame = QFinderFrame(self, self.controller, self.flow_data)
         
@@ -746,7 +786,7 @@ class peakFrame(tk.Frame):
             self.right_frame = tk.Frame(self, bg=FRAME_BG_COLOR)
             self.right_frame.columnconfigure((0), weight=1)
             self.export_btn = tk.Button(self.right_frame,text='View Table', font=TEXT_FONT, command=lambda:self.export_data())
-            self.canvas_fig = FigureCanvasTkAgg(self.fig, master=self)
+            self.canvas_fig = backend_tkagg.FigureCanvasTkAgg(self.fig, master=self)
             self.pop_btn = tk.Button(self.right_frame, text='Pop-out Figure', font=TEXT_FONT, command=lambda:self.pop_figure())
             
             self.canvas_fig.get_tk_widget().grid(row=1, column=0, columnspan=2, padx=0, pady=5, sticky='nsew')
@@ -1994,7 +2034,8 @@ class PreferencesPage(tk.Frame):
         self.input_dict = {'Normal Operating Level': [['text entry'], 'ft', [float], [], False], \
                           'Test Data Start Date': [['text entry'], '(YYYY-MM-DD)', [str], [], False], \
                           'Test Data End Date': [['text entry'], '(YYYY-MM-DD)', [str], [], False], \
-                          'Generation Dispatch Mode': [['OptionMenu', ['Design Ramping', 'Peak Ramping', 'Simple Greedy', 'Advanced Greedy']], '', [], [], False], \
+                          'Generation Dispatch Mode': [['OptionMenu', ['Design Ramping', 'Peak Ramping', 'Simple Greedy', 'Advanced Greedy', 'Dynamic Programming']], '', [], [], False], \
+                          'Simulation Engine': [['OptionMenu', ['Daily Loop', 'Vectorized']], '', [], [], False], \
                           'Allow Turbine Over-run': [['checkbox', 'Y/N'],'', [], [], False], \
                           'Spillway Notch Flow': [['text entry'], 'cfs', [float], [], True], \
                           'Spillway Minimum Flow': [['text entry'], ['cfs (Constant)', '% (Percent of inflow)'], [float], [], True]}
@@ -2003,6 +2044,7 @@ class PreferencesPage(tk.Frame):
         self.att_labels, self.att_entries, self.att_units, self.att_tools, self.input_vars = create_inputs(self, self.att_frame, self.input_dict, self.entry_width)
         self.att_units['Spillway Minimum Flow'].config(width=15)
         self.att_entries['Generation Dispatch Mode'].config(width=self.entry_width)
+        self.att_entries['Simulation Engine'].config(width=self.entry_width)
         self.rank_frame = tk.Frame(self, bg=FRAME_BG_COLOR)
         self.rank_directions_lbl = tk.Label(self.rank_frame, text = 'Rank the module classes in terms of operational priority\n (1-first to turn on, 5-last to turn on)', font=TEXT_FONT, bg=SUBTITLE_BG_COLOR)
         
@@ -2069,7 +2111,7 @@ class PreferencesPage(tk.Frame):
         
         self.controller.preferences = mc.Facility_preferences(op_ranks, ad['Normal Operating Level'], \
                                                               ad['Test Data Start Date'], ad['Test Data End Date'], \
-                                                                  ad['Allow Turbine Over-run'], ad['Spillway Minimum Flow'], self.input_vars['Spillway Minimum Flow'].get(), ad['Spillway Notch Flow'], ad['Generation Dispatch Mode'])
+                                                                  ad['Allow Turbine Over-run'], ad['Spillway Minimum Flow'], self.input_vars['Spillway Minimum Flow'].get(), ad['Spillway Notch Flow'], ad['Generation Dispatch Mode'], ad['Simulation Engine'])
         tk.messagebox.showinfo('Success', 'Successfully added preferences.')
         self.controller.preferences_added()
         
@@ -2117,6 +2159,9 @@ class EnumeratePage(tk.Frame):
         self.modselect_frame = tk.Label(self,text='No modules have been created.', font=TEXT_FONT, bg=FRAME_BG_COLOR) #This modselect_frame starts as a label and is updated to a ModuleSelectFrame when modules are added              
         self.run_frame = tk.Frame(self, bg=FRAME_BG_COLOR)
         self.show_anim_chk = tk.Checkbutton(self.run_frame, text='Show Iterations', variable=self.show_anim_var,  onvalue=1, width=12, anchor='c', padx=3, bg=CHECK_BG_COLOR)
+        self.executor_var = tk.StringVar()
+        self.executor_var.set('Serial')
+        self.executor_menu = tk.OptionMenu(self.run_frame, self.executor_var, *['Serial', 'Thread Pool', 'Process Pool']) #Process Pool simulates chunks of the enumeration in parallel using separate processes
         self.submit_btn = tk.Button(self.run_frame, text='Run Enumeration',font=TEXT_FONT, command=lambda:self.run_enumeration())
         self.sensi_btn = tk.Button(self.run_frame, text='Run Sensitivity Analysis', font=TEXT_FONT, command=lambda:self.run_sensitivity())
         self.sim_results_lbl = tk.Label(self, text ='Simulation Results', font = SUBTITLE_FONT, bg=SUBTITLE_BG_COLOR) 
@@ -2141,10 +2186,11 @@ class EnumeratePage(tk.Frame):
         self.sim_results.grid(row=10, column=0, columnspan=2, sticky='nsew')
         
         #In run_frame
-        self.run_frame.columnconfigure((0,1,2), weight=1)
+        self.run_frame.columnconfigure((0,1,2,3), weight=1)
         self.show_anim_chk.grid(row=0, column=0, padx=5, pady=5, sticky='nse')
-        self.submit_btn.grid(row=0, column=1, padx=5, pady=5, sticky='nsw')
-        self.sensi_btn.grid(row=0, column=2, padx=5, pady=5, sticky='nsw')
+        self.executor_menu.grid(row=0, column=1, padx=5, pady=5, sticky='nsew')
+        self.submit_btn.grid(row=0, column=2, padx=5, pady=5, sticky='nsw')
+        self.sensi_btn.grid(row=0, column=3, padx=5, pady=5, sticky='nsw')
         
     #Opens the sensitivity analaysis frame in a pop-up window
     def run_sensitivity(self):
@@ -2175,7 +2221,7 @@ class EnumeratePage(tk.Frame):
             show_anim = True
         else:
             show_anim = False
-        return objective, enum_lists, save_bools, show_anim
+        return objective, enum_lists, save_bools, show_anim, self.executor_var.get()
     
     #Runs the enumeration through the controller class
     def run_enumeration(self):
@@ -2477,7 +2523,7 @@ class SensitivityResultsFrame(tk.Frame):
         self.btn_frame = tk.Frame(self, bg=FRAME_BG_COLOR)
         self.menu_lbl = tk.Label(self.btn_frame, text='Select a Variable to Plot', font=TEXT_FONT, bg=FRAME_BG_COLOR, wraplength = 250)
         self.y_menu = tk.OptionMenu(self.btn_frame, self.y_var, *self.y_opts)
-        self.figure_canvas = FigureCanvasTkAgg(self.fig, master=self.fig_frame)
+        self.figure_canvas = backend_tkagg.FigureCanvasTkAgg(self.fig, master=self.fig_frame)
         self.pop_out_btn = tk.Button(self.btn_frame, text='Pop-out Figure', font=TEXT_FONT, command=lambda: self.pop_figure())
         self.view_tbl_btn = tk.Button(self.btn_frame, text='View Table', font=TEXT_FONT, command=lambda: self.view_table())
         
@@ -3056,7 +3102,7 @@ class OptimizePage(tk.Frame):
 
     #Gather the inputs, error check, and run the optimization function through the controller 
     def run_optimization(self, msg_off=False):
-        vals = self.genetic_frame.get_parameters() # vals = [iterations, pop_size, best_num, mut_num, random_num, cross_num]
+        vals = self.genetic_frame.get_parameters() # vals = [iterations, pop_size, best_num, mut_num, random_num, cross_num, executor]
         if vals is False:
             tk.messagebox.showerror('Error', 'Make sure genetic algorithm parameters are input properly. The best, mutation, and random inputs must sum to the population size. The best parameter must be greater than 0.')
             return
@@ -3118,6 +3164,10 @@ class GeneticParametersFrame(tk.Frame):
         self.random_entry = ttk.Entry(self, width=self.entry_width)
         self.cross_lbl = tk.Label(self, text = 'Number of Cross-overs:', font =TEXT_FONT, bg=LABEL_BG_COLOR)
         self.cross_entry = ttk.Entry(self, width=self.entry_width)
+        self.executor_lbl = tk.Label(self, text = 'Evaluation Executor:', font =TEXT_FONT, bg=LABEL_BG_COLOR)
+        self.executor_var = tk.StringVar()
+        self.executor_menu = tk.OptionMenu(self, self.executor_var, *['Serial', 'Thread Pool', 'Process Pool']) #Process Pool evaluates the population in parallel using separate processes
+        self.executor_menu.config(width=self.entry_width)
 
         self.entry_list = [self.iteration_entry, self.population_entry,self.best_entry, self.mutate_entry, self.random_entry, self.cross_entry]
         self.pack_attributes()
@@ -3139,7 +3189,7 @@ class GeneticParametersFrame(tk.Frame):
         if best_num <=0:
             return False
     
-        return iterations, pop_size, best_num, mut_num, random_num, cross_num
+        return iterations, pop_size, best_num, mut_num, random_num, cross_num, self.executor_var.get()
         
     #Insert default values
     def default_entries(self):
@@ -3149,6 +3199,7 @@ class GeneticParametersFrame(tk.Frame):
         self.mutate_entry.insert(0, '3')
         self.random_entry.insert(0, '3')
         self.cross_entry.insert(0, '3')
+        self.executor_var.set('Serial')
         
     #Place labels and entries
     def pack_attributes(self):
@@ -3165,6 +3216,8 @@ class GeneticParametersFrame(tk.Frame):
         self.random_entry.grid(row=5, column=1, columnspan=1, sticky='nsw', pady=5)
         self.cross_lbl.grid(row=6, column=0, columnspan=1, sticky='nse', pady=5)
         self.cross_entry.grid(row=6, column=1, columnspan=1, sticky='nsw', pady=5)
+        self.executor_lbl.grid(row=7, column=0, columnspan=1, sticky='nse', pady=5)
+        self.executor_menu.grid(row=7, column=1, columnspan=1, sticky='nsw', pady=5)
 
 #Frame that lets the user select an objective function metric
 class ObjectiveSelectFrame(tk.Frame):
@@ -3735,7 +3788,9 @@ class SupportToolWindow(tk.Toplevel):
         elif att == 'Spillway Minimum Flow':
             self.att_frame(att, 'Numeric', 'The flow requirement that must be passed downstream over the spillway to meet minimum flow requirements.', add_desc='The value is optional and can be set at constant flow or at a percent of the inflow. During simulation the flow will be allocated to the spillway prior to operation of any other modules. Any spillway notch flows also count towards this minimum flow constraint. Currently these minimum flows can only be passed through the spillway, although we recommend setting a high priority for another module if you wish to pass minimum flows through another module.', unit='cfs')
         elif att == 'Generation Dispatch Mode':
-            self.att_frame(att, 'Option Menu', 'The method used to allocate flow between the generation modules.', add_desc='Design Flow - turbines are ramped from smallest to largest. When flow is available, modules are ramped to the design flow before turning on the next module. This method is the fastest and is best  used when peak efficiencies occur at the design flow.\nPeak Efficiency - turbines are ramped from smallest to largest. When flow is available, modules are ramped to the peak efficiency flow before ramping the next module. Once all modules are ramped to the peak efficiency, then they are ramped to the design flow. This method is between the other two in terms of speed and should be used for turbines where the peak efficiency is not close to the design flow (e.g., Kaplan turbines).\nGreedy - a greedy algorithm is used to determine the distribution of flows across modules. This method is the slowest method and should be used when using modules of different sizes.')
+            self.att_frame(att, 'Option Menu', 'The method used to allocate flow between the generation modules.', add_desc='Design Flow - turbines are ramped from smallest to largest. When flow is available, modules are ramped to the design flow before turning on the next module. This method is the fastest and is best  used when peak efficiencies occur at the design flow.\nPeak Efficiency - turbines are ramped from smallest to largest. When flow is available, modules are ramped to the peak efficiency flow before ramping the next module. Once all modules are ramped to the peak efficiency, then they are ramped to the design flow. This method is between the other two in terms of speed and should be used for turbines where the peak efficiency is not close to the design flow (e.g., Kaplan turbines).\nGreedy - a greedy algorithm is used to determine the distribution of flows across modules. This method is the slowest method and should be used when using modules of different sizes.\nDynamic Programming - dynamic programming is used to find the distribution of flows across modules that maximizes the flow times the efficiency for every whole cfs of available flow. This method finds the optimal distribution for modules of any size and is faster than the greedy methods for facilities with many modules.')
+        elif att == 'Simulation Engine':
+            self.att_frame(att, 'Option Menu', 'The method used to simulate the daily facility operation.', add_desc='Daily Loop - the flow allocation is calculated one day at a time.\nVectorized - the daily inputs are calculated as arrays and the flow allocation is calculated for all days at once, which is faster for long flow records. Days where the headwater changes with operation and cannot be resolved at once are simulated one day at a time. Both methods produce the same flow allocations.')
         elif att == 'LCOE ($/MWh)':
             self.att_frame(att, 'Checkbox', 'LCOE stands for levlized cost of energy, which is the lifetime discounted costs of the project divided by the discounted annual energy generation.',add_desc='This is the recommended objective metric because it factors both energy and annual costs without consideration for the energy price. Conventional hydropower and other renewables target LCOEs around $40/MWh',unit='$/MWh')
         elif att == 'NPV ($)':
@@ -3838,7 +3893,7 @@ class AttractionEfficiencyModel(tk.Toplevel):
         self.myframe.columnconfigure((0,1,2,3), weight=1)
         self.myframe.pack(fill='x', expand=True)
           
-        self.canvas_fig = FigureCanvasTkAgg(self.fig, master=self.myframe)
+        self.canvas_fig = backend_tkagg.FigureCanvasTkAgg(self.fig, master=self.myframe)
         self.title_lbl = tk.Label(self.myframe, text='Attraction Efficiency Model', font=SUBTITLE_FONT, bg=SUBTITLE_BG_COLOR)
         self.directions_lbl = tk.Label(self.myframe, text='This is a novel model that aims to quantify the attraction efficiency of a module based on the module relative discharge. A common problem for fishways are insufficient attraction flows. Fish tend to follow bulk flows to follow the mainstem river, so without sufficient flow, fish may be unable to find the fishway entrance. This model frames attraction efficiency as a sigmoid curve or step function that penalizes attraction whenever the module relative discharge is below a user-defined threshold. The following parameters determine the shape of the attraction efficiency curve. Design manuals recommedn between 5-10% relative discharge thresholds to minimize attraction efficiency losses.', font=TEXT_FONT, bg=DIRECTIONS_BG_COLOR, wraplength=self.parent.wrap_length, justify='left')
         self.update_btn = tk.Button(self.myframe, text='Update', font=TEXT_FONT, command=lambda:self.update())
@@ -3921,7 +3976,7 @@ class GeoReservoirModel(tk.Toplevel):
         self.myframe.columnconfigure((0,1,2,3), weight=1)
         self.myframe.pack(fill='x', expand=True)
           
-        self.canvas_fig = FigureCanvasTkAgg(self.fig, master=self.myframe)
+        self.canvas_fig = backend_tkagg.FigureCanvasTkAgg(self.fig, master=self.myframe)
         
         self.title_lbl = tk.Label(self.myframe, text='Geometric Reservoir Model', font=SUBTITLE_FONT, bg=SUBTITLE_BG_COLOR)
         self.directions_lbl = tk.Label(self.myframe, text='This model based on Lawrence and Cascio (2004) uses a simple geometric approach to stage-storage models. This model assumes the reservoir is similar to a triangular pyramid whose base is the dam cross section and extends upstream. The model uses the stream width at the dam axis, the average stream slope, and a geometric coefficient that determines how quickly the reservoir narrows. The geometric coefficient should range between 0.5 to 0.16 with a recommended value of 0.26. Larger coefficients represent larger volume to stage ratios.', font=TEXT_FONT, bg=DIRECTIONS_BG_COLOR, wraplength=self.parent.wrap_length, justify='left')
@@ -4166,7 +4221,7 @@ class SedEntrainModel(tk.Toplevel):
         Qs, Ps = af.calc_entrainment_eq(slope, size, stage_eq)
         self.rec_flow = af.linear_interpolation(prob, Ps, Qs)
         self.fig, self.ax = self.plot_entrain_fig(Qs, Ps, prob)
-        self.figure_canvas = FigureCanvasTkAgg(self.fig, master=self.myframe)
+        self.figure_canvas = backend_tkagg.FigureCanvasTkAgg(self.fig, master=self.myframe)
         self.figure_canvas.get_tk_widget().grid(row=8, column=0, columnspan=4, sticky='nsew')
         self.figure_canvas.draw()
         
@@ -4222,6 +4277,86 @@ class busywindow(tk.Toplevel):
         self.l.pack()
     def cleanup(self):
         self.destroy()
+
+#%%## Progress Window
+#Creates a toplevel that runs a model function in a model thread, shows the progress, and can cancel the run
+#complete_fxn is called with (status, results, cancelled, run time) once the thread is done, status is 'Complete' or 'Error'
+class progressWindow(tk.Toplevel):
+    def __init__(self, controller, title, fxn, args, kwargs, complete_fxn, show_anim=False):
+        tk.Toplevel.__init__(self)
+        self.controller = controller
+        self.page_name = 'Progress Window'
+        self.complete_fxn = complete_fxn
+        self.show_anim = show_anim #Plots the best facility when it changes
+        self.anim_fac = None
+        self.fig = None
+        self.ax = None
+        self.title(title)
+        
+        self.myframe = tk.Frame(self, bg=FRAME_BG_COLOR)
+        self.myframe.pack(fill='both')
+        self.page_title = tk.Label(self.myframe, text=title + ' in progress', font=TEXT_FONT, bg=SUBTITLE_BG_COLOR)
+        self.progress_bar = ttk.Progressbar(self.myframe, orient='horizontal', length=400, mode='determinate')
+        self.count_lbl = tk.Label(self.myframe, text='Starting...', font=TEXT_FONT, bg=LABEL_BG_COLOR)
+        self.best_lbl = tk.Label(self.myframe, text='Best objective: -', font=TEXT_FONT, bg=LABEL_BG_COLOR)
+        self.time_lbl = tk.Label(self.myframe, text='Elapsed: - Remaining: -', font=TEXT_FONT, bg=LABEL_BG_COLOR)
+        self.cancel_btn = tk.Button(self.myframe, text='Cancel', width=15, font=TEXT_FONT, command=lambda:self.cancel())
+        
+        self.page_title.grid(row=0, column=0, sticky='nsew', pady=5)
+        self.progress_bar.grid(row=1, column=0, sticky='nsew', padx=5, pady=5)
+        self.count_lbl.grid(row=2, column=0, sticky='nsew', padx=5)
+        self.best_lbl.grid(row=3, column=0, sticky='nsew', padx=5)
+        self.time_lbl.grid(row=4, column=0, sticky='nsew', padx=5)
+        self.cancel_btn.grid(row=5, column=0, padx=5, pady=5)
+        self.protocol('WM_DELETE_WINDOW', self.cancel)
+        self.grab_set() #The other windows are disabled while the model is running so the inputs are not changed
+        
+        self.results_queue = queue.Queue()
+        self.start_time = time.perf_counter()
+        self.workThread = modelThread(fxn, args, kwargs, self.results_queue)
+        self.workThread.start()
+        self.controller.master.after(100, self.thread_loop)
+    
+    #Stops the run between evaluations, the results that are complete are returned by the model function
+    def cancel(self):
+        self.workThread.cancel_event.set()
+        self.cancel_btn.config(text='Cancelling...', state='disabled')
+    
+    #Updates the window with the progress in the queue and calls the complete function once the thread is done
+    def thread_loop(self):
+        progress = None
+        while not self.results_queue.empty():
+            status, vals = self.results_queue.get()
+            if status == 'Progress': #Only the latest progress is shown
+                progress = vals
+            else:
+                run_time = time.perf_counter() - self.start_time
+                self.cleanup()
+                self.complete_fxn(status, vals, self.workThread.cancel_event.is_set(), run_time)
+                return
+        if progress is not None:
+            self.update_progress(progress)
+        self.controller.master.after(100, self.thread_loop)
+    
+    #Updates the labels and progress bar with a progress dict from RunProgress
+    def update_progress(self, progress):
+        self.page_title.config(text=progress['Stage'] + ' in progress')
+        if progress['Total'] > 0:
+            self.progress_bar['value'] = 100 * progress['Completed'] / progress['Total']
+        self.count_lbl.config(text='Completed {} of {} evaluations'.format(progress['Completed'], progress['Total']))
+        if progress['Best Objective'] is not None:
+            self.best_lbl.config(text='Best {}: {}'.format(progress['Objective'], styles.format_value(progress['Best Objective'], 'round-2')))
+        remaining = '-'
+        if progress['Remaining (s)'] is not None:
+            remaining = format_seconds(progress['Remaining (s)'])
+        self.time_lbl.config(text='Elapsed: {}   Remaining: {}'.format(format_seconds(progress['Elapsed (s)']), remaining))
+        if self.show_anim and (progress['Best Facility'] is not None) and (progress['Best Facility'] is not self.anim_fac):
+            self.anim_fac = progress['Best Facility']
+            self.fig, self.ax = self.anim_fac.plot_facility(fig=self.fig, ax=self.ax, it=progress['Completed'], obj=self.anim_fac.get_latest_objective(progress['Objective'], formatted=True))
+    
+    def cleanup(self):
+        self.grab_release()
+        self.destroy()
         
 #%%###Equation Add Frame - Frame that lets the user choose if they want to add an equation, then view or edit once it has been entered
 class EquationAddFrame(tk.Frame):
@@ -4578,7 +4713,7 @@ class FacilityFrame(tk.Frame):
         self.fac = fac
         
         self.fig, self.ax = self.fac.plot_facility(hide=True)
-        self.canvas_fig = FigureCanvasTkAgg(self.fig, master=self)
+        self.canvas_fig = backend_tkagg.FigureCanvasTkAgg(self.fig, master=self)
         self.right_frame = tk.Frame(self, bg=FRAME_BG_COLOR)
         self.view_btn = tk.Button(self.right_frame, text='View Specifications',font=TEXT_FONT, command=lambda:self.view_data())
         
@@ -4599,6 +4734,7 @@ class SimResultsFrame(tk.Frame):
         self.columnconfigure((0,1,2,3), weight=1)
         self.page_name = 'ResultsFrame'        
         self.res = sim_results
+        self.res.calc_all_metrics() #Optimization results only have the objective metrics, so the full results are calculated before they are shown
         self.btn_width = 20
         
         self.default_save_bools = [True, False, False, False, False, False]
@@ -4609,7 +4745,7 @@ class SimResultsFrame(tk.Frame):
         self.view_var = tk.StringVar()
         self.fig, self.ax = self.res.get_holistic_perf_plot(hide=True)
         self.canvas_frame=tk.Frame(self, bg=FRAME_BG_COLOR)
-        self.canvas_fig = FigureCanvasTkAgg(self.fig, self.canvas_frame)        
+        self.canvas_fig = backend_tkagg.FigureCanvasTkAgg(self.fig, self.canvas_frame)        
         self.view_lbl = tk.Label(self, text='Select a results view:', font=TEXT_FONT, bg=FRAME_BG_COLOR)
         self.view_menu = tk.OptionMenu(self, self.view_var, *self.view_opts)
         self.view_var.trace('w', self.change_view)
@@ -4654,7 +4790,7 @@ class SimResultsFrame(tk.Frame):
             tk.messagebox.showerror('Error', 'There are no saved runs. Please use the save run button to save the current run.')
             return
         else:
-            Tableviewer(self,self.controller, self.controller.saved_sim_results)
+            Tableviewer(self,self.controller, self.controller.saved_sim_results.get_df())
     
     #Export the table of runs via a tableviewer
     def export_runs(self):
@@ -4662,7 +4798,7 @@ class SimResultsFrame(tk.Frame):
             tk.messagebox.showerror('Error', 'There are no saved runs. Please use the save run button to save the current run.')
             return
         else:
-            csvExportWindow(self,self.controller, self.controller.saved_sim_results)
+            csvExportWindow(self,self.controller, self.controller.saved_sim_results.get_df())
 
     #Delete all runs from the save table
     def clear_runs(self):
@@ -4779,7 +4915,7 @@ class SaveRunWindow(tk.Toplevel):
         if len(self.controller.saved_sim_results) == 0:
             self.name_entry.insert(0, 'Run 1')
         else:
-            self.name_entry.insert(0, 'Run ' + str(len(self.controller.saved_sim_results.columns)))
+            self.name_entry.insert(0, 'Run ' + str(len(self.controller.saved_sim_results) + 1))
         
     #Save the selected data to the simulation table in the parent frame
     def save_run_press(self):
@@ -4868,10 +5004,10 @@ class AnimationWindow(tk.Toplevel):
         self.desc_head_lbl = tk.Label(self.desc_frame, text='Statistics', font=SUBTITLE_FONT, bg=SUBTITLE_BG_COLOR)
         self.desc_lbl = tk.Label(self.desc_frame, textvariable=self.desc_var, font=TEXT_FONT, bg=FRAME_BG_COLOR, justify='left')
 
-        self.profile_canvas = FigureCanvasTkAgg(self.profile_fig, self)
-        self.allo_canvas = FigureCanvasTkAgg(self.allo_fig, self)
-        self.flow_series_canvas = FigureCanvasTkAgg(self.flow_series_fig, self)
-        self.legend_canvas = FigureCanvasTkAgg(self.legend_fig, self)
+        self.profile_canvas = backend_tkagg.FigureCanvasTkAgg(self.profile_fig, self)
+        self.allo_canvas = backend_tkagg.FigureCanvasTkAgg(self.allo_fig, self)
+        self.flow_series_canvas = backend_tkagg.FigureCanvasTkAgg(self.flow_series_fig, self)
+        self.legend_canvas = backend_tkagg.FigureCanvasTkAgg(self.legend_fig, self)
         
         self.scale_lbl = tk.Label(self, text='Select a timestep using the slider or press Play', font=SUBTITLE_FONT, bg=SUBTITLE_BG_COLOR)
         self.time_scale = tk.Scale(self, from_=1, to=len(self.sim_res.inflows), tickinterval=round(len(self.sim_res.inflows)/30), orient='horizontal', variable=self.scale_var)
@@ -5181,7 +5317,7 @@ class csvExportWindow(tk.Toplevel):
         path = os.getcwd()+ '/' +file_name
         if self.check_file_exists(file_name):
             try:
-                book = load_workbook(path)
+                book = openpyxl.load_workbook(path)
                 writer = pd.ExcelWriter(path, engine='openpyxl')
                 writer.book = book
                 self.df.to_excel(writer, index=True, sheet_name=sheet_name)
@@ -5230,6 +5366,25 @@ class dataThread(threading.Thread):
             elif data_type == 'Peak':
                 self.results_queue.put([af.get_peak_USGS_data(station, show_dialogue=self.show_dialogue), 'Peak'])
 
+#%%## MODEL THREAD CLASS - Runs a model function (enumeration, optimization, sensitivity analysis) so that the window stays responsive
+class modelThread(threading.Thread):
+    def __init__(self, fxn, args, kwargs, rqueue):
+        threading.Thread.__init__(self)
+        self.fxn = fxn
+        self.args = args
+        self.kwargs = kwargs
+        self.results_queue = rqueue #Receives ['Progress', progress dict] during the run, then ['Complete', results] or ['Error', error message]
+        self.cancel_event = threading.Event()
+        self.daemon = True
+    #Runs the model function with a progress callback that puts the progress in the results queue
+    def run(self):
+        try:
+            results = self.fxn(*self.args, progress_callback=lambda progress: self.results_queue.put(['Progress', progress]), cancel_event=self.cancel_event, **self.kwargs)
+            self.results_queue.put(['Complete', results])
+        except:
+            traceback.print_exc()
+            self.results_queue.put(['Error', traceback.format_exc()])
+
      
 # AUTOMATED DATA RETRIEVAL FRAME - Creates a TopLevel for automatically getting USGS data
 class autodataFrame(tk.Toplevel):
@@ -5336,19 +5491,9 @@ class autodataFrame(tk.Toplevel):
 def callback(url): #Accesses the internet given a url
     webbrowser.open_new(url)
 
-#Checks whether the entry can be properly cast to a given data type and reports 'Error' otherwise
-def check_entry(entry, casts): 
-    val = None
-    for cast in casts:
-        try:
-            val = cast(entry)
-        except (TypeError, ValueError):
-            pass
-        else:
-            break
-    if (val is None) or (val != val):
-        val = 'Error'
-    return val
+def format_seconds(seconds): #Formats a time in seconds as H:MM:SS
+    seconds = int(round(seconds))
+    return '{}:{:02d}:{:02d}'.format(seconds // 3600, (seconds % 3600) // 60, seconds % 60)
 
 #Removes all text from a list of tk.Entry objects
 def clear_entries(entry_list):
@@ -5356,519 +5501,6 @@ def clear_entries(entry_list):
         entry.delete(0, "end")
 
 
-#%%##Import from Workbook Functions
-#Converts the dataframe into an Equation object
-def get_equation_from_df(df): #2 columns, [Attribute,Value]
-    try:
-        eq_name = df.iloc[0, 1]
-        eq_form = df.iloc[1, 1]
-        if eq_form == 'Linear':
-            coeffs = [float(df.iloc[2,1]), float(df.iloc[3,1])]
-        else:
-            coeffs = [float(df.iloc[2,1]), float(df.iloc[3,1]), float(df.iloc[4,1])]
-            
-        x_label = df.iloc[5, 1]
-        y_label = df.iloc[6,1]
-        out_eq = mc.Equation(eq_name, eq_form, coeffs, 'Discharge (cfs)', 'Stage (ft)', x_label, y_label)
-        return out_eq
-    except:
-        return False
-
-#Converts two equation dicts into a piecewise equation
-def get_piecewise(eq_name, eq_dict):
-    try:
-        eq_names = eq_name.split(' + ')
-        eq_list = []
-        range_list = [eq_dict[eq_names[0]].lb]
-        for i in eq_names:
-            eq_list.append(eq_dict[i])
-            range_list.append(eq_dict[i].ub)
-        out_eq = mc.PiecewiseEquation(eq_names[0], eq_list, eq_list[0].xlabel, eq_list[0].ylabel, range_list)
-        return out_eq
-    except:
-        return False
-
-#Creates a module from the dataFrame input
-def import_mod_from_df(df, eq_dict):
-    mod_class = df.iloc[0,1]
-    raw = {}
-    ad = {}
-    mod_attr = get_static_module_attributes(mod_class)
-    row = 1
-    for key in mod_attr.keys(): #Based on input order
-        raw[key] = df.iloc[row,1]
-        row += 1
-    
-    for key in raw.keys():
-        input_type = mod_attr[key][0][0]
-        if raw[key] is np.nan:
-            ad[key] = None
-        else:
-            if input_type == 'text entry':
-                ad[key] = check_entry(raw[key], mod_attr[key][2])
-                if (ad[key] == 'Error') or (ad[key] == ''):
-                    if mod_attr[key][4]: #is_optional
-                        ad[key] = None
-                    else:
-                        return False
-            elif input_type == 'Equation':
-                if raw[key] not in eq_dict.keys():
-                    if mod_attr[key][4]:
-                        ad[key] = None
-                    else:
-                        return False
-                elif ' + ' in raw[key]: #If a piecewise equation
-                    pcwise = get_piecewise(raw[key], eq_dict)
-                    if pcwise is False:
-                        if mod_attr[key][4]:
-                            ad[key] = None
-                        else:
-                            return False
-                else:
-                    ad[key] = eq_dict[raw[key]]
-                    if ad[key] is False:
-                        if mod_attr[key][4]:
-                            ad[key] = None
-                        else:
-                            return False
-            elif input_type == 'OptionMenu':
-                if raw[key] not in mod_attr[key][0][1]:
-                    return False
-                else:
-                    ad[key] = raw[key]
-            elif input_type == 'month box':
-                months = get_month_input(raw[key])
-                if months is not False:
-                    ad[key] = months
-                else:
-                    return False
-            elif input_type == 'checkbox':
-                if raw[key] == 'Y':
-                    ad[key] = True
-                else:
-                    ad[key] = False
-            else:
-                print('input type error')
-                return False
-    
-    mod = create_mod_from_dict(mod_class, ad)
-    return mod
-
-
-#Turns a dict containing all the attribute information into a module object. Checks for optional attributes
-def create_mod_from_dict(mod_class, ad): 
-    out_mod = False
-    try:
-        if mod_class == 'Generation':
-            out_mod = mc.Generation_module(ad['Name'],ad['Capital Cost'], ad['Annual Operating Cost'],\
-                                           ad['Width'], ad['Length'], ad['Design Flow'], ad['Operating Months'], \
-                                               ad['Minimum Operating Flow'],ad['Maximum Operating Flow'],ad['Minimum Operating Head'], \
-                                                  ad['Design Head'], ad['Maximum Operating Head'],ad['Flow Efficiency Curve'], \
-                                                      ad['Head Efficiency Curve'],ad['Max Power'], ad['Cost of Start-Stops'], ad['Instream or Diversion'])    
-    
-        elif mod_class == 'Fish Passage':
-            out_mod = mc.Fish_module(ad['Name'],ad['Capital Cost'], ad['Annual Operating Cost'],\
-                                           ad['Width'], ad['Length'], ad['Design Flow'], ad['Operating Months'], \
-                                               ad['Maximum Headwater Drop'],ad['Maximum Headwater Rise'],\
-                                                   ad['Minimum Tailwater Level'], ad['Maximum Tailwater Level'], ad['Instream or Diversion'])
-            
-        elif mod_class == 'Sediment Passage':
-            if ad['Operating Mode'] == 'Continuous':
-                out_mod = mc.Sediment_module(ad['Name'],ad['Capital Cost'], ad['Annual Operating Cost'],\
-                                               ad['Width'], ad['Length'], ad['Design Flow'], ad['Operating Months'], \
-                                                   ad['Operating Mode'], ad['Instream or Diversion'])
-            elif ad['Operating Mode'] == 'Sluicing':
-                if ad['Operating Flow'] == 'Error':
-                    return False
-                else:
-                    out_mod = mc.Sediment_module(ad['Name'],ad['Capital Cost'], ad['Annual Operating Cost'],\
-                                               ad['Width'], ad['Length'], ad['Design Flow'], ad['Operating Months'], \
-                                                   ad['Operating Mode'], ad['Operating Flow'], ad['Instream or Diversion'])
-            elif ad['Operating Mode'] == 'Flushing':
-                if (ad['Flushing Duration'] == 'Error') or (ad['Operating Frequency'] == 'Error'):
-                    return False
-                else:
-                    out_mod = mc.Sediment_module(ad['Name'],ad['Capital Cost'], ad['Annual Operating Cost'],\
-                                               ad['Width'], ad['Length'], ad['Design Flow'], ad['Operating Months'], \
-                                                   ad['Operating Mode'], ad['Operating Flow'], ad['Flushing Duration'], \
-                                                       ad['Operating Frequency'], ad['Instream or Diversion'])
-        elif mod_class == 'Recreation':
-            out_mod = mc.Recreation_module(ad['Name'],ad['Capital Cost'], ad['Annual Operating Cost'],\
-                                           ad['Width'], ad['Length'], ad['Design Flow'], ad['Operating Months'], \
-                                               ad['Maximum Headwater Drop'],ad['Maximum Headwater Rise'],\
-                                                   ad['Minimum Tailwater Level'], ad['Maximum Tailwater Level'], ad['Instream or Diversion'])
-        elif mod_class == 'Water Passage':
-            if (ad['Operating Mode'] == 'Continuous') or (ad['Operating Mode'] == 'Controlled Spillway'):
-                out_mod = mc.Water_module(ad['Name'],ad['Capital Cost'], ad['Annual Operating Cost'],\
-                                           ad['Width'], ad['Length'], ad['Design Flow'], ad['Operating Months'], \
-                                               ad['Operating Mode'], ad['Instream or Diversion'])
-            elif ad['Operating Mode'] == 'Uncontrolled Spillway':
-                if (ad['Weir Coefficient'] == 'Error') or (ad['Crest Height'] == 'Error'):
-                    return False
-                else:
-                    out_mod = mc.Water_module(ad['Name'],ad['Capital Cost'], ad['Annual Operating Cost'],\
-                                           ad['Width'], ad['Length'], ad['Design Flow'], ad['Operating Months'], \
-                                               ad['Operating Mode'],ad['Weir Coefficient'],ad['Crest Height'], ad['Instream or Diversion'])
-        elif mod_class == 'Non-overflow':
-            out_mod = mc.Nonoverflow_module(ad['Name'],ad['Capital Cost'], ad['Annual Operating Cost'],\
-                                           ad['Width'], ad['Length'])
-        elif mod_class == 'Foundation':
-            out_mod = mc.Foundation_module(ad['Name'],ad['Capital Cost'], ad['Annual Operating Cost'],\
-                                           ad['Width'], ad['Length'])
-        return out_mod
-    except:
-        return False
-
-#Turns the month input string into a list of month index integers
-def get_month_input(entry_str):
-    try:
-        if entry_str == 'all':
-            return [i for i in range(1, 13)]
-        else:
-            month_strs = entry_str.split(',')
-            return [int(i) for i in month_strs]
-    except:
-        return False
-
-#Imports a certain type of information from the waterSHED workbook when given a path name and type of object to import
-def import_from_workbook(path_name, import_type):
-    eq_dict = {}
-    #Get equations
-    try:
-        eq_df = pd.read_excel(path_name, sheet_name='Equations')
-        for c in range(0, int(len(eq_df.columns)/2)):
-            eq = get_equation_from_df(eq_df.iloc[:, 2*c:2*c+2])
-            if eq is not False:
-                eq_dict[eq.name] = eq
-    except:
-        pass
-    
-    all_list = []
-    try: 
-        #For each page in the workbook, create dataframes based on the assumed sheet structure, check for errors, and try to create the respective object
-        if (import_type == 'Site') or (import_type == 'All'):
-            df = pd.read_excel(path_name, sheet_name='Site')
-            
-            char_col = 1
-            name = df.iloc[0,char_col]
-            width = check_entry(df.iloc[1,char_col], [float])
-            elevation = check_entry(df.iloc[2,char_col], [float])
-            slope = check_entry(df.iloc[3,char_col], [float])
-            trap_b = check_entry(df.iloc[4, char_col], [float])
-            
-            
-            optional = [False, False, True, True, True]
-            vals = [name, width,  slope, trap_b,elevation]
-            for i in range(0, len(vals)):
-                if (vals[i] == '') or (vals[i] == 'Error'):
-                    if optional[i] == False:
-                        return 'Unable to interpret a required input'
-                    else:
-                        vals[i] = None
-            
-            stage_eq_name = df.iloc[5, char_col]
-            res_eq_name = df.iloc[6, char_col]
-            
-            if stage_eq_name in eq_dict.keys():    
-                stage_eq = eq_dict[stage_eq_name]
-            elif ' + ' in stage_eq_name:
-                stage_eq = get_piecewise(stage_eq_name, eq_dict)
-                if stage_eq is False:
-                    return 'Unable to identify the stage-discharge equation. Please make sure the equation names match.'                
-            else:
-                return 'Unable to identify the stage-discharge equation. Please make sure the equation names match.'
-            
-            if res_eq_name in eq_dict.keys():
-                res_eq = eq_dict[res_eq_name]
-            else:
-                res_eq = None
-
-            inf_df = pd.read_excel(path_name, sheet_name='Inflows')
-            daily_col = 0
-            daily_df = inf_df.iloc[1:, [daily_col,daily_col+1]]
-            daily_df.columns = ['dateTime', 'Discharge (cfs)']
-            daily_df['Discharge (cfs)'] = pd.to_numeric(daily_df['Discharge (cfs)'], errors='coerce')
-            daily_df['dateTime'] = pd.to_datetime(daily_df['dateTime'], infer_datetime_format=True)
-            daily_df = daily_df.dropna()
-            
-            
-            if len(daily_df) <=0:
-                return 'Unable to import daily flow data which is a required input.'
-            else:
-                daily_flow_data = mc.FlowData('Daily Inflows', daily_df)
-            
-            peak_df = pd.read_excel(path_name, sheet_name='Peak Flows')
-            peak_col = 0
-            peak_df = peak_df.iloc[1:, [peak_col,peak_col+1]]
-            peak_df.columns = ['dateTime', 'Discharge (cfs)']
-            peak_df['Discharge (cfs)'] = pd.to_numeric(peak_df['Discharge (cfs)'], errors='coerce')
-            peak_df['dateTime'] = pd.to_datetime(peak_df['dateTime'], infer_datetime_format=True)
-            peak_df = peak_df.dropna()
-            
-            
-            if len(peak_df)<= 0:
-                peak_flow_data = None
-            else:
-                peak_flow_data = mc.FlowData('Peak Flows', peak_df)
-            
-            out_site = mc.Site(vals[0], vals[1], daily_flow_data, stage_eq, res_eq, vals[2], vals[3], peak_flow_data, vals[4])
-            
-            if import_type == 'All':
-                all_list.append(out_site)
-            else:
-                return out_site
-
-    
-        if (import_type == 'Costs') or (import_type == 'All'):
-
-            df = pd.read_excel(path_name, sheet_name='Costs')
-            row = 0
-            col = 1
-            energy = check_entry(df.iloc[row, col], [float])
-            add_capital = check_entry(df.iloc[row+1, col], [float])
-            add_noncapital = check_entry(df.iloc[row+2, col], [float])
-            excavation = check_entry(df.iloc[row+3, col], [float])
-            overhead = check_entry(df.iloc[row+4, col], [float])
-            overhead_type = df.iloc[row+4, col+2]
-            engineering = check_entry(df.iloc[row+5, col], [float])
-            engineering_type = df.iloc[row+5, col+2]
-            contingency = check_entry(df.iloc[row+6, col], [float])
-            contingency_type = df.iloc[row+6, col+2]
-            om = check_entry(df.iloc[row+7, col], [float])
-            om_type = df.iloc[row+7, col+2]
-            recreation = check_entry(df.iloc[row+8, col], [float])
-            flood = check_entry(df.iloc[row+9, col], [float])
-            discount = check_entry(df.iloc[row+10, col], [float])
-            proj_life = check_entry(df.iloc[row+11, col], [float])
-            
-            for i in [energy, add_capital, add_noncapital, excavation, overhead, engineering, contingency, om, recreation, flood, discount, proj_life]:
-                if (i == '') or (i == 'Error'):
-                    return 'Unable to import cost information. Make sure entries are numeric. Any unused entries, must be set to zero.'
-            
-            for i in [overhead_type, engineering_type, contingency_type, om_type]:
-                if i not in ['($) Total Cost', '(%) Percent of ICC']:
-                    return 'Make sure unit option are either (%) Percent of ICC or ($) Total Cost'
-            
-            out_costs = mc.Cost_tables(energy, excavation_cost=excavation,\
-                        overhead_cost=[overhead, overhead_type], engineering_cost=[engineering, engineering_type],\
-                            contingency_cost=[contingency, contingency_type], recreation_price=recreation,\
-                                flood_price =flood, om_costs=[om,om_type], discount_rate=discount, \
-                                    project_life=proj_life, add_capital=add_capital, add_noncapital=add_noncapital)
-            if import_type == 'All':
-                all_list.append(out_costs)
-            else:
-                return out_costs
-        
-        if (import_type == 'Preferences') or (import_type == 'All'):
-
-            df = pd.read_excel(path_name, sheet_name='Preferences')
-            
-            nol = check_entry(df.iloc[0, 1], [float])
-            if (nol == '') or (nol == 'Error'):
-               return 'Unable to upload normal operating level. Please make sure it is import as a numeric value.'
-           
-            try:
-                start = pd.to_datetime(df.iloc[1, 1])
-                end = pd.to_datetime(df.iloc[2, 1])
-            except:
-                return 'Unable to upload test data start and end dates.'
-            
-            dispatch_mode = df.iloc[3,1]
-            if dispatch_mode not in ['Design Ramping', 'Peak Ramping', 'Simple Greedy', 'Advanced Greedy']:
-                dispatch_mode = 'Design Flow'
-                
-            overrun_input = df.iloc[4, 1]
-            if overrun_input == 'Y':
-                overrun = True
-            else:
-                overrun = False
-            
-            notch_flow = check_entry(df.iloc[5, 1], [float])
-            if (notch_flow == '') or (notch_flow == 'Error'):
-                notch_flow = None
-            min_flow = check_entry(df.iloc[6, 1], [float])
-            if (min_flow == '') or (min_flow == 'Error'):
-                min_flow = None
-            min_flow_type = check_entry(df.iloc[6, 3], [str])
-            if (min_flow_type != 'cfs (Constant)') or (min_flow_type != '% (Percent of inflow)'):
-                min_flow_type = None
-                 
-            op_cls = ['Gen', 'Sed', 'Fish', 'Rec', 'Wat']
-            op_rank = []
-            for rank in range(1, 6):
-                for mod in range(0,5):
-                    mod_rank = df.iloc[mod+8,1]
-                    if mod_rank not in [1,2,3,4,5]:
-                        return 'Unable to import operation priority rankings.'
-                    if mod_rank == rank:
-                        op_rank.append(op_cls[mod])
-            
-            pref = mc.Facility_preferences(op_rank,nol, start, end, overrun, min_flow, min_flow_type, notch_flow, dispatch_mode)
-            if import_type == 'All':
-                all_list.append(pref)
-            else:
-                return pref
-            
-        if (import_type == 'Module Library') or (import_type == 'All'):
-            mod_list = []
-            df = pd.read_excel(path_name, sheet_name='Module Library')
-            for c in range(0, int(len(df.columns)/2)):
-                mod = import_mod_from_df(df.iloc[:,2*c:2*c+2], eq_dict)
-                if mod is not False:    
-                    mod_list.append(mod)
-            if import_type == 'All':
-                all_list.append(mod_list)
-            else:
-                return mod_list     
-    
-        if (import_type == 'Species') or (import_type == 'All'):
-            species_list = []
-            try:
-                df = pd.read_excel(path_name, sheet_name='Species List')
-                for c in range(0, int(len(df.columns)/2)):
-                    col = 2*c + 1
-                    name = check_entry(df.iloc[0, col], [str])
-                    a = check_entry(df.iloc[1, col], [float])
-                    b = check_entry(df.iloc[2, col], [float])
-                    up = get_month_input(check_entry(df.iloc[3, col], [str]))
-                    down = get_month_input(check_entry(df.iloc[4, col], [str]))
-                
-                    spec = mc.Species(name, up, down, a, b)
-                    species_list.append(spec)
-            except:
-                species_list = []
-            if import_type == 'All':
-                all_list.append(species_list)
-            else:
-                return species_list     
-        return all_list
-    except:
-        return 'Unable to import from the watershed workbook. Please double check inputs and that the file is closed.'
-    
-#%%## Static Module Attributes
-#Returns a dict with the attribute and its characteristics for each module class
-#attribute name: [input info], unit, data validate, [support tool names], is_optional boolean
-def get_static_module_attributes(mod_type): 
-    out_dict = {'Name':[['text entry'], '', [str], [], False],\
-                       'Capital Cost':[['text entry'], '$', [float], [], False],\
-                       'Annual Operating Cost':[['text entry'], '$', [float], [], False],\
-                       'Width':[['text entry'], 'ft', [float], [], False],\
-                       'Length':[['text entry'], 'ft', [float], [], False]}
-        
-    if mod_type == 'Foundation':
-        return out_dict
-    elif mod_type == 'Non-overflow':
-        return out_dict
-    else:
-        temp_passage_module_att_dict = {'Design Flow':[['text entry'], 'cfs', [float], [], False], \
-                                'Operating Months':[['month box'], '', [], [], False], \
-                                'Instream or Diversion': [['checkbox', 'Diversion (Y/N)'], '', [], [], False]}
-        out_dict.update(temp_passage_module_att_dict)
-                
-        if (mod_type == 'Fish Passage') or (mod_type == 'Recreation'):
-            fish_and_rec_dict = {'Maximum Headwater Drop':[['text entry'], 'ft', [float], [], True], \
-                             'Maximum Headwater Rise':[['text entry'], 'ft', [float], [], True], \
-                            'Minimum Tailwater Level':[['text entry'], 'ft', [float], [], True], \
-                            'Maximum Tailwater Level':[['text entry'], 'ft', [float], [], True]}
-            out_dict.update(fish_and_rec_dict)
-        elif mod_type == 'Generation':
-            temp_gen_att_dict = {'Minimum Operating Flow':[['text entry'], 'cfs', [float], [], False],\
-                            'Maximum Operating Flow':[['text entry'], 'cfs', [float], [], False],\
-                            'Minimum Operating Head':[['text entry'], 'ft', [float], [], False],\
-                            'Design Head':[['text entry'], 'ft', [float], [], False],\
-                            'Maximum Operating Head':[['text entry'], 'ft', [float], [], False],\
-                            'Flow Efficiency Curve':[['Equation',['Efficiency vs. Flow', 'Flow (cfs)','Turbine Efficiency (%)']], '',[], ['Turbine Flow Efficiency'], False],\
-                            'Head Efficiency Curve':[['Equation',['Efficiency vs. Head Deviation','Relative Head (%)','Turbine Efficiency (%)']], '', [], ['Turbine Head Efficiency'], True],\
-                            'Max Power':[['text entry'], 'kW', [float], [], True],\
-                            'Cost of Start-Stops':[['text entry'], '$/start', [float], [], True]}
-            out_dict.update(temp_gen_att_dict)
-        elif mod_type == 'Sediment Passage':
-            temp_sed_att_dict = {'Operating Mode':[['OptionMenu',['Continuous', 'Sluicing', 'Flushing']], '', [], [], False], \
-                            'Operating Flow':[['text entry'], 'cfs', [float], ['Sluicing Operating Flow'], True], \
-                            'Flushing Duration':[['text entry'], 'days', [int], [], True], \
-                            'Operating Frequency':[['text entry'], 'flushes/year', [int], [], True]}
-            out_dict.update(temp_sed_att_dict)
-        elif mod_type == 'Water Passage':
-            temp_wat_att_dict = {'Operating Mode':[['OptionMenu',['Continuous', 'Controlled Spillway', 'Uncontrolled Spillway']], '', [], [], False], \
-                            'Weir Coefficient':[['text entry'], '(C)', [float], ['Tool Tip - Uncontrolled Spillway'], True], \
-                            'Crest Height':[['text entry'], 'ft', [float], ['Tool Tip - Uncontrolled Spillway'], True]}
-            out_dict.update(temp_wat_att_dict)
-        return out_dict
-    
-# Dynamic Module Attributes
-#Returns the module attributes and available controlling variables for a given module class
-#attribute name: [input info], unit, data validate, [support tool names], is_optional boolean
-def get_dynamic_module_attributes(mod_type): 
-    out_dict = {'Name':[['text entry'], '', [str], [], False],\
-                       'Capital Cost':[['Optional'], '$', [float], [], False],\
-                       'Annual Operating Cost':[['Optional'], '$', [float], [], False],\
-                       'Width':[['text entry'], 'ft', [float], [], False],\
-                       'Length':[['text entry'], 'ft', [float], [], False]}
-    if mod_type == 'Foundation':
-        temp_foundation_module_dict = {'Depth': [['text entry'], '', [float], ['Foundation Depth'], False]}
-        out_dict.update(temp_foundation_module_dict)
-        out_vars = ['Volume', 'Depth']
-        return out_dict, out_vars
-    elif mod_type == 'Non-overflow':
-        temp_nonoverflow_module_dict = {'Height': [['Optional'], '', [float], ['Non-overflow Height'], False]}
-        out_dict['Length'][0] = ['Optional'] 
-        out_dict.update(temp_nonoverflow_module_dict)
-        out_vars = ['Volume', 'Normal Operating Level']
-        return out_dict, out_vars
-    else:
-        temp_passage_module_att_dict = {'Design Flow':[['text entry'], 'cfs', [float], [], False], \
-                                'Operating Months':[['month box'], '', [], [], False], \
-                                'Instream or Diversion': [['checkbox', 'Diversion (Y/N)'], '', [], [], False]}
-        out_vars = []
-        out_dict.update(temp_passage_module_att_dict)
-        if (mod_type == 'Fish Passage') or (mod_type == 'Recreation'):
-            fish_and_rec_dict = {'Maximum Headwater Drop':[['text entry'], 'ft', [float], [], True], \
-                             'Maximum Headwater Rise':[['text entry'], 'ft', [float], [], True], \
-                            'Minimum Tailwater Level':[['text entry'], 'ft', [float], [], True], \
-                            'Maximum Tailwater Level':[['text entry'], 'ft', [float], [], True], \
-                            'Number of Steps':[['Optional'], 'ft', [float], ['Drop height per step'], False], \
-                            'Step Type':[['OptionMenu', ['Continuous', 'Round up', 'Round down']], 'ft', [float], ['Step Type'], False]}
-            out_dict['Length'][0] = ['Optional'] #Make sure only number of steps is not a function of number of steps
-            out_dict['Design Flow'][0] = ['Optional']
-            out_dict.update(fish_and_rec_dict)
-            for i in ['Normal Operating Level', 'Mean Daily Flow', 'Number of Steps']:
-                out_vars.append(i)
-        elif mod_type == 'Generation':
-            temp_gen_att_dict = {'Minimum Operating Flow':[['Optional'], 'cfs', [float], [], False],\
-                            'Maximum Operating Flow':[['Optional'], 'cfs', [float], [], False],\
-                            'Minimum Operating Head':[['Optional'], 'ft', [float], [], False],\
-                            'Design Head':[['text entry'], 'ft', [float], [], False],\
-                            'Maximum Operating Head':[['Optional'], 'ft', [float], [], False],\
-                            'Flow Efficiency Curve':[['Equation',['Efficiency vs. Flow', 'Flow (cfs)','Turbine Efficiency (%)']], '',[], ['Turbine Flow Efficiency'], False],\
-                            'Head Efficiency Curve':[['Equation',['Efficiency vs. Head Deviation','Relative Head (%)','Turbine Efficiency (%)']], '', [], ['Turbine Head Efficiency'], True],\
-                            'Max Power':[['Optional'], 'kW', [float], [], True],\
-                            'Cost of Start-Stops':[['text entry'], '$/start', [float], [], True]}
-            out_dict['Width'][0] = ['Optional']
-            out_dict['Length'][0] = ['Optional']
-            out_dict.update(temp_gen_att_dict)
-            out_vars.append('Nominal Power')
-            out_vars.append('Design Head')
-            out_vars.append('Design Head and Nominal Power')
-            out_vars.append('Design Flow and Nominal Power')
-            out_vars.append('Design Flow and Design Head')
-            
-        elif mod_type == 'Sediment Passage':
-            temp_sed_att_dict = {'Operating Mode':[['OptionMenu',['Continuous', 'Sluicing', 'Flushing']], '', [], [], False], \
-                            'Operating Flow':[['Optional'], 'cfs', [float], ['Sluicing Operating Flow'], True], \
-                            'Flushing Duration':[['text entry'], 'days', [int], [], True], \
-                            'Operating Frequency':[['text entry'], 'flushes/year', [int], [], True]}
-            out_dict.update(temp_sed_att_dict)
-            out_dict['Design Flow'][0] = ['Optional']
-            out_vars.append('Mean Daily Flow')
-        elif mod_type == 'Water Passage':
-            temp_wat_att_dict = {'Operating Mode':[['OptionMenu',['Continuous', 'Controlled Spillway', 'Uncontrolled Spillway']], '', [], [], False], \
-                            'Weir Coefficient':[['text entry'], '(C)', [float], ['Tool Tip - Uncontrolled Spillway'], True], \
-                            'Crest Height':[['Optional'], 'ft', [float], ['Tool Tip - Uncontrolled Spillway'], True]}
-            out_dict['Design Flow'][0] = ['Optional']
-            out_dict.update(temp_wat_att_dict)
-            out_vars.append('Normal Operating Level')
-        return out_dict, out_vars
- 
 #%%## Input creation and retrieval - useful when creating inputs based on dicts
 #Takes an input dict from a frame or page and creates a label, entry, unit label, and support tool button for each attribute
 #Each input dict has a key that is the name of the attribute
@@ -5988,8 +5620,10 @@ def pack_attributes(page, parent, row_counter=0):
         row_counter+=1
 
 #%%## Driver Code 
-root = tk.Tk()
-app = tkinterApp(root) 
-root.mainloop()
-plt.close('all')
+if __name__ == '__main__': #Guard is required so that worker processes used for parallel evaluation do not open the application
+    root = tk.Tk()
+    app = tkinterApp(root) 
+    root.mainloop()
+    if plt.module is not None: #Matplotlib is only imported if a figure was made
+        plt.close('all')
         
\ No newline at end of file
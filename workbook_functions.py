@@ -0,0 +1,544 @@
+# -*- coding: utf-8 -*-
+"""
+Functions to read the waterSHED Workbook and the module attribute definitions. These do not use tkinter, so they can be used by the user interface and the batch runner.
+"""
+#%%## IMPORT PACKAGES
+import module_classes as mc
+import pandas as pd
+import numpy as np
+
+#%%## Global Functions
+#Checks whether the entry can be properly cast to a given data type and reports 'Error' otherwise
+def check_entry(entry, casts): 
+    val = None
+    for cast in casts:
+        try:
+            val = cast(entry)
+        except (TypeError, ValueError):
+            pass
+        else:
+            break
+    if (val is None) or (val != val):
+        val = 'Error'
+    return val
+
+#%%##Import from Workbook Functions
+#Converts the dataframe into an Equation object
+def get_equation_from_df(df): #2 columns, [Attribute,Value]
+    try:
+        eq_name = df.iloc[0, 1]
+        eq_form = df.iloc[1, 1]
+        if eq_form == 'Linear':
+            coeffs = [float(df.iloc[2,1]), float(df.iloc[3,1])]
+        else:
+            coeffs = [float(df.iloc[2,1]), float(df.iloc[3,1]), float(df.iloc[4,1])]
+            
+        x_label = df.iloc[5, 1]
+        y_label = df.iloc[6,1]
+        out_eq = mc.Equation(eq_name, eq_form, coeffs, 'Discharge (cfs)', 'Stage (ft)', x_label, y_label)
+        return out_eq
+    except:
+        return False
+
+#Converts two equation dicts into a piecewise equation
+def get_piecewise(eq_name, eq_dict):
+    try:
+        eq_names = eq_name.split(' + ')
+        eq_list = []
+        range_list = [eq_dict[eq_names[0]].lb]
+        for i in eq_names:
+            eq_list.append(eq_dict[i])
+            range_list.append(eq_dict[i].ub)
+        out_eq = mc.PiecewiseEquation(eq_names[0], eq_list, eq_list[0].xlabel, eq_list[0].ylabel, range_list)
+        return out_eq
+    except:
+        return False
+
+#Creates a module from the dataFrame input
+def import_mod_from_df(df, eq_dict):
+    mod_class = df.iloc[0,1]
+    raw = {}
+    ad = {}
+    mod_attr = get_static_module_attributes(mod_class)
+    row = 1
+    for key in mod_attr.keys(): #Based on input order
+        raw[key] = df.iloc[row,1]
+        row += 1
+    
+    for key in raw.keys():
+        input_type = mod_attr[key][0][0]
+        if raw[key] is np.nan:
+            ad[key] = None
+        else:
+            if input_type == 'text entry':
+                ad[key] = check_entry(raw[key], mod_attr[key][2])
+                if (ad[key] == 'Error') or (ad[key] == ''):
+                    if mod_attr[key][4]: #is_optional
+                        ad[key] = None
+                    else:
+                        return False
+            elif input_type == 'Equation':
+                if raw[key] not in eq_dict.keys():
+                    if mod_attr[key][4]:
+                        ad[key] = None
+                    else:
+                        return False
+                elif ' + ' in raw[key]: #If a piecewise equation
+                    pcwise = get_piecewise(raw[key], eq_dict)
+                    if pcwise is False:
+                        if mod_attr[key][4]:
+                            ad[key] = None
+                        else:
+                            return False
+                else:
+                    ad[key] = eq_dict[raw[key]]
+                    if ad[key] is False:
+                        if mod_attr[key][4]:
+                            ad[key] = None
+                        else:
+                            return False
+            elif input_type == 'OptionMenu':
+                if raw[key] not in mod_attr[key][0][1]:
+                    return False
+                else:
+                    ad[key] = raw[key]
+            elif input_type == 'month box':
+                months = get_month_input(raw[key])
+                if months is not False:
+                    ad[key] = months
+                else:
+                    return False
+            elif input_type == 'checkbox':
+                if raw[key] == 'Y':
+                    ad[key] = True
+                else:
+                    ad[key] = False
+            else:
+                print('input type error')
+                return False
+    
+    mod = create_mod_from_dict(mod_class, ad)
+    return mod
+
+
+#Turns a dict containing all the attribute information into a module object. Checks for optional attributes
+def create_mod_from_dict(mod_class, ad): 
+    out_mod = False
+    try:
+        if mod_class == 'Generation':
+            out_mod = mc.Generation_module(ad['Name'],ad['Capital Cost'], ad['Annual Operating Cost'],\
+                                           ad['Width'], ad['Length'], ad['Design Flow'], ad['Operating Months'], \
+                                               ad['Minimum Operating Flow'],ad['Maximum Operating Flow'],ad['Minimum Operating Head'], \
+                                                  ad['Design Head'], ad['Maximum Operating Head'],ad['Flow Efficiency Curve'], \
+                                                      ad['Head Efficiency Curve'],ad['Max Power'], ad['Cost of Start-Stops'], ad['Instream or Diversion'])    
+    
+        elif mod_class == 'Fish Passage':
+            out_mod = mc.Fish_module(ad['Name'],ad['Capital Cost'], ad['Annual Operating Cost'],\
+                                           ad['Width'], ad['Length'], ad['Design Flow'], ad['Operating Months'], \
+                                               ad['Maximum Headwater Drop'],ad['Maximum Headwater Rise'],\
+                                                   ad['Minimum Tailwater Level'], ad['Maximum Tailwater Level'], ad['Instream or Diversion'])
+            
+        elif mod_class == 'Sediment Passage':
+            if ad['Operating Mode'] == 'Continuous':
+                out_mod = mc.Sediment_module(ad['Name'],ad['Capital Cost'], ad['Annual Operating Cost'],\
+                                               ad['Width'], ad['Length'], ad['Design Flow'], ad['Operating Months'], \
+                                                   ad['Operating Mode'], ad['Instream or Diversion'])
+            elif ad['Operating Mode'] == 'Sluicing':
+                if ad['Operating Flow'] == 'Error':
+                    return False
+                else:
+                    out_mod = mc.Sediment_module(ad['Name'],ad['Capital Cost'], ad['Annual Operating Cost'],\
+                                               ad['Width'], ad['Length'], ad['Design Flow'], ad['Operating Months'], \
+                                                   ad['Operating Mode'], ad['Operating Flow'], ad['Instream or Diversion'])
+            elif ad['Operating Mode'] == 'Flushing':
+                if (ad['Flushing Duration'] == 'Error') or (ad['Operating Frequency'] == 'Error'):
+                    return False
+                else:
+                    out_mod = mc.Sediment_module(ad['Name'],ad['Capital Cost'], ad['Annual Operating Cost'],\
+                                               ad['Width'], ad['Length'], ad['Design Flow'], ad['Operating Months'], \
+                                                   ad['Operating Mode'], ad['Operating Flow'], ad['Flushing Duration'], \
+                                                       ad['Operating Frequency'], ad['Instream or Diversion'])
+        elif mod_class == 'Recreation':
+            out_mod = mc.Recreation_module(ad['Name'],ad['Capital Cost'], ad['Annual Operating Cost'],\
+                                           ad['Width'], ad['Length'], ad['Design Flow'], ad['Operating Months'], \
+                                               ad['Maximum Headwater Drop'],ad['Maximum Headwater Rise'],\
+                                                   ad['Minimum Tailwater Level'], ad['Maximum Tailwater Level'], ad['Instream or Diversion'])
+        elif mod_class == 'Water Passage':
+            if (ad['Operating Mode'] == 'Continuous') or (ad['Operating Mode'] == 'Controlled Spillway'):
+                out_mod = mc.Water_module(ad['Name'],ad['Capital Cost'], ad['Annual Operating Cost'],\
+                                           ad['Width'], ad['Length'], ad['Design Flow'], ad['Operating Months'], \
+                                               ad['Operating Mode'], ad['Instream or Diversion'])
+            elif ad['Operating Mode'] == 'Uncontrolled Spillway':
+                if (ad['Weir Coefficient'] == 'Error') or (ad['Crest Height'] == 'Error'):
+                    return False
+                else:
+                    out_mod = mc.Water_module(ad['Name'],ad['Capital Cost'], ad['Annual Operating Cost'],\
+                                           ad['Width'], ad['Length'], ad['Design Flow'], ad['Operating Months'], \
+                                               ad['Operating Mode'],ad['Weir Coefficient'],ad['Crest Height'], ad['Instream or Diversion'])
+        elif mod_class == 'Non-overflow':
+            out_mod = mc.Nonoverflow_module(ad['Name'],ad['Capital Cost'], ad['Annual Operating Cost'],\
+                                           ad['Width'], ad['Length'])
+        elif mod_class == 'Foundation':
+            out_mod = mc.Foundation_module(ad['Name'],ad['Capital Cost'], ad['Annual Operating Cost'],\
+                                           ad['Width'], ad['Length'])
+        return out_mod
+    except:
+        return False
+
+#Turns the month input string into a list of month index integers
+def get_month_input(entry_str):
+    try:
+        if entry_str == 'all':
+            return [i for i in range(1, 13)]
+        else:
+            month_strs = entry_str.split(',')
+            return [int(i) for i in month_strs]
+    except:
+        return False
+
+#Imports a certain type of information from the waterSHED workbook when given a path name and type of object to import
+def import_from_workbook(path_name, import_type):
+    eq_dict = {}
+    #Get equations
+    try:
+        eq_df = pd.read_excel(path_name, sheet_name='Equations')
+        for c in range(0, int(len(eq_df.columns)/2)):
+            eq = get_equation_from_df(eq_df.iloc[:, 2*c:2*c+2])
+            if eq is not False:
+                eq_dict[eq.name] = eq
+    except:
+        pass
+    
+    all_list = []
+    try: 
+        #For each page in the workbook, create dataframes based on the assumed sheet structure, check for errors, and try to create the respective object
+        if (import_type == 'Site') or (import_type == 'All'):
+            df = pd.read_excel(path_name, sheet_name='Site')
+            
+            char_col = 1
+            name = df.iloc[0,char_col]
+            width = check_entry(df.iloc[1,char_col], [float])
+            elevation = check_entry(df.iloc[2,char_col], [float])
+            slope = check_entry(df.iloc[3,char_col], [float])
+            trap_b = check_entry(df.iloc[4, char_col], [float])
+            
+            
+            optional = [False, False, True, True, True]
+            vals = [name, width,  slope, trap_b,elevation]
+            for i in range(0, len(vals)):
+                if (vals[i] == '') or (vals[i] == 'Error'):
+                    if optional[i] == False:
+                        return 'Unable to interpret a required input'
+                    else:
+                        vals[i] = None
+            
+            stage_eq_name = df.iloc[5, char_col]
+            res_eq_name = df.iloc[6, char_col]
+            
+            if stage_eq_name in eq_dict.keys():    
+                stage_eq = eq_dict[stage_eq_name]
+            elif ' + ' in stage_eq_name:
+                stage_eq = get_piecewise(stage_eq_name, eq_dict)
+                if stage_eq is False:
+                    return 'Unable to identify the stage-discharge equation. Please make sure the equation names match.'                
+            else:
+                return 'Unable to identify the stage-discharge equation. Please make sure the equation names match.'
+            
+            if res_eq_name in eq_dict.keys():
+                res_eq = eq_dict[res_eq_name]
+            else:
+                res_eq = None
+
+            inf_df = pd.read_excel(path_name, sheet_name='Inflows')
+            daily_col = 0
+            daily_df = inf_df.iloc[1:, [daily_col,daily_col+1]]
+            daily_df.columns = ['dateTime', 'Discharge (cfs)']
+            daily_df['Discharge (cfs)'] = pd.to_numeric(daily_df['Discharge (cfs)'], errors='coerce')
+            daily_df['dateTime'] = pd.to_datetime(daily_df['dateTime'], infer_datetime_format=True)
+            daily_df = daily_df.dropna()
+            
+            
+            if len(daily_df) <=0:
+                return 'Unable to import daily flow data which is a required input.'
+            else:
+                daily_flow_data = mc.FlowData('Daily Inflows', daily_df)
+            
+            peak_df = pd.read_excel(path_name, sheet_name='Peak Flows')
+            peak_col = 0
+            peak_df = peak_df.iloc[1:, [peak_col,peak_col+1]]
+            peak_df.columns = ['dateTime', 'Discharge (cfs)']
+            peak_df['Discharge (cfs)'] = pd.to_numeric(peak_df['Discharge (cfs)'], errors='coerce')
+            peak_df['dateTime'] = pd.to_datetime(peak_df['dateTime'], infer_datetime_format=True)
+            peak_df = peak_df.dropna()
+            
+            
+            if len(peak_df)<= 0:
+                peak_flow_data = None
+            else:
+                peak_flow_data = mc.FlowData('Peak Flows', peak_df)
+            
+            out_site = mc.Site(vals[0], vals[1], daily_flow_data, stage_eq, res_eq, vals[2], vals[3], peak_flow_data, vals[4])
+            
+            if import_type == 'All':
+                all_list.append(out_site)
+            else:
+                return out_site
+
+    
+        if (import_type == 'Costs') or (import_type == 'All'):
+
+            df = pd.read_excel(path_name, sheet_name='Costs')
+            row = 0
+            col = 1
+            energy = check_entry(df.iloc[row, col], [float])
+            add_capital = check_entry(df.iloc[row+1, col], [float])
+            add_noncapital = check_entry(df.iloc[row+2, col], [float])
+            excavation = check_entry(df.iloc[row+3, col], [float])
+            overhead = check_entry(df.iloc[row+4, col], [float])
+            overhead_type = df.iloc[row+4, col+2]
+            engineering = check_entry(df.iloc[row+5, col], [float])
+            engineering_type = df.iloc[row+5, col+2]
+            contingency = check_entry(df.iloc[row+6, col], [float])
+            contingency_type = df.iloc[row+6, col+2]
+            om = check_entry(df.iloc[row+7, col], [float])
+            om_type = df.iloc[row+7, col+2]
+            recreation = check_entry(df.iloc[row+8, col], [float])
+            flood = check_entry(df.iloc[row+9, col], [float])
+            discount = check_entry(df.iloc[row+10, col], [float])
+            proj_life = check_entry(df.iloc[row+11, col], [float])
+            
+            for i in [energy, add_capital, add_noncapital, excavation, overhead, engineering, contingency, om, recreation, flood, discount, proj_life]:
+                if (i == '') or (i == 'Error'):
+                    return 'Unable to import cost information. Make sure entries are numeric. Any unused entries, must be set to zero.'
+            
+            for i in [overhead_type, engineering_type, contingency_type, om_type]:
+                if i not in ['($) Total Cost', '(%) Percent of ICC']:
+                    return 'Make sure unit option are either (%) Percent of ICC or ($) Total Cost'
+            
+            out_costs = mc.Cost_tables(energy, excavation_cost=excavation,\
+                        overhead_cost=[overhead, overhead_type], engineering_cost=[engineering, engineering_type],\
+                            contingency_cost=[contingency, contingency_type], recreation_price=recreation,\
+                                flood_price =flood, om_costs=[om,om_type], discount_rate=discount, \
+                                    project_life=proj_life, add_capital=add_capital, add_noncapital=add_noncapital)
+            if import_type == 'All':
+                all_list.append(out_costs)
+            else:
+                return out_costs
+        
+        if (import_type == 'Preferences') or (import_type == 'All'):
+
+            df = pd.read_excel(path_name, sheet_name='Preferences')
+            
+            nol = check_entry(df.iloc[0, 1], [float])
+            if (nol == '') or (nol == 'Error'):
+               return 'Unable to upload normal operating level. Please make sure it is import as a numeric value.'
+           
+            try:
+                start = pd.to_datetime(df.iloc[1, 1])
+                end = pd.to_datetime(df.iloc[2, 1])
+            except:
+                return 'Unable to upload test data start and end dates.'
+            
+            dispatch_mode = df.iloc[3,1]
+            if dispatch_mode not in ['Design Ramping', 'Peak Ramping', 'Simple Greedy', 'Advanced Greedy', 'Dynamic Programming']:
+                dispatch_mode = 'Design Flow'
+                
+            overrun_input = df.iloc[4, 1]
+            if overrun_input == 'Y':
+                overrun = True
+            else:
+                overrun = False
+            
+            notch_flow = check_entry(df.iloc[5, 1], [float])
+            if (notch_flow == '') or (notch_flow == 'Error'):
+                notch_flow = None
+            min_flow = check_entry(df.iloc[6, 1], [float])
+            if (min_flow == '') or (min_flow == 'Error'):
+                min_flow = None
+            min_flow_type = check_entry(df.iloc[6, 3], [str])
+            if (min_flow_type != 'cfs (Constant)') or (min_flow_type != '% (Percent of inflow)'):
+                min_flow_type = None
+                 
+            op_cls = ['Gen', 'Sed', 'Fish', 'Rec', 'Wat']
+            op_rank = []
+            for rank in range(1, 6):
+                for mod in range(0,5):
+                    mod_rank = df.iloc[mod+8,1]
+                    if mod_rank not in [1,2,3,4,5]:
+                        return 'Unable to import operation priority rankings.'
+                    if mod_rank == rank:
+                        op_rank.append(op_cls[mod])
+            
+            #The Simulation Engine row is optional, workbooks without it use the Daily Loop engine
+            sim_engine = 'Daily Loop'
+            engine_rows = df.index[df.iloc[:, 0] == 'Simulation Engine']
+            if len(engine_rows) > 0:
+                sim_engine = df.loc[engine_rows[0]].iloc[1]
+                if sim_engine not in ['Daily Loop', 'Vectorized']:
+                    sim_engine = 'Daily Loop'
+            
+            pref = mc.Facility_preferences(op_rank,nol, start, end, overrun, min_flow, min_flow_type, notch_flow, dispatch_mode, sim_engine)
+            if import_type == 'All':
+                all_list.append(pref)
+            else:
+                return pref
+            
+        if (import_type == 'Module Library') or (import_type == 'All'):
+            mod_list = []
+            df = pd.read_excel(path_name, sheet_name='Module Library')
+            for c in range(0, int(len(df.columns)/2)):
+                mod = import_mod_from_df(df.iloc[:,2*c:2*c+2], eq_dict)
+                if mod is not False:    
+                    mod_list.append(mod)
+            if import_type == 'All':
+                all_list.append(mod_list)
+            else:
+                return mod_list     
+    
+        if (import_type == 'Species') or (import_type == 'All'):
+            species_list = []
+            try:
+                df = pd.read_excel(path_name, sheet_name='Species List')
+                for c in range(0, int(len(df.columns)/2)):
+                    col = 2*c + 1
+                    name = check_entry(df.iloc[0, col], [str])
+                    a = check_entry(df.iloc[1, col], [float])
+                    b = check_entry(df.iloc[2, col], [float])
+                    up = get_month_input(check_entry(df.iloc[3, col], [str]))
+                    down = get_month_input(check_entry(df.iloc[4, col], [str]))
+                
+                    spec = mc.Species(name, up, down, a, b)
+                    species_list.append(spec)
+            except:
+                species_list = []
+            if import_type == 'All':
+                all_list.append(species_list)
+            else:
+                return species_list     
+        return all_list
+    except:
+        return 'Unable to import from the watershed workbook. Please double check inputs and that the file is closed.'
+    
+#%%## Static Module Attributes
+#Returns a dict with the attribute and its characteristics for each module class
+#attribute name: [input info], unit, data validate, [support tool names], is_optional boolean
+def get_static_module_attributes(mod_type): 
+    out_dict = {'Name':[['text entry'], '', [str], [], False],\
+                       'Capital Cost':[['text entry'], '$', [float], [], False],\
+                       'Annual Operating Cost':[['text entry'], '$', [float], [], False],\
+                       'Width':[['text entry'], 'ft', [float], [], False],\
+                       'Length':[['text entry'], 'ft', [float], [], False]}
+        
+    if mod_type == 'Foundation':
+        return out_dict
+    elif mod_type == 'Non-overflow':
+        return out_dict
+    else:
+        temp_passage_module_att_dict = {'Design Flow':[['text entry'], 'cfs', [float], [], False], \
+                                'Operating Months':[['month box'], '', [], [], False], \
+                                'Instream or Diversion': [['checkbox', 'Diversion (Y/N)'], '', [], [], False]}
+        out_dict.update(temp_passage_module_att_dict)
+                
+        if (mod_type == 'Fish Passage') or (mod_type == 'Recreation'):
+            fish_and_rec_dict = {'Maximum Headwater Drop':[['text entry'], 'ft', [float], [], True], \
+                             'Maximum Headwater Rise':[['text entry'], 'ft', [float], [], True], \
+                            'Minimum Tailwater Level':[['text entry'], 'ft', [float], [], True], \
+                            'Maximum Tailwater Level':[['text entry'], 'ft', [float], [], True]}
+            out_dict.update(fish_and_rec_dict)
+        elif mod_type == 'Generation':
+            temp_gen_att_dict = {'Minimum Operating Flow':[['text entry'], 'cfs', [float], [], False],\
+                            'Maximum Operating Flow':[['text entry'], 'cfs', [float], [], False],\
+                            'Minimum Operating Head':[['text entry'], 'ft', [float], [], False],\
+                            'Design Head':[['text entry'], 'ft', [float], [], False],\
+                            'Maximum Operating Head':[['text entry'], 'ft', [float], [], False],\
+                            'Flow Efficiency Curve':[['Equation',['Efficiency vs. Flow', 'Flow (cfs)','Turbine Efficiency (%)']], '',[], ['Turbine Flow Efficiency'], False],\
+                            'Head Efficiency Curve':[['Equation',['Efficiency vs. Head Deviation','Relative Head (%)','Turbine Efficiency (%)']], '', [], ['Turbine Head Efficiency'], True],\
+                            'Max Power':[['text entry'], 'kW', [float], [], True],\
+                            'Cost of Start-Stops':[['text entry'], '$/start', [float], [], True]}
+            out_dict.update(temp_gen_att_dict)
+        elif mod_type == 'Sediment Passage':
+            temp_sed_att_dict = {'Operating Mode':[['OptionMenu',['Continuous', 'Sluicing', 'Flushing']], '', [], [], False], \
+                            'Operating Flow':[['text entry'], 'cfs', [float], ['Sluicing Operating Flow'], True], \
+                            'Flushing Duration':[['text entry'], 'days', [int], [], True], \
+                            'Operating Frequency':[['text entry'], 'flushes/year', [int], [], True]}
+            out_dict.update(temp_sed_att_dict)
+        elif mod_type == 'Water Passage':
+            temp_wat_att_dict = {'Operating Mode':[['OptionMenu',['Continuous', 'Controlled Spillway', 'Uncontrolled Spillway']], '', [], [], False], \
+                            'Weir Coefficient':[['text entry'], '(C)', [float], ['Tool Tip - Uncontrolled Spillway'], True], \
+                            'Crest Height':[['text entry'], 'ft', [float], ['Tool Tip - Uncontrolled Spillway'], True]}
+            out_dict.update(temp_wat_att_dict)
+        return out_dict
+    
+# Dynamic Module Attributes
+#Returns the module attributes and available controlling variables for a given module class
+#attribute name: [input info], unit, data validate, [support tool names], is_optional boolean
+def get_dynamic_module_attributes(mod_type): 
+    out_dict = {'Name':[['text entry'], '', [str], [], False],\
+                       'Capital Cost':[['Optional'], '$', [float], [], False],\
+                       'Annual Operating Cost':[['Optional'], '$', [float], [], False],\
+                       'Width':[['text entry'], 'ft', [float], [], False],\
+                       'Length':[['text entry'], 'ft', [float], [], False]}
+    if mod_type == 'Foundation':
+        temp_foundation_module_dict = {'Depth': [['text entry'], '', [float], ['Foundation Depth'], False]}
+        out_dict.update(temp_foundation_module_dict)
+        out_vars = ['Volume', 'Depth']
+        return out_dict, out_vars
+    elif mod_type == 'Non-overflow':
+        temp_nonoverflow_module_dict = {'Height': [['Optional'], '', [float], ['Non-overflow Height'], False]}
+        out_dict['Length'][0] = ['Optional'] 
+        out_dict.update(temp_nonoverflow_module_dict)
+        out_vars = ['Volume', 'Normal Operating Level']
+        return out_dict, out_vars
+    else:
+        temp_passage_module_att_dict = {'Design Flow':[['text entry'], 'cfs', [float], [], False], \
+                                'Operating Months':[['month box'], '', [], [], False], \
+                                'Instream or Diversion': [['checkbox', 'Diversion (Y/N)'], '', [], [], False]}
+        out_vars = []
+        out_dict.update(temp_passage_module_att_dict)
+        if (mod_type == 'Fish Passage') or (mod_type == 'Recreation'):
+            fish_and_rec_dict = {'Maximum Headwater Drop':[['text entry'], 'ft', [float], [], True], \
+                             'Maximum Headwater Rise':[['text entry'], 'ft', [float], [], True], \
+                            'Minimum Tailwater Level':[['text entry'], 'ft', [float], [], True], \
+                            'Maximum Tailwater Level':[['text entry'], 'ft', [float], [], True], \
+                            'Number of Steps':[['Optional'], 'ft', [float], ['Drop height per step'], False], \
+                            'Step Type':[['OptionMenu', ['Continuous', 'Round up', 'Round down']], 'ft', [float], ['Step Type'], False]}
+            out_dict['Length'][0] = ['Optional'] #Make sure only number of steps is not a function of number of steps
+            out_dict['Design Flow'][0] = ['Optional']
+            out_dict.update(fish_and_rec_dict)
+            for i in ['Normal Operating Level', 'Mean Daily Flow', 'Number of Steps']:
+                out_vars.append(i)
+        elif mod_type == 'Generation':
+            temp_gen_att_dict = {'Minimum Operating Flow':[['Optional'], 'cfs', [float], [], False],\
+                            'Maximum Operating Flow':[['Optional'], 'cfs', [float], [], False],\
+                            'Minimum Operating Head':[['Optional'], 'ft', [float], [], False],\
+                            'Design Head':[['text entry'], 'ft', [float], [], False],\
+                            'Maximum Operating Head':[['Optional'], 'ft', [float], [], False],\
+                            'Flow Efficiency Curve':[['Equation',['Efficiency vs. Flow', 'Flow (cfs)','Turbine Efficiency (%)']], '',[], ['Turbine Flow Efficiency'], False],\
+                            'Head Efficiency Curve':[['Equation',['Efficiency vs. Head Deviation','Relative Head (%)','Turbine Efficiency (%)']], '', [], ['Turbine Head Efficiency'], True],\
+                            'Max Power':[['Optional'], 'kW', [float], [], True],\
+                            'Cost of Start-Stops':[['text entry'], '$/start', [float], [], True]}
+            out_dict['Width'][0] = ['Optional']
+            out_dict['Length'][0] = ['Optional']
+            out_dict.update(temp_gen_att_dict)
+            out_vars.append('Nominal Power')
+            out_vars.append('Design Head')
+            out_vars.append('Design Head and Nominal Power')
+            out_vars.append('Design Flow and Nominal Power')
+            out_vars.append('Design Flow and Design Head')
+            
+        elif mod_type == 'Sediment Passage':
+            temp_sed_att_dict = {'Operating Mode':[['OptionMenu',['Continuous', 'Sluicing', 'Flushing']], '', [], [], False], \
+                            'Operating Flow':[['Optional'], 'cfs', [float], ['Sluicing Operating Flow'], True], \
+                            'Flushing Duration':[['text entry'], 'days', [int], [], True], \
+                            'Operating Frequency':[['text entry'], 'flushes/year', [int], [], True]}
+            out_dict.update(temp_sed_att_dict)
+            out_dict['Design Flow'][0] = ['Optional']
+            out_vars.append('Mean Daily Flow')
+        elif mod_type == 'Water Passage':
+            temp_wat_att_dict = {'Operating Mode':[['OptionMenu',['Continuous', 'Controlled Spillway', 'Uncontrolled Spillway']], '', [], [], False], \
+                            'Weir Coefficient':[['text entry'], '(C)', [float], ['Tool Tip - Uncontrolled Spillway'], True], \
+                            'Crest Height':[['Optional'], 'ft', [float], ['Tool Tip - Uncontrolled Spillway'], True]}
+            out_dict['Design Flow'][0] = ['Optional']
+            out_dict.update(temp_wat_att_dict)
+            out_vars.append('Normal Operating Level')
+        return out_dict, out_vars